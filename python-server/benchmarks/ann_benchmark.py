@@ -0,0 +1,144 @@
+"""Recall, latency and size of the flat, IVF and HNSW index types at growing corpus sizes.
+
+Runs offline on synthetic, clustered, unit-length vectors shaped like MiniLM
+embeddings. Recall@k is measured against exact flat search. Quantized indexes
+are measured both as-is and with exact re-ranking of a larger shortlist.
+
+    python -m benchmarks.ann_benchmark --sizes 1000 10000 100000 --quantizations none sq8 pq
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from typing import Any, Callable, Dict, List
+
+import faiss
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.index_factory import INDEX_TYPES, QUANTIZATIONS, create_index, index_type_of, quantization_of, rerank_exact
+
+DIMENSION = 384
+
+def synthetic_vectors(count: int, dimension: int, seed: int, clusters: int = 64) -> np.ndarray:
+    """Unit vectors drawn around random topic centroids, like sentence embeddings"""
+    rng = np.random.default_rng(seed)
+    centroids = rng.standard_normal((clusters, dimension)).astype(np.float32)
+    assignments = rng.integers(0, clusters, size=count)
+    vectors = centroids[assignments] + 0.6 * rng.standard_normal((count, dimension)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+def recall_at_k(found: np.ndarray, exact: np.ndarray) -> float:
+    hits = sum(len(set(row) & set(truth)) for row, truth in zip(found.tolist(), exact.tolist()))
+    return hits / exact.size
+
+def latency_percentiles(search: Callable[[np.ndarray], np.ndarray], queries: np.ndarray) -> Dict[str, float]:
+    timings = []
+    for query in queries:
+        started = time.perf_counter()
+        search(query[None, :])
+        timings.append((time.perf_counter() - started) * 1000)
+    return {
+        "p50_ms": round(float(np.percentile(timings, 50)), 4),
+        "p99_ms": round(float(np.percentile(timings, 99)), 4)
+    }
+
+def benchmark_size(
+    size: int,
+    index_types: List[str],
+    quantizations: List[str],
+    queries: int,
+    k: int,
+    seed: int,
+    rerank_factor: int
+) -> List[Dict[str, Any]]:
+    corpus = synthetic_vectors(size, DIMENSION, seed)
+    query_vectors = synthetic_vectors(queries, DIMENSION, seed + 1)
+    ids = np.arange(size, dtype=np.int64)
+
+    exact_index = create_index("flat", corpus)
+    exact_index.add_with_ids(corpus, ids)
+    _, exact = exact_index.search(query_vectors, k)
+
+    def lookup_vectors(labels: np.ndarray) -> np.ndarray:
+        return corpus[labels]
+
+    results = []
+    for index_type in index_types:
+        for quantization in quantizations:
+            started = time.perf_counter()
+            index = create_index(index_type, corpus, quantization)
+            index.add_with_ids(corpus, ids)
+            build_seconds = time.perf_counter() - started
+
+            def search(queries: np.ndarray) -> np.ndarray:
+                return index.search(queries, k)[1]
+
+            row = {
+                "corpus_size": size,
+                "index_type": index_type,
+                "quantization": quantization,
+                "built_as": f"{index_type_of(index)}/{quantization_of(index)}",
+                "build_seconds": round(build_seconds, 3),
+                "index_bytes": int(faiss.serialize_index(index).nbytes),
+                f"recall@{k}": round(recall_at_k(search(query_vectors), exact), 4),
+                **latency_percentiles(search, query_vectors)
+            }
+
+            if quantization_of(index) != "none" and rerank_factor > 1:
+                def search_reranked(queries: np.ndarray) -> np.ndarray:
+                    shortlist = index.search(queries, k * rerank_factor)[1]
+                    return rerank_exact(queries, shortlist, lookup_vectors, k)
+
+                reranked_latency = latency_percentiles(search_reranked, query_vectors)
+                row.update({
+                    f"reranked_recall@{k}": round(recall_at_k(search_reranked(query_vectors), exact), 4),
+                    "reranked_p50_ms": reranked_latency["p50_ms"],
+                    "reranked_p99_ms": reranked_latency["p99_ms"]
+                })
+            results.append(row)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--index-types", nargs="+", default=list(INDEX_TYPES), choices=INDEX_TYPES)
+    parser.add_argument("--quantizations", nargs="+", default=["none"], choices=QUANTIZATIONS)
+    parser.add_argument("--rerank-factor", type=int, default=4)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("-k", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="ann_benchmark.json")
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        rows = benchmark_size(
+            size, args.index_types, args.quantizations, args.queries, args.k, args.seed, args.rerank_factor
+        )
+        for row in rows:
+            results.append(row)
+            reranked = row.get(f"reranked_recall@{args.k}")
+            print(
+                f"{row['corpus_size']:>9} {row['index_type']:<5} {row['quantization']:<4} (as {row['built_as']:<10}) "
+                f"recall@{args.k}={row[f'recall@{args.k}']:.4f} "
+                + (f"reranked={reranked:.4f} " if reranked is not None else "")
+                + f"p50={row['p50_ms']:.3f}ms p99={row['p99_ms']:.3f}ms "
+                f"size={row['index_bytes'] / 1e6:.1f}MB build={row['build_seconds']:.2f}s"
+            )
+
+    with open(args.output, "w") as f:
+        json.dump({
+            "k": args.k,
+            "queries": args.queries,
+            "seed": args.seed,
+            "rerank_factor": args.rerank_factor,
+            "results": results
+        }, f, indent=2)
+    print(f"Wrote {args.output}")
+
+if __name__ == "__main__":
+    main()
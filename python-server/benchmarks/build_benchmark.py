@@ -0,0 +1,162 @@
+"""Time per phase, throughput and peak RSS of full index builds at growing corpus sizes.
+
+Runs the server's refresh paths in a scratch directory and collects the build
+report each one writes next to its snapshot. By default the resources and
+questions stores are read from a synthetic, seeded collection (see
+retrieval_benchmark), and the projects store from a synthetic
+codedex_projects.json. With --source mongo they are built from the configured
+database and the bundled projects file instead, so the sizes are ignored.
+Embeddings come from the stub backend unless EMBEDDING_BACKEND is set.
+
+    python -m benchmarks.build_benchmark --sizes 1000 10000 100000 --output build_benchmark.json
+"""
+import os
+import sys
+import json
+import shutil
+import argparse
+import tempfile
+from typing import Any, Dict, Iterator, List, Optional
+
+os.environ.setdefault("EMBEDDING_BACKEND", "stub")
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import services.vector_store as vector_store
+from config import EMBEDDING_BACKEND, EMBEDDING_CACHE_PATH
+from services.index_storage import read_build_report, read_manifest
+from benchmarks.retrieval_benchmark import STORES, STORE_LAYOUT, VOCABULARY, WORDS_PER_ITEM, synthetic_items
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class SyntheticCollection:
+    """The read side of a pymongo collection over synthetic items, generated on every scan"""
+
+    def __init__(self, store: str, words: np.ndarray):
+        self.store = store
+        self.words = words
+
+    def find(self, query: Optional[Dict[str, Any]] = None, projection: Optional[Dict[str, int]] = None, **kwargs) -> Iterator[Dict[str, Any]]:
+        for item in synthetic_items(self.store, self.words):
+            if projection:
+                item = {field: value for field, value in item.items() if field == "_id" or field in projection}
+            yield item
+
+    def find_one(self, query: Optional[Dict[str, Any]] = None, projection: Optional[Dict[str, int]] = None) -> Optional[Dict[str, Any]]:
+        return next(self.find(query, projection), None)
+
+def _load_projects():
+    # load_projects only builds a missing store
+    shutil.rmtree(STORE_LAYOUT["projects"][0], ignore_errors=True)
+    vector_store.load_projects()
+
+def build_synthetic(store: str, words: np.ndarray):
+    if store == "projects":
+        with open("codedex_projects.json", "w", encoding="utf-8") as f:
+            json.dump(list(synthetic_items(store, words)), f)
+        _load_projects()
+        return
+
+    collection = SyntheticCollection(store, words)
+    if store == "resources":
+        vector_store._refresh_store(
+            STORE_LAYOUT[store][0], collection, vector_store._resource_document, store, True,
+            item_key=vector_store._resource_key,
+            fields=vector_store.RESOURCE_FIELDS,
+            key_fields=["url", "updatedAt"]
+        )
+    else:
+        vector_store._refresh_store(
+            STORE_LAYOUT[store][0], collection, vector_store._question_document, store, True,
+            item_key=vector_store._question_key,
+            fields=vector_store.QUESTION_FIELDS,
+            key_fields=["question", "updatedAt"]
+        )
+
+def build_from_source(store: str):
+    if store == "projects":
+        shutil.copy(os.path.join(BASE_DIR, "codedex_projects.json"), "codedex_projects.json")
+        _load_projects()
+    elif store == "resources":
+        vector_store.refresh_resources_vector_store(full_rebuild=True)
+    else:
+        vector_store.refresh_questions_vector_store(full_rebuild=True)
+
+def build_row(store: str, size: Optional[int]) -> Dict[str, Any]:
+    index_path = STORE_LAYOUT[store][0]
+    report = read_build_report(index_path)
+    if report is None:
+        raise SystemExit(f"Building {store} produced no snapshot; see the log above")
+    manifest = read_manifest(index_path)
+    return {
+        "store": store,
+        "corpus_size": size,
+        "vectors": manifest["count"],
+        "index_type": manifest["index_type"],
+        "quantization": manifest["quantization"],
+        **{field: report[field] for field in ("total_seconds", "documents", "chunks", "documents_per_second",
+                                              "peak_rss_bytes", "peak_rss_scope")},
+        "phases": {phase: timing["seconds"] for phase, timing in report["phases"].items()},
+        "embedding_cache": report.get("embedding_cache")
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--stores", nargs="+", default=list(STORES), choices=STORES)
+    parser.add_argument("--source", default="synthetic", choices=("synthetic", "mongo"))
+    parser.add_argument("--warm-cache", action="store_true", help="Keep the embedding cache between builds")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workdir", help="Where to build the stores; a temporary directory by default")
+    parser.add_argument("--output", default="build_benchmark.json")
+    args = parser.parse_args()
+
+    output = os.path.abspath(args.output)
+    workdir = args.workdir or tempfile.mkdtemp(prefix="build_benchmark_")
+    os.makedirs(workdir, exist_ok=True)
+    # Store, embedding cache and projects file paths are relative to the working directory
+    os.chdir(workdir)
+
+    sizes: List[Optional[int]] = args.sizes if args.source == "synthetic" else [None]
+    results = []
+    try:
+        for store in args.stores:
+            for size in sizes:
+                if not args.warm_cache:
+                    shutil.rmtree(EMBEDDING_CACHE_PATH, ignore_errors=True)
+                if size is None:
+                    build_from_source(store)
+                else:
+                    words = np.random.default_rng(args.seed).integers(
+                        0, len(VOCABULARY), size=(size, WORDS_PER_ITEM), dtype=np.int16
+                    )
+                    build_synthetic(store, words)
+
+                row = build_row(store, size)
+                results.append(row)
+                phases = " ".join(f"{phase}={seconds:.2f}s" for phase, seconds in row["phases"].items())
+                peak = row["peak_rss_bytes"]
+                print(
+                    f"{store:<9} {row['documents']:>9} docs ({row['chunks']} chunks) in {row['total_seconds']:.2f}s "
+                    f"= {row['documents_per_second']:.1f} docs/s, "
+                    + (f"peak rss {peak / 2**20:.0f}MB ({row['peak_rss_scope']}), " if peak is not None else "")
+                    + phases
+                )
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    with open(output, "w") as f:
+        json.dump({
+            "embedding_backend": EMBEDDING_BACKEND,
+            "source": args.source,
+            "seed": args.seed,
+            "warm_cache": args.warm_cache,
+            "results": results
+        }, f, indent=2)
+    print(f"Wrote {output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Cold start, bulk throughput, single-query latency and agreement of the embedding backends.
+
+Embeds paragraphs from the bundled article dumps (python.json, java.json, ...)
+with each backend and compares every vector against the torch backend, which
+builds the indexes today. A backend whose worst cosine similarity to torch falls
+below --tolerance fails the run.
+
+    python -m benchmarks.embedding_benchmark --backends torch onnx onnx-int8 --output embedding_benchmark.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from typing import Any, Dict, List
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import EMBEDDINGS_MODEL_NAME
+from services.embedding_backends import EMBEDDING_BACKENDS, create_embeddings
+
+ARTICLE_FILES = ("python.json", "java.json", "javascript.json", "cpp.json", "ml.json")
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# The stub backend hashes text for offline tests and never agrees with the model
+BENCHMARKED_BACKENDS = tuple(backend for backend in EMBEDDING_BACKENDS if backend != "stub")
+
+def article_texts(count: int, seed: int) -> List[str]:
+    """Titles and paragraphs of the bundled articles, repeated up to count"""
+    texts = []
+    for filename in ARTICLE_FILES:
+        path = os.path.join(BASE_DIR, filename)
+        if not os.path.exists(path):
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            for article in json.load(f):
+                texts.append(article.get("title", ""))
+                texts.extend(
+                    block["content"] for block in article.get("content", [])
+                    if isinstance(block, dict) and isinstance(block.get("content"), str) and block["content"].strip()
+                )
+    if not texts:
+        raise SystemExit("No article dumps found to embed")
+    rng = np.random.default_rng(seed)
+    return [texts[position] for position in rng.integers(0, len(texts), size=count)]
+
+def latency_percentiles(timings: List[float]) -> Dict[str, float]:
+    return {
+        "p50_ms": round(float(np.percentile(timings, 50)), 3),
+        "p99_ms": round(float(np.percentile(timings, 99)), 3)
+    }
+
+def benchmark_backend(backend: str, texts: List[str], queries: List[str]) -> Dict[str, Any]:
+    started = time.perf_counter()
+    embeddings = create_embeddings(backend, EMBEDDINGS_MODEL_NAME)
+    embeddings.embed_query("warm up")
+    cold_start_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    vectors = np.asarray(embeddings.embed_documents(texts), dtype=np.float32)
+    bulk_seconds = time.perf_counter() - started
+
+    timings = []
+    for query in queries:
+        started = time.perf_counter()
+        embeddings.embed_query(query)
+        timings.append((time.perf_counter() - started) * 1000)
+
+    return {
+        "backend": backend,
+        "cold_start_seconds": round(cold_start_seconds, 3),
+        "bulk_texts_per_second": round(len(texts) / bulk_seconds, 1),
+        "query": latency_percentiles(timings),
+        "vectors": vectors
+    }
+
+def cosine_agreement(vectors: np.ndarray, reference: np.ndarray) -> Dict[str, float]:
+    cosines = (vectors * reference).sum(axis=1) / (
+        np.linalg.norm(vectors, axis=1) * np.linalg.norm(reference, axis=1)
+    )
+    return {
+        "min_cosine": round(float(cosines.min()), 6),
+        "mean_cosine": round(float(cosines.mean()), 6),
+        "max_abs_diff": round(float(np.abs(vectors - reference).max()), 6)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backends", nargs="+", default=list(BENCHMARKED_BACKENDS), choices=BENCHMARKED_BACKENDS)
+    parser.add_argument("--texts", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--tolerance", type=float, default=0.99)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="embedding_benchmark.json")
+    args = parser.parse_args()
+
+    texts = article_texts(args.texts, args.seed)
+    queries = [text[:80] for text in article_texts(args.queries, args.seed + 1)]
+
+    # torch is the reference the others are held to, so it always runs first
+    backends = ["torch"] + [backend for backend in args.backends if backend != "torch"]
+    results, reference, failed = [], None, []
+    for backend in backends:
+        row = benchmark_backend(backend, texts, queries)
+        vectors = row.pop("vectors")
+        if reference is None:
+            reference = vectors
+        row.update(cosine_agreement(vectors, reference))
+        row["within_tolerance"] = row["min_cosine"] >= args.tolerance
+        if not row["within_tolerance"]:
+            failed.append(backend)
+        results.append(row)
+        print(
+            f"{backend:<9} cold start={row['cold_start_seconds']:.2f}s "
+            f"bulk={row['bulk_texts_per_second']:.0f} texts/s "
+            f"query p50={row['query']['p50_ms']:.2f}ms p99={row['query']['p99_ms']:.2f}ms "
+            f"min cosine={row['min_cosine']:.5f}"
+        )
+
+    with open(args.output, "w") as f:
+        json.dump({
+            "model": EMBEDDINGS_MODEL_NAME,
+            "texts": args.texts,
+            "queries": args.queries,
+            "tolerance": args.tolerance,
+            "results": results
+        }, f, indent=2)
+    print(f"Wrote {args.output}")
+
+    if failed:
+        raise SystemExit(f"Outside tolerance {args.tolerance}: {', '.join(failed)}")
+
+if __name__ == "__main__":
+    main()
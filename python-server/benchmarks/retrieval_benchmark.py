@@ -0,0 +1,251 @@
+"""Embedding, search and post-processing latency of resource, question and project retrieval.
+
+Builds synthetic stores of growing size through the server's own build
+pipeline in a scratch directory, then times each phase of
+retrieve_relevant_resources, retrieve_relevant_questions and
+get_project_by_title separately. Corpora and queries are generated from
+--seed, so runs are comparable. Uses the stub embedding backend unless
+EMBEDDING_BACKEND is set, e.g. to onnx with HF_HUB_OFFLINE=1 to time the
+locally cached model. Store index types and quantization come from the usual
+environment variables.
+
+    python -m benchmarks.retrieval_benchmark --sizes 1000 10000 100000 1000000 --output retrieval_benchmark.json
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+from typing import Any, Callable, Dict, Iterator, List
+
+os.environ.setdefault("EMBEDDING_BACKEND", "stub")
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import services.vector_store as vector_store
+from config import EMBEDDING_BACKEND, RESOURCES_FAISS_INDEX_PATH, QUESTIONS_FAISS_INDEX_PATH, PROJECTS_FAISS_INDEX_PATH
+from services.index_storage import read_manifest
+from services.project_service import matching_project
+
+STORES = ("resources", "questions", "projects")
+# Random words drawn for each item, enough for every synthetic field
+WORDS_PER_ITEM = 16
+
+VOCABULARY = (
+    "python java javascript typescript rust go kotlin swift sql html css react vue angular django flask "
+    "spring node docker kubernetes linux git testing debugging recursion sorting graphs trees hashing "
+    "arrays strings pointers memory threads async networking http security authentication databases "
+    "indexing caching queues streams functions classes interfaces generics closures decorators "
+    "iterators regex parsing compilers algorithms complexity statistics regression classification "
+    "clustering embeddings transformers tensors pandas numpy visualization deployment monitoring"
+).split()
+RESOURCE_TYPES = ("documentation", "tutorial", "video", "course", "article", "book")
+DIFFICULTIES = ("beginner", "intermediate", "advanced")
+# Index path and whether items are embedded whole
+STORE_LAYOUT = {
+    "resources": (RESOURCES_FAISS_INDEX_PATH, True),
+    "questions": (QUESTIONS_FAISS_INDEX_PATH, True),
+    "projects": (PROJECTS_FAISS_INDEX_PATH, False)
+}
+
+def _words(row: np.ndarray, start: int, count: int) -> List[str]:
+    return [VOCABULARY[word] for word in row[start:start + count]]
+
+def synthetic_item(store: str, position: int, row: np.ndarray) -> Dict[str, Any]:
+    """Item position of a synthetic store, built from its row of random word indexes"""
+    if store == "resources":
+        return {
+            "_id": f"resource-{position}",
+            "title": f"{' '.join(_words(row, 0, 3)).title()} {position}",
+            "url": f"https://example.com/{VOCABULARY[row[0]]}/{position}",
+            "type": RESOURCE_TYPES[row[3] % len(RESOURCE_TYPES)],
+            "tags": _words(row, 4, 3),
+            "topics": _words(row, 7, 2),
+            "difficulty": DIFFICULTIES[row[9] % len(DIFFICULTIES)],
+            "description": " ".join(_words(row, 0, WORDS_PER_ITEM))
+        }
+    if store == "questions":
+        return {
+            "_id": f"question-{position}",
+            "question": f"How do {' and '.join(_words(row, 0, 2))} interact in {VOCABULARY[row[2]]}? ({position})",
+            "options": [f"Using {word}" for word in _words(row, 3, 4)],
+            "correctOption": int(row[7] % 4),
+            "explanation": " ".join(_words(row, 8, 8)),
+            "tags": _words(row, 3, 2),
+            "topic": VOCABULARY[row[2]],
+            "difficulty": DIFFICULTIES[row[9] % len(DIFFICULTIES)]
+        }
+    return {
+        "title": f"Build a {' '.join(_words(row, 0, 2))} app with {VOCABULARY[row[2]]} {position}",
+        "link": f"https://example.com/projects/{position}",
+        "tags": _words(row, 2, 3),
+        "checkpoints": [
+            {"checkpoint": f"## {word.title()}", "content": [
+                {"type": "p", "text": " ".join(_words(row, 5, 8))},
+                {"type": "pre", "text": f"def {word}():\n    return {position}"}
+            ]}
+            for word in _words(row, 3, 2)
+        ]
+    }
+
+def synthetic_items(store: str, words: np.ndarray) -> Iterator[Dict[str, Any]]:
+    for position, row in enumerate(words):
+        yield synthetic_item(store, position, row)
+
+def synthetic_queries(store: str, words: np.ndarray, count: int, rng: np.random.Generator) -> List[Any]:
+    """Distinct queries, so every query embedding misses the query cache"""
+    queries = []
+    for row in rng.integers(0, len(VOCABULARY), size=(count, WORDS_PER_ITEM)):
+        if store == "resources":
+            queries.append(" ".join(_words(row, 0, 3)))
+        elif store == "questions":
+            queries.append((VOCABULARY[row[0]], DIFFICULTIES[row[1] % len(DIFFICULTIES)], _words(row, 2, 2)))
+        else:
+            # Titles of existing projects, as the project page requests them
+            position = int(rng.integers(0, len(words)))
+            queries.append(synthetic_item(store, position, words[position])["title"])
+    return list({json.dumps(query): query for query in queries}.values())
+
+def build_store(store: str, words: np.ndarray) -> float:
+    index_path, one_vector_per_item = STORE_LAYOUT[store]
+    to_document = {
+        "resources": vector_store._resource_document,
+        "questions": vector_store._question_document,
+        "projects": vector_store._project_document
+    }[store]
+    started = time.perf_counter()
+    documents = (to_document(item) for item in synthetic_items(store, words))
+    vector_store._rebuild_store(index_path, documents, one_vector_per_item=one_vector_per_item)
+    return time.perf_counter() - started
+
+def phase_functions(store: str) -> Dict[str, Callable]:
+    """embed, search and postprocess steps of the store's retrieval function"""
+    index_path, _ = STORE_LAYOUT[store]
+    loaded = vector_store.get_registered_store(index_path, lambda: None)
+    if store == "resources":
+        return {
+            "text": lambda query: query,
+            "embed": lambda text: vector_store.embed_queries([text]),
+            "search": lambda vectors: vector_store._search_batch(loaded, vectors, k=vector_store.RESOURCES_K)[0],
+            "postprocess": lambda docs, query: vector_store._unique_resources(docs)
+        }
+    if store == "questions":
+        return {
+            "text": lambda query: vector_store._question_query(*query),
+            "embed": lambda text: vector_store.embed_queries([text]),
+            "search": lambda vectors: vector_store._search_batch(loaded, vectors, k=vector_store.QUESTIONS_K)[0],
+            "postprocess": lambda docs, query: vector_store._unique_questions(docs)
+        }
+    return {
+        "text": lambda query: f"Title: {query}",
+        "embed": vector_store.embed_query,
+        "search": lambda vector: loaded.similarity_search_by_vector(vector, k=10),
+        "postprocess": lambda docs, query: matching_project(docs, query)
+    }
+
+def latency_summary(timings: List[float]) -> Dict[str, float]:
+    return {
+        "mean_ms": round(float(np.mean(timings)), 4),
+        "p50_ms": round(float(np.percentile(timings, 50)), 4),
+        "p99_ms": round(float(np.percentile(timings, 99)), 4)
+    }
+
+def benchmark_queries(store: str, queries: List[Any]) -> Dict[str, Any]:
+    phases = phase_functions(store)
+    timings = {"embed": [], "search": [], "postprocess": [], "total": []}
+    found = 0
+    vector_store._query_cache.clear()
+    for query in queries:
+        text = phases["text"](query)
+        started = time.perf_counter()
+        vectors = phases["embed"](text)
+        embedded = time.perf_counter()
+        docs = phases["search"](vectors)
+        searched = time.perf_counter()
+        results = phases["postprocess"](docs, query)
+        finished = time.perf_counter()
+
+        timings["embed"].append((embedded - started) * 1000)
+        timings["search"].append((searched - embedded) * 1000)
+        timings["postprocess"].append((finished - searched) * 1000)
+        timings["total"].append((finished - started) * 1000)
+        found += bool(results)
+
+    row = {phase: latency_summary(phase_timings) for phase, phase_timings in timings.items()}
+    row["throughput_qps"] = round(len(queries) / (sum(timings["total"]) / 1000), 2)
+    # Projects count exact title matches, the others queries with any result
+    row["found_rate"] = round(found / len(queries), 4)
+
+    if store != "projects":
+        index_path, _ = STORE_LAYOUT[store]
+        loaded = vector_store.get_registered_store(index_path, lambda: None)
+        retrieve_batch = (vector_store.retrieve_relevant_resources_batch if store == "resources"
+                          else vector_store.retrieve_relevant_questions_batch)
+        vector_store._query_cache.clear()
+        started = time.perf_counter()
+        retrieve_batch(queries, loaded)
+        row["batch_throughput_qps"] = round(len(queries) / (time.perf_counter() - started), 2)
+    return row
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000, 1000000])
+    parser.add_argument("--stores", nargs="+", default=list(STORES), choices=STORES)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workdir", help="Where to build the stores; a temporary directory by default")
+    parser.add_argument("--output", default="retrieval_benchmark.json")
+    args = parser.parse_args()
+
+    output = os.path.abspath(args.output)
+    workdir = args.workdir or tempfile.mkdtemp(prefix="retrieval_benchmark_")
+    os.makedirs(workdir, exist_ok=True)
+    # Store and embedding cache paths are relative to the working directory
+    os.chdir(workdir)
+
+    results = []
+    try:
+        for store in args.stores:
+            for size in args.sizes:
+                rng = np.random.default_rng(args.seed)
+                words = rng.integers(0, len(VOCABULARY), size=(size, WORDS_PER_ITEM), dtype=np.int16)
+                build_seconds = build_store(store, words)
+                manifest = read_manifest(STORE_LAYOUT[store][0])
+                queries = synthetic_queries(store, words, args.queries, np.random.default_rng(args.seed + 1))
+
+                row = {
+                    "store": store,
+                    "corpus_size": size,
+                    "vectors": manifest["count"],
+                    "index_type": manifest["index_type"],
+                    "quantization": manifest["quantization"],
+                    "build_seconds": round(build_seconds, 3),
+                    "queries": len(queries),
+                    **benchmark_queries(store, queries)
+                }
+                results.append(row)
+                print(
+                    f"{store:<9} {size:>9} ({row['vectors']} vectors, {row['index_type']}/{row['quantization']}) "
+                    f"embed p50={row['embed']['p50_ms']:.3f}ms p99={row['embed']['p99_ms']:.3f}ms "
+                    f"search p50={row['search']['p50_ms']:.3f}ms p99={row['search']['p99_ms']:.3f}ms "
+                    f"post p50={row['postprocess']['p50_ms']:.3f}ms p99={row['postprocess']['p99_ms']:.3f}ms "
+                    f"{row['throughput_qps']:.1f} q/s"
+                )
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    with open(output, "w") as f:
+        json.dump({
+            "embedding_backend": EMBEDDING_BACKEND,
+            "seed": args.seed,
+            "results": results
+        }, f, indent=2)
+    print(f"Wrote {output}")
+
+if __name__ == "__main__":
+    main()
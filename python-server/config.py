@@ -10,4 +10,83 @@ EMBEDDINGS_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
 MONGODB_URI = os.getenv("MONGO_URI")
 DB_NAME = os.getenv("DB_NAME")
 UPDATE_INTERVAL_DAYS = 7
-LAST_UPDATE_FILE = "last_update.json"   
\ No newline at end of file
+LAST_UPDATE_FILE = "last_update.json"   
+INCREMENTAL_UPDATE_INTERVAL_MINUTES = int(os.getenv("INCREMENTAL_UPDATE_INTERVAL_MINUTES", "60"))
+REFRESH_CHECK_INTERVAL_SECONDS = int(os.getenv("REFRESH_CHECK_INTERVAL_SECONDS", "300"))
+EMBEDDING_CACHE_PATH = "embedding_cache"
+QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "1024"))
+QUERY_EMBEDDING_CACHE_TTL_SECONDS = int(os.getenv("QUERY_EMBEDDING_CACHE_TTL_SECONDS", "86400"))
+# Validated topics per sanitized input, kept across restarts so repeated
+# generation requests skip the validation LLM call; hits are written back to
+# the file at most this often
+TOPIC_VALIDATION_CACHE_PATH = os.getenv("TOPIC_VALIDATION_CACHE_PATH", "topic_validation_cache.json")
+TOPIC_VALIDATION_CACHE_SIZE = int(os.getenv("TOPIC_VALIDATION_CACHE_SIZE", "4096"))
+TOPIC_VALIDATION_CACHE_TTL_SECONDS = int(os.getenv("TOPIC_VALIDATION_CACHE_TTL_SECONDS", "604800"))
+TOPIC_VALIDATION_CACHE_FLUSH_SECONDS = int(os.getenv("TOPIC_VALIDATION_CACHE_FLUSH_SECONDS", "60"))
+# Known topics (topic files, resource topics and tags, past roadmaps) matched
+# locally before asking the LLM, rebuilt along with the vector stores; fuzzy
+# matches need at least this similarity ratio
+TOPIC_CATALOG_PATH = os.getenv("TOPIC_CATALOG_PATH", "topic_catalog.json")
+TOPIC_MATCH_CUTOFF = float(os.getenv("TOPIC_MATCH_CUTOFF", "0.85"))
+# Generated roadmaps per (topic, summary, feedback, resources snapshot), one
+# file each so every worker shares them
+ROADMAP_CACHE_PATH = os.getenv("ROADMAP_CACHE_PATH", "roadmap_cache")
+ROADMAP_CACHE_SIZE = int(os.getenv("ROADMAP_CACHE_SIZE", "512"))
+ROADMAP_CACHE_TTL_SECONDS = int(os.getenv("ROADMAP_CACHE_TTL_SECONDS", "86400"))
+# Roadmaps and quizzes reused for other spellings of a topic: a cached output
+# is returned when the cosine similarity of the topic embeddings reaches the
+# threshold and everything else about the request is identical
+SEMANTIC_CACHE_PATH = os.getenv("SEMANTIC_CACHE_PATH", "semantic_cache")
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.9"))
+SEMANTIC_CACHE_SIZE = int(os.getenv("SEMANTIC_CACHE_SIZE", "1024"))
+SEMANTIC_CACHE_TTL_SECONDS = int(os.getenv("SEMANTIC_CACHE_TTL_SECONDS", "86400"))
+
+# Vector index type per store: "flat" (exact), "ivf" or "hnsw"
+RESOURCES_INDEX_TYPE = os.getenv("RESOURCES_INDEX_TYPE", "flat")
+QUESTIONS_INDEX_TYPE = os.getenv("QUESTIONS_INDEX_TYPE", "flat")
+PROJECTS_INDEX_TYPE = os.getenv("PROJECTS_INDEX_TYPE", "flat")
+IVF_NLIST = int(os.getenv("IVF_NLIST", "256"))
+IVF_NPROBE = int(os.getenv("IVF_NPROBE", "16"))
+HNSW_M = int(os.getenv("HNSW_M", "32"))
+HNSW_EF_CONSTRUCTION = int(os.getenv("HNSW_EF_CONSTRUCTION", "200"))
+HNSW_EF_SEARCH = int(os.getenv("HNSW_EF_SEARCH", "64"))
+
+# Vector quantization per store: "none" (float32), "sq8" or "pq"
+RESOURCES_INDEX_QUANTIZATION = os.getenv("RESOURCES_INDEX_QUANTIZATION", "none")
+QUESTIONS_INDEX_QUANTIZATION = os.getenv("QUESTIONS_INDEX_QUANTIZATION", "none")
+PROJECTS_INDEX_QUANTIZATION = os.getenv("PROJECTS_INDEX_QUANTIZATION", "none")
+PQ_M = int(os.getenv("PQ_M", "48"))
+# Quantized stores keep float32 vectors memory-mapped on disk and re-rank a
+# RERANK_K_FACTOR times larger shortlist exactly
+RERANK_QUANTIZED = os.getenv("RERANK_QUANTIZED", "true").lower() == "true"
+RERANK_K_FACTOR = int(os.getenv("RERANK_K_FACTOR", "4"))
+
+# Set by gunicorn.conf.py when the app is preloaded in the gunicorn master, so
+# the embedding model and indexes are loaded once and shared with the workers
+GUNICORN_PRELOAD = os.getenv("GUNICORN_PRELOAD", "false").lower() == "true"
+
+# Published snapshots kept per vector store for rollback
+VECTOR_STORE_SNAPSHOTS_TO_KEEP = int(os.getenv("VECTOR_STORE_SNAPSHOTS_TO_KEEP", "3"))
+
+# Embedding backend: "torch" (sentence-transformers), "onnx" (ONNX Runtime),
+# "onnx-int8" (ONNX Runtime with dynamically int8-quantized weights) or "stub"
+# (model-free word hashing, for benchmarks and offline runs)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+ONNX_MODEL_CACHE_PATH = os.getenv("ONNX_MODEL_CACHE_PATH", "onnx_models")
+# Threads per ONNX Runtime session; 0 lets ONNX Runtime use every core
+ONNX_INTRA_OP_THREADS = int(os.getenv("ONNX_INTRA_OP_THREADS", "0"))
+
+# Streaming index builds: documents per MongoDB cursor batch, chunks per
+# embedding call and index add, and vectors held back to train IVF/PQ indexes
+MONGO_BATCH_SIZE = int(os.getenv("MONGO_BATCH_SIZE", "500"))
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "256"))
+INDEX_TRAINING_SAMPLE_SIZE = int(os.getenv("INDEX_TRAINING_SAMPLE_SIZE", "20000"))
+
+# Vector store builds due at the same time run concurrently, each in its own
+# process; 0 runs them one after another in the serving process instead
+REFRESH_MAX_PARALLEL_BUILDS = int(os.getenv("REFRESH_MAX_PARALLEL_BUILDS", "3"))
+# A build process still running after this long is killed and counted as failed
+REFRESH_BUILD_TIMEOUT_SECONDS = int(os.getenv("REFRESH_BUILD_TIMEOUT_SECONDS", "7200"))
+# Threads per build process (OpenMP/BLAS, ONNX Runtime, tokenizers); 0 splits
+# the cores evenly between the parallel builds
+REFRESH_THREADS_PER_BUILD = int(os.getenv("REFRESH_THREADS_PER_BUILD", "0"))
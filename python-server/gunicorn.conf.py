@@ -0,0 +1,49 @@
+"""Gunicorn settings for serving the Flask app with a preloaded, shared model and indexes.
+
+    gunicorn -c gunicorn.conf.py server:app
+
+The app is imported once in the master, which loads the embedding model and the
+vector stores before forking. Workers then share those pages copy-on-write; flat
+indexes and documents are memory-mapped and shared through the page cache anyway.
+GET /api/vector-stores/memory reports the resulting per-worker memory.
+"""
+import gc
+import os
+
+# Read by config.py when server.py is imported below
+os.environ["GUNICORN_PRELOAD"] = "true"
+# The tokenizer's thread pool does not survive a fork
+os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("GUNICORN_WORKERS", "4"))
+threads = int(os.getenv("GUNICORN_THREADS", "2"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+preload_app = True
+
+# Objects loaded by the master are never freed, but a collection in a worker
+# would still write to their GC headers and un-share their pages. Collection is
+# held off while the app loads, and everything alive is frozen before each fork.
+gc.disable()
+
+def when_ready(server):
+    from utils.memory_utils import log_process_memory
+    log_process_memory("Gunicorn master after preload")
+
+def pre_fork(server, worker):
+    gc.freeze()
+
+def post_fork(server, worker):
+    gc.enable()
+    # Threads do not survive the fork, so each worker runs its own refresh scheduler
+    from services.refresh_scheduler import start_refresh_scheduler
+    start_refresh_scheduler()
+
+def post_worker_init(worker):
+    from utils.memory_utils import log_process_memory
+    log_process_memory(f"Gunicorn worker {worker.age}")
+
+def worker_exit(server, worker):
+    # A worker shutting down finishes the refresh it is running but starts no other
+    from services.refresh_scheduler import stop_refresh_scheduler
+    stop_refresh_scheduler()
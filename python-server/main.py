@@ -14,9 +14,11 @@ from langchain.chains import LLMChain
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
 from dotenv import load_dotenv
+from services.embedding_cache import EmbeddingCache
 
 load_dotenv()
 FAISS_INDEX_PATH = "faiss_index"
+EMBEDDING_CACHE_PATH = "embedding_cache/legacy"
 EMBEDDINGS_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
 
 
@@ -77,9 +79,19 @@ def create_vector_store(resources_data: Dict[str, List[Dict[str, str]]]) -> FAIS
     text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=100)
     split_docs = text_splitter.split_documents(documents)
 
-    # Generate embeddings
+    # Generate embeddings, reusing cached vectors for unchanged chunks
     embeddings = HuggingFaceEmbeddings(model_name=EMBEDDINGS_MODEL_NAME)
-    vector_store = FAISS.from_documents(split_docs, embeddings)
+    texts = [doc.page_content for doc in split_docs]
+    cache = EmbeddingCache(EMBEDDING_CACHE_PATH, EMBEDDINGS_MODEL_NAME)
+    vectors = cache.embed(texts, embeddings.embed_documents)
+    cache.save(prune=True)
+    print(f"Embedded {len(texts)} chunks: {cache.hits} cached, {cache.misses} computed")
+
+    vector_store = FAISS.from_embeddings(
+        list(zip(texts, vectors.tolist())),
+        embeddings,
+        metadatas=[doc.metadata for doc in split_docs]
+    )
 
     # Save the FAISS index
     with open(f"{FAISS_INDEX_PATH}.pkl", "wb") as f:
@@ -3,9 +3,11 @@ from .roadmap_routes import roadmap_bp
 from .quiz_routes import quiz_bp
 from .project_routes import project_bp
 from .cluster_routes import cluster_bp
+from .vector_store_routes import vector_store_bp
 
 def register_routes(app):
     app.register_blueprint(roadmap_bp)
     app.register_blueprint(quiz_bp)
     app.register_blueprint(project_bp)
-    app.register_blueprint(cluster_bp, url_prefix='/clusters')
\ No newline at end of file
+    app.register_blueprint(cluster_bp, url_prefix='/clusters')
+    app.register_blueprint(vector_store_bp)
\ No newline at end of file
@@ -2,7 +2,7 @@ from flask import Blueprint, request, jsonify
 import logging
 from typing import List
 
-from services.quiz_service import generate_quiz
+from services.quiz_service import generate_quiz, get_quiz_cache_stats
 
 logger = logging.getLogger(__name__)
 quiz_bp = Blueprint('quiz', __name__)
@@ -29,4 +29,13 @@ def quiz_endpoint():
         
     except Exception as e:
         logger.error(f"Quiz endpoint error: {str(e)}")
-        return jsonify({"error": f"Failed to process quiz request: {str(e)}"}), 500
\ No newline at end of file
+        return jsonify({"error": f"Failed to process quiz request: {str(e)}"}), 500
+
+@quiz_bp.route('/api/quiz-cache/stats', methods=['GET'])
+def quiz_cache_stats_endpoint():
+    """Hit rate and recent similarity decisions of the semantic quiz cache"""
+    try:
+        return jsonify(get_quiz_cache_stats()), 200
+    except Exception as e:
+        logger.error(f"Failed to get quiz cache stats: {str(e)}")
+        return jsonify({"error": str(e)}), 500
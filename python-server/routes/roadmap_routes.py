@@ -1,12 +1,19 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Tuple
 import re
 import json
-from services.roadmap_service import generate_roadmap
-from services.llm_service import get_llm
+from services.roadmap_service import (
+    generate_roadmap,
+    stream_roadmap,
+    stream_roadmap_events,
+    get_roadmap_cache_stats,
+    invalidate_roadmap_cache
+)
+from services.llm_service import get_llm, get_topic_validation_stats
 from langchain.chains import LLMChain
 from langchain_core.prompts import PromptTemplate
+from utils.json_stream import ArrayItemStreamParser
 from utils.sanitizers import sanitize_input
 from datetime import datetime
 from langchain_core.output_parsers import JsonOutputParser
@@ -242,6 +249,94 @@ def rank_resources(resources: List[Dict[str, Any]], topic: str) -> List[Dict[str
         logger.error(f"Error in LLM ranking: {str(e)}")
         return rule_based_rank_resources(resources, topic)
 
+def _roadmap_v2_request(topic: str, summary: str, ranking_method: str) -> Dict[str, Any]:
+    """Prompt and inputs of a v2 roadmap over the bundled resources, ranked by ranking_method"""
+    sanitized_topic = sanitize_input(topic)
+    
+    raw_resources = load_resources(sanitized_topic)
+    
+    
+    if ranking_method == 'rule_based':
+        ranked_resources = rule_based_rank_resources(raw_resources, sanitized_topic)
+        ranking_algo_name = "rule_based_v1"
+    else:
+        ranked_resources = llm_rank_resources(raw_resources, sanitized_topic)
+        ranking_algo_name = "llm_based_v1"
+    
+    llm = get_llm()
+    
+    roadmap_prompt = PromptTemplate(
+        template="""
+        Generate a learning roadmap with exactly 5 checkpoints for {topic}. 
+        
+        Each checkpoint should:
+        - Have a clear, specific title.
+        - Include a detailed, structured description (at least 2 lines).
+        - List EXACTLY 3-4 high-quality learning resources, no more and no less.
+        - While Listing resources, include easier resources first and progressively more complex ones later.
+        - The resources are already ranked based on complexity. Use resources with lower ranks for early checkpoints 
+          and higher ranks for later checkpoint
+        - Each resource MUST include the 'reasoning' field from the input data explaining why it was ranked this way."
+        - Make sure to add nice description to each resource based on the content and title, dont mention any names in the resource descriptions
+        - Include the resource's title, URL, and a brief description (2-3 lines) of the content.
+        - Dont mention this in the resource description : "some name" and then "follow"
+        - Make sure the first checkpoint is the easiest and has resources which can be completed in a short time i.e within an hour.
+        - Be progressively more complex.
+        - For each checkpoint, add What You Will Learn and What Next sections.
+        - The What Next section should include a topic to do a Quiz and a challenge to complete before moving to the next checkpoint.
+        The final roadmap MUST have EXACTLY 5 checkpoints, and each checkpoint MUST have AT LEAST 3 resources.
+        
+        {format_instructions}
+        
+        Here are pre-ranked domain-specific resources you should use (distribute them appropriately among the checkpoints).
+        These resources have been intelligently ranked from simplest to most complex:
+        {resources}
+        
+        Make sure to tailor the roadmap to the user's learning needs and provide a clear, structured learning path.
+        Here is the summary of the user's learning needs: {summary}
+        """,
+        input_variables=["topic", "resources", "summary"],
+        partial_variables={"format_instructions": roadmap_parser.get_format_instructions()}
+    )
+    
+    return {
+        "llm": llm,
+        "prompt": roadmap_prompt,
+        "inputs": {
+            "topic": sanitized_topic,
+            "resources": json.dumps(ranked_resources),
+            "summary": summary
+        },
+        "ranking_algorithm": ranking_algo_name,
+        "resource_count": len(ranked_resources)
+    }
+
+def _parse_roadmap_v2(text: str, roadmap_request: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        json_text = re.search(r'```(?:json)?\n?(.*?)```', text, re.DOTALL)
+        if json_text:
+            text = json_text.group(1)
+        else:
+            text = text.strip()
+        
+        roadmap_data = json.loads(text)
+
+        
+        roadmap_data["metadata"] = {
+            "generated_at": datetime.now().isoformat(),
+            "ranking_algorithm": roadmap_request["ranking_algorithm"],
+            "resource_count": roadmap_request["resource_count"]
+        }
+        
+        if (not roadmap_data.get("mainTopic") or 
+            not roadmap_data.get("checkpoints") ):
+            raise ValueError("Unexpected roadmap format received.")
+        
+        return roadmap_data
+        
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Invalid JSON response from LLM: {str(e)}")
+
 @roadmap_bp.route('/api/generate-roadmap-v2', methods=['POST'])
 def roadmap_endpoint_v2():
     try:
@@ -254,92 +349,55 @@ def roadmap_endpoint_v2():
         summary = data.get('summary', '')
         ranking_method = data.get('ranking_method', 'llm')  
         
-        sanitized_topic = sanitize_input(topic)
-        
-        raw_resources = load_resources(sanitized_topic)
+        roadmap_request = _roadmap_v2_request(topic, summary, ranking_method)
         
+        roadmap_chain = LLMChain(llm=roadmap_request["llm"], prompt=roadmap_request["prompt"])
+        result = roadmap_chain.invoke(roadmap_request["inputs"])
         
-        if ranking_method == 'rule_based':
-            ranked_resources = rule_based_rank_resources(raw_resources, sanitized_topic)
-            ranking_algo_name = "rule_based_v1"
-        else:
-            ranked_resources = llm_rank_resources(raw_resources, sanitized_topic)
-            ranking_algo_name = "llm_based_v1"
-        
-        llm = get_llm()
-        
-        roadmap_prompt = PromptTemplate(
-            template="""
-            Generate a learning roadmap with exactly 5 checkpoints for {topic}. 
-            
-            Each checkpoint should:
-            - Have a clear, specific title.
-            - Include a detailed, structured description (at least 2 lines).
-            - List EXACTLY 3-4 high-quality learning resources, no more and no less.
-            - While Listing resources, include easier resources first and progressively more complex ones later.
-            - The resources are already ranked based on complexity. Use resources with lower ranks for early checkpoints 
-              and higher ranks for later checkpoint
-            - Each resource MUST include the 'reasoning' field from the input data explaining why it was ranked this way."
-            - Make sure to add nice description to each resource based on the content and title, dont mention any names in the resource descriptions
-            - Include the resource's title, URL, and a brief description (2-3 lines) of the content.
-            - Dont mention this in the resource description : "some name" and then "follow"
-            - Make sure the first checkpoint is the easiest and has resources which can be completed in a short time i.e within an hour.
-            - Be progressively more complex.
-            - For each checkpoint, add What You Will Learn and What Next sections.
-            - The What Next section should include a topic to do a Quiz and a challenge to complete before moving to the next checkpoint.
-            The final roadmap MUST have EXACTLY 5 checkpoints, and each checkpoint MUST have AT LEAST 3 resources.
-            
-            {format_instructions}
-            
-            Here are pre-ranked domain-specific resources you should use (distribute them appropriately among the checkpoints).
-            These resources have been intelligently ranked from simplest to most complex:
-            {resources}
-            
-            Make sure to tailor the roadmap to the user's learning needs and provide a clear, structured learning path.
-            Here is the summary of the user's learning needs: {summary}
-            """,
-            input_variables=["topic", "resources", "summary"],
-            partial_variables={"format_instructions": roadmap_parser.get_format_instructions()}
-        )
-        
-        roadmap_chain = LLMChain(llm=llm, prompt=roadmap_prompt)
-        result = roadmap_chain.invoke({
-            "topic": sanitized_topic,
-            "resources": json.dumps(ranked_resources),
-            "summary": summary
-        })
-
-        
-        try:
-            text = result.get("text", "")
-            json_text = re.search(r'```(?:json)?\n?(.*?)```', text, re.DOTALL)
-            if json_text:
-                text = json_text.group(1)
-            else:
-                text = text.strip()
-            
-            roadmap_data = json.loads(text)
-
-            
-            roadmap_data["metadata"] = {
-                "generated_at": datetime.now().isoformat(),
-                "ranking_algorithm": ranking_algo_name,
-                "resource_count": len(ranked_resources)
-            }
-            
-            if (not roadmap_data.get("mainTopic") or 
-                not roadmap_data.get("checkpoints") ):
-                raise ValueError("Unexpected roadmap format received.")
-            
-            return jsonify(roadmap_data), 200
-            
-        except json.JSONDecodeError as e:
-            raise ValueError(f"Invalid JSON response from LLM: {str(e)}")
+        roadmap_data = _parse_roadmap_v2(result.get("text", ""), roadmap_request)
+        return jsonify(roadmap_data), 200
             
     except Exception as e:
         logger.error(f"Endpoint error: {str(e)}")
         return jsonify({"error": f"Failed to process request: {str(e)}"}), 500
 
+def _sse_event(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def _sse_response(events: Iterator[Tuple[str, Dict[str, Any]]]) -> Response:
+    """Server-sent events response; proxies must not buffer it, or nothing arrives early"""
+    def body():
+        for event, data in events:
+            yield _sse_event(event, data)
+    return Response(
+        stream_with_context(body()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def _roadmap_v2_events(topic: str, summary: str, ranking_method: str) -> Iterator[Tuple[str, Any]]:
+    """("checkpoint", checkpoint) events while the LLM streams, then ("roadmap", roadmap) or ("error", error)"""
+    try:
+        roadmap_request = _roadmap_v2_request(topic, summary, ranking_method)
+        parser = ArrayItemStreamParser("checkpoints")
+        for chunk in (roadmap_request["prompt"] | roadmap_request["llm"]).stream(roadmap_request["inputs"]):
+            for checkpoint in parser.feed(chunk.content):
+                yield "checkpoint", checkpoint
+        yield "roadmap", _parse_roadmap_v2(parser.text, roadmap_request)
+    except Exception as e:
+        logger.error(f"Streaming endpoint error: {str(e)}")
+        yield "error", {"error": f"Failed to process request: {str(e)}"}
+
+@roadmap_bp.route('/api/generate-roadmap-v2/stream', methods=['POST'])
+def roadmap_stream_endpoint_v2():
+    """/api/generate-roadmap-v2 as server-sent events: checkpoint events as they complete, then metadata"""
+    data = request.get_json(silent=True)
+    if not data or not data.get('topic'):
+        return jsonify({"error": "Missing topic parameter"}), 400
+    return _sse_response(stream_roadmap_events(
+        _roadmap_v2_events(data.get('topic'), data.get('summary', ''), data.get('ranking_method', 'llm')), "v2 roadmap"
+    ))
+
 @roadmap_bp.route('/api/generate-roadmap', methods=['POST'])
 def roadmap_endpoint():
     try:
@@ -362,6 +420,14 @@ def roadmap_endpoint():
         logger.error(f"Endpoint error: {str(e)}")
         return jsonify({"error": f"Failed to process request: {str(e)}"}), 500
 
+@roadmap_bp.route('/api/generate-roadmap/stream', methods=['POST'])
+def roadmap_stream_endpoint():
+    """/api/generate-roadmap as server-sent events: checkpoint events as they complete, then metadata"""
+    data = request.get_json(silent=True)
+    if not data or not data.get('topic'):
+        return jsonify({"error": "Missing topic parameter"}), 400
+    return _sse_response(stream_roadmap(data.get('topic'), data.get('summary', '')))
+
 
 @roadmap_bp.route('/api/generate-recommendations', methods=['POST'])
 def generate_recommendations():
@@ -391,9 +457,7 @@ def generate_recommendations():
         
         vector_store = get_resources_vector_store()
         topic = " ".join(domain_interests)
-        retrieved_resources = retrieve_relevant_resources(topic, vector_store)
-        
-        filtered_resources = [res for res in retrieved_resources if res.get("difficulty") == difficulty]
+        filtered_resources = retrieve_relevant_resources(topic, vector_store, filters={"difficulty": difficulty})
         
         return jsonify(filtered_resources[:3]), 200
         
@@ -485,4 +549,32 @@ def generate_confidence_score():
         return jsonify({
             "success": False,
             "error": f"Failed to generate confidence score: {str(e)}"
-        }), 500
\ No newline at end of file
+        }), 500
+
+@roadmap_bp.route('/api/topic-validation/stats', methods=['GET'])
+def topic_validation_stats_endpoint():
+    """Local catalog matches and cache hit rate of topic validation, and the LLM calls they saved"""
+    try:
+        return jsonify(get_topic_validation_stats()), 200
+    except Exception as e:
+        logger.error(f"Failed to get topic validation stats: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@roadmap_bp.route('/api/roadmap-cache/stats', methods=['GET'])
+def roadmap_cache_stats_endpoint():
+    try:
+        return jsonify(get_roadmap_cache_stats()), 200
+    except Exception as e:
+        logger.error(f"Failed to get roadmap cache stats: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@roadmap_bp.route('/api/roadmap-cache/invalidate', methods=['POST'])
+def roadmap_cache_invalidate_endpoint():
+    """Drop cached roadmaps of one topic, or all of them, e.g. after new feedback"""
+    try:
+        data = request.get_json(silent=True) or {}
+        removed = invalidate_roadmap_cache(data.get('topic'))
+        return jsonify({"invalidated": removed}), 200
+    except Exception as e:
+        logger.error(f"Failed to invalidate roadmap cache: {str(e)}")
+        return jsonify({"error": str(e)}), 500
@@ -0,0 +1,77 @@
+from flask import Blueprint, request, jsonify
+import logging
+
+from config import GUNICORN_PRELOAD
+from services.refresh_scheduler import get_refresh_status, trigger_refresh
+from services.vector_store import (
+    get_query_cache_stats,
+    get_store_build_reports,
+    get_store_footprints,
+    get_store_snapshots,
+    rollback_vector_store,
+    BuildInProgressError
+)
+from utils.memory_utils import worker_memory_report
+
+logger = logging.getLogger(__name__)
+vector_store_bp = Blueprint('vector_store', __name__)
+
+@vector_store_bp.route('/api/vector-stores/status', methods=['GET'])
+def vector_store_status_endpoint():
+    """Report staleness, build reports, memory footprint and query cache stats of each store"""
+    try:
+        status = get_refresh_status()
+        status["query_cache"] = get_query_cache_stats()
+        status["footprint"] = get_store_footprints()
+        status["snapshots"] = get_store_snapshots()
+        status["builds"] = get_store_build_reports()
+        return jsonify(status), 200
+    except Exception as e:
+        logger.error(f"Failed to get vector store status: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@vector_store_bp.route('/api/vector-stores/memory', methods=['GET'])
+def vector_store_memory_endpoint():
+    """Resident, shared and private memory of the master and each gunicorn worker"""
+    try:
+        return jsonify(worker_memory_report(GUNICORN_PRELOAD)), 200
+    except Exception as e:
+        logger.error(f"Failed to get memory report: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@vector_store_bp.route('/api/vector-stores/refresh', methods=['POST'])
+def vector_store_refresh_endpoint():
+    """Queue a background refresh of one or all stores"""
+    try:
+        data = request.get_json(silent=True) or {}
+        store_name = data.get('store')
+        full_rebuild = bool(data.get('full_rebuild', False))
+
+        queued = trigger_refresh(store_name, full_rebuild)
+        return jsonify({"queued": queued, "full_rebuild": full_rebuild}), 202
+
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Failed to trigger vector store refresh: {str(e)}")
+        return jsonify({"error": f"Failed to trigger refresh: {str(e)}"}), 500
+
+@vector_store_bp.route('/api/vector-stores/rollback', methods=['POST'])
+def vector_store_rollback_endpoint():
+    """Republish an older snapshot of a store, by default the previous one"""
+    try:
+        data = request.get_json(silent=True) or {}
+        store_name = data.get('store')
+        if not store_name:
+            return jsonify({"error": "Missing required parameter: store"}), 400
+
+        version = rollback_vector_store(store_name, data.get('version'))
+        return jsonify({"store": store_name, "version": version}), 200
+
+    except BuildInProgressError as e:
+        return jsonify({"error": str(e)}), 409
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Failed to roll back vector store: {str(e)}")
+        return jsonify({"error": f"Failed to roll back: {str(e)}"}), 500
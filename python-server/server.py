@@ -4,17 +4,26 @@ import os
 import threading
 import time
 
-from config import DB_NAME
+from config import DB_NAME, GUNICORN_PRELOAD
 from routes import register_routes
-from services.vector_store import load_projects, check_and_update_vector_stores
+from services.vector_store import check_and_update_vector_stores, preload_vector_stores
+from services.refresh_scheduler import start_refresh_scheduler
 
 app = Flask(__name__)
 app.logger.setLevel(logging.DEBUG)
 
 def init_app():
     try:
-        load_projects()
+        # Due builds of all stores run concurrently in build processes, so startup
+        # waits for the slowest one rather than their sum
         check_and_update_vector_stores()
+        # The model and built stores are loaded up front so that, under a preloading
+        # gunicorn master, every worker shares them copy-on-write
+        preload_vector_stores()
+        if not GUNICORN_PRELOAD:
+            # Resource and question stores are refreshed in the background; preloaded
+            # gunicorn workers start their scheduler after the fork instead
+            start_refresh_scheduler()
         
         app.logger.info("Application initialized successfully")
     except Exception as e:
@@ -0,0 +1,41 @@
+"""Runs one vector store refresh in a process of its own, for run_refreshes.
+
+    python -m services.build_worker resources [--force] [--full-rebuild]
+
+Prints the result as a JSON line on stdout and logs to stderr.
+"""
+import os
+import sys
+import json
+import logging
+import argparse
+
+logger = logging.getLogger(__name__)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("store")
+    parser.add_argument("--force", action="store_true")
+    parser.add_argument("--full-rebuild", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        stream=sys.stderr,
+        format=f"%(asctime)s [{args.store} build %(process)d] %(name)s %(levelname)s: %(message)s"
+    )
+
+    # Imported once logging is set up, so messages logged at import are kept
+    from services.vector_store import refresh_store
+
+    try:
+        result = {"mode": refresh_store(args.store, args.force, args.full_rebuild), "pid": os.getpid(), "error": None}
+    except Exception as e:
+        logger.exception(f"Refresh of {args.store} failed")
+        result = {"mode": None, "pid": os.getpid(), "error": str(e)}
+
+    print(json.dumps(result), flush=True)
+    sys.exit(0 if result["error"] is None else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+import os
+import re
+import json
+import zlib
+import logging
+from typing import List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from config import ONNX_MODEL_CACHE_PATH, ONNX_INTRA_OP_THREADS
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_BACKENDS = ("torch", "onnx", "onnx-int8", "stub")
+
+# sentence-transformers' defaults, so both backends batch and truncate alike
+_BATCH_SIZE = 32
+_DEFAULT_MAX_SEQ_LENGTH = 512
+# all-MiniLM-L6-v2's, so stub-built stores are shaped like real ones
+_STUB_DIMENSION = 384
+
+def embedding_model_id(backend: str, model_name: str) -> str:
+    """Identity of the vectors a backend produces, for cache keys and manifests.
+
+    The ONNX backends agree with torch only within a tolerance, so their vectors
+    are cached separately.
+    """
+    return model_name if backend == "torch" else f"{model_name}@{backend}"
+
+def create_embeddings(backend: str, model_name: str) -> Embeddings:
+    if backend == "torch":
+        from langchain_community.embeddings import HuggingFaceEmbeddings
+        return HuggingFaceEmbeddings(model_name=model_name)
+    if backend in ("onnx", "onnx-int8"):
+        return OnnxEmbeddings(model_name, quantize=backend == "onnx-int8")
+    if backend == "stub":
+        return StubEmbeddings()
+    raise ValueError(f"Unknown embedding backend: {backend}; expected one of {', '.join(EMBEDDING_BACKENDS)}")
+
+def _hub_json(model_name: str, filename: str) -> Optional[dict]:
+    from huggingface_hub import hf_hub_download
+    try:
+        with open(hf_hub_download(model_name, filename), "r") as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+class OnnxEmbeddings(Embeddings):
+    """Sentence-transformers model run through ONNX Runtime, without torch.
+
+    Reproduces the transformer -> mean pooling -> normalize pipeline of models
+    like all-MiniLM-L6-v2 from the ONNX export published with the model. With
+    quantize set, weights are dynamically quantized to int8 once and cached
+    under ONNX_MODEL_CACHE_PATH.
+
+    The inference session is created lazily in each process: ONNX Runtime's
+    thread pool does not survive a fork, so a preloading gunicorn master only
+    loads the tokenizer and model file.
+    """
+
+    def __init__(self, model_name: str, quantize: bool = False, batch_size: int = _BATCH_SIZE):
+        from tokenizers import Tokenizer
+        from huggingface_hub import hf_hub_download
+
+        self.model_name = model_name
+        self.batch_size = batch_size
+
+        modules = _hub_json(model_name, "modules.json") or []
+        pooling = _hub_json(model_name, "1_Pooling/config.json") or {}
+        if pooling and not pooling.get("pooling_mode_mean_tokens"):
+            raise ValueError(f"{model_name} does not use mean pooling, which is all the ONNX backend implements")
+        self.normalize = any(module.get("type", "").endswith("Normalize") for module in modules)
+
+        sentence_config = _hub_json(model_name, "sentence_bert_config.json") or {}
+        self.tokenizer = Tokenizer.from_file(hf_hub_download(model_name, "tokenizer.json"))
+        self.tokenizer.enable_truncation(sentence_config.get("max_seq_length", _DEFAULT_MAX_SEQ_LENGTH))
+        pad_id = self.tokenizer.token_to_id("[PAD]")
+        self.tokenizer.enable_padding(pad_id=pad_id if pad_id is not None else 0)
+
+        try:
+            model_path = hf_hub_download(model_name, "onnx/model.onnx")
+        except Exception as e:
+            raise ValueError(f"{model_name} has no ONNX export (onnx/model.onnx): {str(e)}")
+        self.model_path = self._quantized(model_path) if quantize else model_path
+
+        self._session = None
+        self._session_pid = None
+
+    def _quantized(self, model_path: str) -> str:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantized_path = os.path.join(ONNX_MODEL_CACHE_PATH, self.model_name.replace("/", "__"), "model_int8.onnx")
+        if not os.path.exists(quantized_path):
+            logger.info(f"Quantizing {self.model_name} to int8 at {quantized_path}")
+            os.makedirs(os.path.dirname(quantized_path), exist_ok=True)
+            tmp_path = f"{quantized_path}.{os.getpid()}.tmp"
+            quantize_dynamic(model_path, tmp_path, weight_type=QuantType.QInt8)
+            os.replace(tmp_path, quantized_path)
+        return quantized_path
+
+    def _get_session(self):
+        if self._session is None or self._session_pid != os.getpid():
+            import onnxruntime
+
+            options = onnxruntime.SessionOptions()
+            options.intra_op_num_threads = ONNX_INTRA_OP_THREADS
+            options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+            self._session = onnxruntime.InferenceSession(
+                self.model_path, options, providers=["CPUExecutionProvider"]
+            )
+            self._input_names = {model_input.name for model_input in self._session.get_inputs()}
+            self._session_pid = os.getpid()
+        return self._session
+
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        session = self._get_session()
+        encodings = self.tokenizer.encode_batch(texts)
+        attention_mask = np.array([encoding.attention_mask for encoding in encodings], dtype=np.int64)
+        inputs = {
+            "input_ids": np.array([encoding.ids for encoding in encodings], dtype=np.int64),
+            "attention_mask": attention_mask,
+            "token_type_ids": np.array([encoding.type_ids for encoding in encodings], dtype=np.int64)
+        }
+        token_embeddings = session.run(None, {name: value for name, value in inputs.items() if name in self._input_names})[0]
+
+        mask = attention_mask[:, :, None].astype(np.float32)
+        embeddings = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        if self.normalize:
+            embeddings /= np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+        return embeddings.astype(np.float32)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        # Like HuggingFaceEmbeddings; longest first, so each batch pads to similar lengths
+        texts = [text.replace("\n", " ") for text in texts]
+        order = sorted(range(len(texts)), key=lambda position: -len(texts[position]))
+        embeddings = np.empty((len(texts), 0), dtype=np.float32)
+        for start in range(0, len(order), self.batch_size):
+            positions = order[start:start + self.batch_size]
+            batch = self._embed_batch([texts[position] for position in positions])
+            if not embeddings.shape[1]:
+                embeddings = np.empty((len(texts), batch.shape[1]), dtype=np.float32)
+            embeddings[positions] = batch
+        return embeddings.tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+class StubEmbeddings(Embeddings):
+    """Deterministic word-hashing embeddings that need no model, for benchmarks and offline runs.
+
+    Each word adds a signed unit to one of dimension buckets, so texts sharing
+    words come out similar. Not a substitute for the real model's quality.
+    """
+
+    def __init__(self, dimension: int = _STUB_DIMENSION):
+        self.dimension = dimension
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        for word in re.findall(r"\w+", text.lower()):
+            bucket = zlib.crc32(word.encode("utf-8"))
+            vector[bucket % self.dimension] += 1.0 if bucket & 0x80000000 else -1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
@@ -0,0 +1,248 @@
+import os
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# A cache is a single structured .npy file sorted by key, so it can be
+# memory-mapped and replaced atomically:
+#   key     S32 hex hash of (model name, text)
+#   vector  float32 embedding
+CACHE_FILE = "embeddings.npy"
+# Vectors computed since the last save, appended in the same record layout
+SEGMENT_FILE = "embeddings.segment"
+# Rows copied at a time when merging the segment into the cache file
+MERGE_CHUNK_SIZE = 4096
+
+def embedding_key(model_name: str, text: str) -> bytes:
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(model_name.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(text.encode("utf-8"))
+    return digest.hexdigest().encode("ascii")
+
+def _entry_dtype(dimension: int) -> np.dtype:
+    return np.dtype([("key", "S32"), ("vector", np.float32, (dimension,))])
+
+class EmbeddingCache:
+    """Persistent content-hash keyed embedding cache for index builds.
+
+    Lookups are a vectorised binary search over the memory-mapped key array,
+    so only texts that were never embedded with this model reach the model.
+    Newly computed vectors go straight to a segment file next to the cache,
+    so a build only holds their keys in memory. A cache directory is used by
+    one build at a time, under the store's build lock.
+    """
+
+    def __init__(self, cache_path: str, model_name: str):
+        self.cache_path = cache_path
+        self.model_name = model_name
+        self.hits = 0
+        self.misses = 0
+        self._entries = None
+        self._keys = np.empty(0, dtype="S32")
+        self._vectors = None
+        # Persisted rows looked up since this cache was opened
+        self._used = np.zeros(0, dtype=bool)
+        # Key -> row in the segment file of each vector computed since the last save
+        self._new_rows: Dict[bytes, int] = {}
+        self._segment = None
+        self._segment_dtype: Optional[np.dtype] = None
+
+        cache_file = os.path.join(cache_path, CACHE_FILE)
+        if os.path.exists(cache_file):
+            try:
+                self._open(cache_file)
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable embedding cache at {cache_path}: {str(e)}")
+                self._entries = None
+                self._keys = np.empty(0, dtype="S32")
+                self._vectors = None
+        self._used = np.zeros(len(self._keys), dtype=bool)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def _open(self, cache_file: str):
+        self._entries = np.load(cache_file, mmap_mode="r")
+        self._keys = self._entries["key"]
+        self._vectors = self._entries["vector"]
+
+    def _segment_path(self) -> str:
+        return os.path.join(self.cache_path, SEGMENT_FILE)
+
+    def _read_segment(self) -> np.ndarray:
+        return np.memmap(self._segment_path(), dtype=self._segment_dtype, mode="r")
+
+    def _lookup(self, keys: np.ndarray) -> np.ndarray:
+        """Row of each key in the persisted cache, or -1"""
+        if not len(self._keys):
+            return np.full(len(keys), -1, dtype=np.int64)
+        rows = np.searchsorted(self._keys, keys)
+        rows = np.minimum(rows, len(self._keys) - 1)
+        found = self._keys[rows] == keys
+        return np.where(found, rows, -1)
+
+    def _append(self, keys: List[bytes], vectors: np.ndarray):
+        """Write newly computed vectors to the end of the segment file"""
+        if self._segment is None:
+            os.makedirs(self.cache_path, exist_ok=True)
+            self._segment_dtype = _entry_dtype(vectors.shape[1])
+            # Truncates whatever an interrupted build left behind
+            self._segment = open(self._segment_path(), "wb")
+        entries = np.empty(len(keys), dtype=self._segment_dtype)
+        entries["key"] = keys
+        entries["vector"] = vectors
+        entries.tofile(self._segment)
+        self._segment.flush()
+        for key in keys:
+            self._new_rows[key] = len(self._new_rows)
+
+    def embed(self, texts: List[str], embed_fn: Callable[[List[str]], List[List[float]]]) -> np.ndarray:
+        """Embed texts, running embed_fn only on texts missing from the cache"""
+        if not texts:
+            dimension = self._vectors.shape[1] if self._vectors is not None else 0
+            return np.empty((0, dimension), dtype=np.float32)
+
+        keys = np.array([embedding_key(self.model_name, text) for text in texts], dtype="S32")
+        rows = self._lookup(keys)
+        cached = rows >= 0
+        self._used[rows[cached]] = True
+
+        # Texts repeated within this batch, or embedded earlier in this run, are computed once
+        missing = {}
+        for position, (key, row) in enumerate(zip(keys.tolist(), rows)):
+            if row < 0 and key not in self._new_rows and key not in missing:
+                missing[key] = texts[position]
+
+        if missing:
+            computed = np.asarray(embed_fn(list(missing.values())), dtype=np.float32)
+            self._append(list(missing), computed)
+
+        self.misses += len(missing)
+        self.hits += len(texts) - len(missing)
+
+        if self._segment_dtype is not None:
+            dimension = self._segment_dtype["vector"].shape[0]
+        else:
+            dimension = self._vectors.shape[1]
+        vectors = np.empty((len(texts), dimension), dtype=np.float32)
+        if cached.any():
+            vectors[cached] = self._vectors[rows[cached]]
+        if not cached.all():
+            segment_rows = [self._new_rows[key] for key in keys[~cached].tolist()]
+            vectors[~cached] = self._read_segment()["vector"][segment_rows]
+        return vectors
+
+    def save(self, prune: bool = False):
+        """Merge the segment of newly computed vectors into the cache file.
+
+        With prune set, only keys used since this cache was opened are kept, which
+        after a full rebuild is exactly the current corpus. The cache file and the
+        segment are merged by key into a memory-mapped output MERGE_CHUNK_SIZE rows
+        at a time, so memory grows by a few integers per vector rather than by the
+        vectors. Nothing is rewritten when nothing was added and nothing is pruned.
+        """
+        keep = np.flatnonzero(self._used) if prune else np.arange(len(self._keys))
+        if not self._new_rows and len(keep) == len(self._keys):
+            return
+        if self._segment is not None:
+            self._segment.close()
+            self._segment = None
+
+        dtype = self._segment_dtype if self._segment_dtype is not None else self._entries.dtype
+        if self._entries is not None and self._entries.dtype != dtype:
+            logger.warning(f"Dropping embedding cache at {self.cache_path} written with another vector size")
+            keep = np.empty(0, dtype=np.int64)
+
+        if self._new_rows:
+            segment = self._read_segment()
+            new_order = np.argsort(segment["key"], kind="stable")
+            kept_keys = self._keys[keep] if len(keep) else np.empty(0, dtype="S32")
+            new_positions = np.searchsorted(kept_keys, segment["key"][new_order]) + np.arange(len(new_order))
+        else:
+            segment = None
+            new_order = new_positions = np.empty(0, dtype=np.int64)
+        total = len(keep) + len(new_order)
+        is_new = np.zeros(total, dtype=bool)
+        is_new[new_positions] = True
+        kept_positions = np.flatnonzero(~is_new)
+
+        path = os.path.join(self.cache_path, CACHE_FILE)
+        merged = np.lib.format.open_memmap(f"{path}.tmp", mode="w+", dtype=dtype, shape=(total,))
+        for start in range(0, len(keep), MERGE_CHUNK_SIZE):
+            chunk = slice(start, start + MERGE_CHUNK_SIZE)
+            merged[kept_positions[chunk]] = self._entries[keep[chunk]]
+        for start in range(0, len(new_order), MERGE_CHUNK_SIZE):
+            chunk = slice(start, start + MERGE_CHUNK_SIZE)
+            merged[new_positions[chunk]] = segment[new_order[chunk]]
+        merged.flush()
+        del merged, segment
+        os.replace(f"{path}.tmp", path)
+        if self._new_rows:
+            os.remove(self._segment_path())
+
+        # Rows used so far stay marked, so a later prune keeps them
+        used = is_new
+        used[kept_positions] = self._used[keep]
+        self._open(path)
+        self._used = used
+        self._new_rows = {}
+        self._segment_dtype = None
+        logger.info(f"Embedding cache at {self.cache_path} now holds {total} vectors")
+
+class QueryEmbeddingCache:
+    """Bounded in-memory LRU cache of query vectors with a TTL per entry"""
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[float, List[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[List[float]]:
+        """Cached vector for key, counting the lookup as a hit or miss"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[0] <= self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return None
+
+    def put(self, key: str, vector: List[float]):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), vector)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def get_or_compute(self, key: str, compute: Callable[[], List[float]]) -> List[float]:
+        vector = self.get(key)
+        if vector is None:
+            # Computed outside the lock so concurrent misses on other keys don't serialise
+            vector = compute()
+            self.put(key, vector)
+        return vector
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None
+            }
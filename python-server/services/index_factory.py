@@ -0,0 +1,148 @@
+import math
+import logging
+from typing import Callable, Optional
+
+import faiss
+import numpy as np
+
+from config import IVF_NLIST, IVF_NPROBE, HNSW_M, HNSW_EF_CONSTRUCTION, HNSW_EF_SEARCH, PQ_M
+
+logger = logging.getLogger(__name__)
+
+INDEX_TYPES = ("flat", "ivf", "hnsw")
+QUANTIZATIONS = ("none", "sq8", "pq")
+
+# faiss warns below 39 training points per IVF list
+_IVF_POINTS_PER_LIST = 39
+# 8-bit PQ trains 256 centroids per sub-quantizer
+_PQ_MIN_TRAINING_POINTS = 256
+
+def _base_index(index: faiss.Index) -> faiss.Index:
+    """The index under an IndexIDMap wrapper, downcast to its concrete type"""
+    if hasattr(index, "id_map"):
+        return faiss.downcast_index(index.index)
+    return index
+
+def create_index(index_type: str, vectors: np.ndarray, quantization: str = "none") -> faiss.Index:
+    """Build an empty id-mapped index of index_type, trained on vectors when the type needs it.
+
+    quantization stores codes instead of float32 vectors: "sq8" keeps one byte per
+    dimension, "pq" keeps PQ_M bytes per vector. IVF falls back to flat when there
+    are too few vectors to train one list, and PQ falls back to SQ8 likewise.
+    """
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type: {index_type}")
+    if quantization not in QUANTIZATIONS:
+        raise ValueError(f"Unknown quantization: {quantization}")
+
+    dimension = vectors.shape[1]
+    if quantization == "pq":
+        if dimension % PQ_M:
+            raise ValueError(f"PQ_M={PQ_M} does not divide the embedding dimension {dimension}")
+        if len(vectors) < _PQ_MIN_TRAINING_POINTS:
+            logger.info(f"Only {len(vectors)} vectors, using SQ8 instead of PQ")
+            quantization = "sq8"
+
+    if index_type == "ivf":
+        nlist = min(IVF_NLIST, len(vectors) // _IVF_POINTS_PER_LIST)
+        if nlist < 1:
+            logger.info(f"Only {len(vectors)} vectors, using a flat index instead of IVF")
+            index_type = "flat"
+        else:
+            quantizer = faiss.IndexFlatL2(dimension)
+            if quantization == "sq8":
+                base = faiss.IndexIVFScalarQuantizer(quantizer, dimension, nlist, faiss.ScalarQuantizer.QT_8bit)
+            elif quantization == "pq":
+                base = faiss.IndexIVFPQ(quantizer, dimension, nlist, PQ_M, 8)
+            else:
+                base = faiss.IndexIVFFlat(quantizer, dimension, nlist)
+            base.nprobe = min(IVF_NPROBE, nlist)
+
+    if index_type == "flat":
+        if quantization == "sq8":
+            base = faiss.IndexScalarQuantizer(dimension, faiss.ScalarQuantizer.QT_8bit)
+        elif quantization == "pq":
+            # A single-list IVFPQ is an exhaustive PQ scan that, unlike IndexPQ,
+            # accepts ID selectors
+            base = faiss.IndexIVFPQ(faiss.IndexFlatL2(dimension), dimension, 1, PQ_M, 8)
+        else:
+            base = faiss.IndexFlatL2(dimension)
+    elif index_type == "hnsw":
+        if quantization == "sq8":
+            base = faiss.IndexHNSWSQ(dimension, faiss.ScalarQuantizer.QT_8bit, HNSW_M)
+        elif quantization == "pq":
+            base = faiss.IndexHNSWPQ(dimension, PQ_M, HNSW_M)
+        else:
+            base = faiss.IndexHNSWFlat(dimension, HNSW_M)
+        base.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+        base.hnsw.efSearch = HNSW_EF_SEARCH
+
+    if not base.is_trained:
+        base.train(vectors)
+
+    # Explicit ids let incremental updates remove and re-add single items
+    return faiss.IndexIDMap2(base)
+
+def index_type_of(index: faiss.Index) -> str:
+    base = _base_index(index)
+    if isinstance(base, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(base, faiss.IndexIVF) and base.nlist > 1:
+        return "ivf"
+    return "flat"
+
+def quantization_of(index: faiss.Index) -> str:
+    base = _base_index(index)
+    if isinstance(base, faiss.IndexHNSW):
+        base = faiss.downcast_index(base.storage)
+    if isinstance(base, (faiss.IndexPQ, faiss.IndexIVFPQ)):
+        return "pq"
+    if isinstance(base, (faiss.IndexScalarQuantizer, faiss.IndexIVFScalarQuantizer)):
+        return "sq8"
+    return "none"
+
+def supports_removal(index: faiss.Index) -> bool:
+    # HNSW graphs cannot drop vectors; those stores are rebuilt instead
+    return index_type_of(index) != "hnsw"
+
+def search_parameters(
+    index: faiss.Index,
+    selector: Optional[faiss.IDSelector] = None,
+    selected: Optional[int] = None,
+    exhaustive: bool = False
+) -> Optional[faiss.SearchParameters]:
+    """Search parameters carrying the index's own nprobe/efSearch, which explicit params would reset.
+
+    IVF lists and HNSW neighbourhoods only hold about selected / ntotal matches
+    of a selector, so nprobe and efSearch are widened by the inverse. exhaustive
+    probes every list or lets the graph search visit every node instead.
+    """
+    if selector is None:
+        return None
+
+    base = _base_index(index)
+    widen = index.ntotal / selected if selected else 1.0
+    if isinstance(base, faiss.IndexIVF):
+        nprobe = base.nlist if exhaustive else min(base.nlist, math.ceil(base.nprobe * widen))
+        return faiss.SearchParametersIVF(sel=selector, nprobe=max(base.nprobe, nprobe))
+    if isinstance(base, faiss.IndexHNSW):
+        ef_search = index.ntotal if exhaustive else min(index.ntotal, math.ceil(base.hnsw.efSearch * widen))
+        return faiss.SearchParametersHNSW(sel=selector, efSearch=max(base.hnsw.efSearch, ef_search))
+    return faiss.SearchParameters(sel=selector)
+
+def rerank_exact(
+    query_vectors: np.ndarray,
+    labels: np.ndarray,
+    lookup_vectors: Callable[[np.ndarray], np.ndarray],
+    k: int
+) -> np.ndarray:
+    """Re-order each row of a quantized shortlist by exact L2 distance and keep k labels"""
+    reranked = np.full((len(labels), k), -1, dtype=np.int64)
+    for row, (query, candidates) in enumerate(zip(query_vectors, labels)):
+        candidates = candidates[candidates >= 0]
+        if not len(candidates):
+            continue
+        distances = ((lookup_vectors(candidates) - query) ** 2).sum(axis=1)
+        best = candidates[np.argsort(distances, kind="stable")[:k]]
+        reranked[row, :len(best)] = best
+    return reranked
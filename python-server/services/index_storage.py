@@ -0,0 +1,536 @@
+import os
+import json
+import mmap
+import shutil
+import logging
+from collections.abc import Mapping
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+import faiss
+import numpy as np
+from filelock import FileLock
+from langchain_community.vectorstores import FAISS
+from langchain_community.docstore.base import Docstore
+from langchain_core.documents import Document
+
+logger = logging.getLogger(__name__)
+
+# Each build is written to its own snapshot directory and published by
+# atomically replacing the pointer file, so readers never see a partial build:
+#   <store>/CURRENT              version name of the live snapshot
+#   <store>/snapshots/<version>/ one complete store, laid out as below
+SNAPSHOTS_DIR = "snapshots"
+CURRENT_FILE = "CURRENT"
+# Held by whichever process is building a snapshot of the store
+BUILD_LOCK_FILE = ".build.lock"
+
+# On-disk layout of a snapshot directory:
+#   index.faiss   raw FAISS index written with faiss.write_index
+#   docs.jsonl    one compact JSON record per vector, in index order: the chunk
+#                 text and the position of its item in items.jsonl
+#   offsets.npy   int64 byte offsets into docs.jsonl (n + 1 entries)
+#   items.jsonl   metadata of each item, stored once however many chunks it has
+#   item_offsets.npy int64 byte offsets into items.jsonl
+#   ids.npy       int64 FAISS label of each record
+#   attributes.json inverted index: field -> normalized value -> labels
+#   vectors.npy   optional float32 vectors in storage order, for exact re-ranking
+#                 of quantized indexes
+#   manifest.json store metadata and memory footprint
+#   build_report.json time per build phase, throughput and peak RSS of the build
+INDEX_FILE = "index.faiss"
+DOCS_FILE = "docs.jsonl"
+OFFSETS_FILE = "offsets.npy"
+ITEMS_FILE = "items.jsonl"
+ITEM_OFFSETS_FILE = "item_offsets.npy"
+IDS_FILE = "ids.npy"
+ATTRIBUTES_FILE = "attributes.json"
+VECTORS_FILE = "vectors.npy"
+MANIFEST_FILE = "manifest.json"
+BUILD_REPORT_FILE = "build_report.json"
+
+# Metadata fields indexed for filtered search; absent fields are skipped
+ATTRIBUTE_FIELDS = ("difficulty", "type", "tags", "topics", "topic", "domain")
+
+# IO_FLAG_MMAP_IFC maps flat codes in place; older faiss builds only know IO_FLAG_MMAP
+_MMAP_FLAGS = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY | getattr(faiss, "IO_FLAG_MMAP_IFC", 0)
+
+class SnapshotValidationError(ValueError):
+    """A built snapshot that must not be published"""
+
+def _map_file(path: str) -> Union[mmap.mmap, bytes]:
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return b""
+
+class MmapDocstore(Docstore):
+    """Read-only docstore backed by memory-mapped JSON lines files.
+
+    Chunk records point at their item's metadata, which is only parsed when a
+    chunk is returned. Snapshots written before the item table existed carry the
+    metadata in every chunk record and are read as they are.
+    """
+
+    def __init__(self, docs_path: str, offsets_path: str, items_path: Optional[str] = None, item_offsets_path: Optional[str] = None):
+        self._offsets = np.load(offsets_path, mmap_mode="r")
+        self._docs = _map_file(docs_path)
+        self._item_offsets = None
+        self._items = b""
+        if items_path and os.path.exists(items_path):
+            self._item_offsets = np.load(item_offsets_path, mmap_mode="r")
+            self._items = _map_file(items_path)
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def item_count(self) -> int:
+        return len(self._item_offsets) - 1 if self._item_offsets is not None else len(self)
+
+    def get_item(self, item: int) -> Dict[str, Any]:
+        start, end = int(self._item_offsets[item]), int(self._item_offsets[item + 1])
+        return json.loads(self._items[start:end])
+
+    def get_record(self, position: int) -> Dict[str, Any]:
+        """The record at position with its item's metadata filled in"""
+        start, end = int(self._offsets[position]), int(self._offsets[position + 1])
+        record = json.loads(self._docs[start:end])
+        if "item" in record:
+            record["metadata"] = self.get_item(record.pop("item"))
+        return record
+
+    def search(self, search: str) -> Union[str, Document]:
+        try:
+            position = int(search)
+        except ValueError:
+            return f"ID {search} not found."
+        if position < 0 or position >= len(self):
+            return f"ID {search} not found."
+        record = self.get_record(position)
+        return Document(page_content=record["page_content"], metadata=record["metadata"])
+
+class LabelPositions(Mapping):
+    """Read-only FAISS label -> docstore id mapping over the memory-mapped labels.
+
+    Stands in for a dict with an entry per vector. Labels of a full build are
+    0..n-1 and map to themselves; otherwise they are looked up by binary search,
+    through a sort order when an update left them out of order.
+    """
+
+    def __init__(self, labels: np.ndarray):
+        self._labels = labels
+        self._order = None
+        if len(labels) > 1 and not (labels[:-1] < labels[1:]).all():
+            self._order = np.argsort(labels, kind="stable")
+        self._identity = self._order is None and (
+            not len(labels) or (int(labels[0]) == 0 and int(labels[-1]) == len(labels) - 1)
+        )
+
+    def _position(self, label: Any) -> Optional[int]:
+        try:
+            label = int(label)
+        except (TypeError, ValueError):
+            return None
+        if self._identity:
+            return label if 0 <= label < len(self._labels) else None
+        found = int(np.searchsorted(self._labels, label, sorter=self._order))
+        if found == len(self._labels):
+            return None
+        position = found if self._order is None else int(self._order[found])
+        return position if self._labels[position] == label else None
+
+    def __getitem__(self, label: Any) -> str:
+        position = self._position(label)
+        if position is None:
+            raise KeyError(label)
+        return str(position)
+
+    def __contains__(self, label: Any) -> bool:
+        return self._position(label) is not None
+
+    def __iter__(self) -> Iterator[int]:
+        return (int(label) for label in self._labels)
+
+    def __len__(self) -> int:
+        return len(self._labels)
+
+class PersistedFAISS(FAISS):
+    """FAISS wrapper over a persisted store, carrying its attribute index"""
+
+    def __init__(
+        self,
+        *args,
+        attribute_index: Optional[Dict[str, Dict[str, np.ndarray]]] = None,
+        rerank_vectors: Optional[np.ndarray] = None,
+        **kwargs
+    ):
+        super().__init__(*args, **kwargs)
+        self.attribute_index = attribute_index or {}
+        self.rerank_vectors = rerank_vectors
+
+    def vectors_for_labels(self, labels: np.ndarray) -> np.ndarray:
+        """Full-precision vectors of labels, paged in from the mapped vectors file"""
+        positions = [int(self.index_to_docstore_id[int(label)]) for label in labels]
+        return np.asarray(self.rerank_vectors[positions], dtype=np.float32)
+
+    def labels_matching(self, filters: Dict[str, Any]) -> np.ndarray:
+        """Labels whose metadata matches every field; a list of values matches any of them"""
+        matched = None
+        for field, wanted in filters.items():
+            values = wanted if isinstance(wanted, (list, tuple, set)) else [wanted]
+            postings = self.attribute_index.get(field, {})
+            field_labels = [postings[normalize_attribute(value)] for value in values
+                            if normalize_attribute(value) in postings]
+            labels = np.unique(np.concatenate(field_labels)) if field_labels else np.empty(0, dtype=np.int64)
+            matched = labels if matched is None else np.intersect1d(matched, labels, assume_unique=True)
+            if not len(matched):
+                break
+        return matched if matched is not None else index_labels(self.index)
+
+def normalize_attribute(value: Any) -> str:
+    return str(value).strip().lower()
+
+def _add_to_attribute_index(
+    attribute_index: Dict[str, Dict[str, List[int]]],
+    records: List[Dict[str, Any]],
+    labels: np.ndarray
+):
+    for record, label in zip(records, labels.tolist()):
+        metadata = record.get("metadata", {})
+        for field in ATTRIBUTE_FIELDS:
+            value = metadata.get(field)
+            if value is None:
+                continue
+            values = value if isinstance(value, list) else [value]
+            postings = attribute_index.setdefault(field, {})
+            for item in {normalize_attribute(item) for item in values if item is not None}:
+                if item:
+                    postings.setdefault(item, []).append(label)
+
+def build_attribute_index(records: List[Dict[str, Any]], labels: np.ndarray) -> Dict[str, Dict[str, List[int]]]:
+    attribute_index: Dict[str, Dict[str, List[int]]] = {}
+    _add_to_attribute_index(attribute_index, records, labels)
+    return attribute_index
+
+def snapshot_path(index_path: str, version: str) -> str:
+    return os.path.join(index_path, SNAPSHOTS_DIR, version)
+
+def build_lock(index_path: str) -> FileLock:
+    """Cross-process lock that serializes builds of a store. The OS releases it
+    if the holder dies, so a crashed build never blocks the next one."""
+    os.makedirs(index_path, exist_ok=True)
+    return FileLock(os.path.join(index_path, BUILD_LOCK_FILE))
+
+def current_version(index_path: str) -> Optional[str]:
+    """Version of the published snapshot, or None if the store was never built"""
+    try:
+        with open(os.path.join(index_path, CURRENT_FILE), "r") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+def list_snapshots(index_path: str) -> List[str]:
+    """Complete snapshot versions, oldest first"""
+    snapshots_root = os.path.join(index_path, SNAPSHOTS_DIR)
+    if not os.path.isdir(snapshots_root):
+        return []
+    return sorted(name for name in os.listdir(snapshots_root) if not name.startswith("."))
+
+def _resolve(path: str) -> str:
+    """A store directory resolves to its current snapshot; a snapshot path to itself"""
+    version = current_version(path)
+    return snapshot_path(path, version) if version else path
+
+def _store_file(path: str, name: str) -> str:
+    return os.path.join(_resolve(path), name)
+
+def _replace_file(path: str, write):
+    # Write to a temp file and rename over the target, so a reader never opens
+    # a partially written file
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+def index_labels(index: faiss.Index) -> np.ndarray:
+    """FAISS labels in storage order; positional for indexes without an id map"""
+    if hasattr(index, "id_map"):
+        return faiss.vector_to_array(index.id_map).astype(np.int64)
+    return np.arange(index.ntotal, dtype=np.int64)
+
+def index_exists(path: str) -> bool:
+    return os.path.exists(_store_file(path, MANIFEST_FILE))
+
+def read_manifest(path: str) -> Dict[str, Any]:
+    with open(_store_file(path, MANIFEST_FILE), "r") as f:
+        return json.load(f)
+
+def read_build_report(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(_store_file(path, BUILD_REPORT_FILE), "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+def write_build_report(index_path: str, version: str, report: Dict[str, Any]):
+    """Store how a snapshot was built alongside it"""
+    path = os.path.join(snapshot_path(index_path, version), BUILD_REPORT_FILE)
+    _replace_file(path, lambda f: f.write(json.dumps(report, indent=2).encode("utf-8")))
+
+def read_index(path: str, mmap_mode: bool = True) -> faiss.Index:
+    """Read the raw index; pass mmap_mode=False to get a writable in-memory copy"""
+    index_file = _store_file(path, INDEX_FILE)
+    if mmap_mode:
+        try:
+            return faiss.read_index(index_file, _MMAP_FLAGS)
+        except RuntimeError as e:
+            # Some index types (e.g. IVF inverted lists on recent faiss) cannot be mapped
+            logger.info(f"Cannot memory-map {index_file}, reading it into memory: {str(e).splitlines()[-1]}")
+    return faiss.read_index(index_file)
+
+def _open_docstore(path: str) -> MmapDocstore:
+    return MmapDocstore(
+        _store_file(path, DOCS_FILE),
+        _store_file(path, OFFSETS_FILE),
+        _store_file(path, ITEMS_FILE),
+        _store_file(path, ITEM_OFFSETS_FILE)
+    )
+
+def read_records(path: str) -> List[Dict[str, Any]]:
+    docstore = _open_docstore(_resolve(path))
+    return [docstore.get_record(position) for position in range(len(docstore))]
+
+def read_vectors(path: str) -> Optional[np.ndarray]:
+    vectors_file = _store_file(path, VECTORS_FILE)
+    if not os.path.exists(vectors_file):
+        return None
+    return np.load(vectors_file, mmap_mode="r")
+
+class SnapshotWriter:
+    """Writes a new, unpublished snapshot of a store batch by batch.
+
+    Records and re-ranking vectors go to disk as they arrive, so a build holds
+    no more than one batch of documents in memory. Use as a context manager;
+    the snapshot is discarded unless finish() completes.
+
+        with SnapshotWriter(index_path, keep_vectors=False) as writer:
+            writer.add(records, labels)
+            version = writer.finish(index, next_id=len(records))
+    """
+
+    # Rows copied per step when turning raw re-ranking vectors into vectors.npy
+    _COPY_ROWS = 65536
+
+    def __init__(self, index_path: str, keep_vectors: bool = False):
+        self.index_path = index_path
+        self.keep_vectors = keep_vectors
+        # Sortable by age; the pid keeps concurrent builders in different processes apart
+        self.version = f"{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%f')}-{os.getpid()}"
+        # Built under a hidden name and renamed once complete, so list_snapshots
+        # never returns a partial snapshot
+        self.path = os.path.join(index_path, SNAPSHOTS_DIR, f".{self.version}.tmp")
+        os.makedirs(self.path)
+
+        self.count = 0
+        self.item_count = 0
+        self._offsets = [0]
+        self._item_offsets = [0]
+        # Chunks of one item arrive together, so an item is stored again only
+        # when its metadata differs from the previous record's
+        self._last_item_line = None
+        self._labels: List[np.ndarray] = []
+        self._attribute_index: Dict[str, Dict[str, List[int]]] = {}
+        self._docs_file = open(os.path.join(self.path, DOCS_FILE), "wb")
+        self._items_file = open(os.path.join(self.path, ITEMS_FILE), "wb")
+        self._vectors_file = open(os.path.join(self.path, f"{VECTORS_FILE}.raw"), "wb") if keep_vectors else None
+        self._dimension = None
+        self._finished = False
+
+    def __enter__(self) -> "SnapshotWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if not self._finished:
+            self._close()
+            shutil.rmtree(self.path, ignore_errors=True)
+
+    def _close(self):
+        self._docs_file.close()
+        self._items_file.close()
+        if self._vectors_file is not None:
+            self._vectors_file.close()
+
+    def add(self, records: List[Dict[str, Any]], labels: np.ndarray, vectors: Optional[np.ndarray] = None):
+        """Append records stored in the index under labels, in storage order"""
+        if len(records) != len(labels):
+            raise ValueError(f"Cannot write {len(records)} records for {len(labels)} labels")
+        for record in records:
+            item_line = json.dumps(record.get("metadata", {}), separators=(",", ":"), default=str).encode("utf-8") + b"\n"
+            if item_line != self._last_item_line:
+                self._items_file.write(item_line)
+                self._item_offsets.append(self._item_offsets[-1] + len(item_line))
+                self._last_item_line = item_line
+                self.item_count += 1
+            chunk = {"page_content": record["page_content"], "item": self.item_count - 1}
+            line = json.dumps(chunk, separators=(",", ":")).encode("utf-8") + b"\n"
+            self._docs_file.write(line)
+            self._offsets.append(self._offsets[-1] + len(line))
+
+        labels = np.asarray(labels, dtype=np.int64)
+        self._labels.append(labels)
+        _add_to_attribute_index(self._attribute_index, records, labels)
+
+        if self.keep_vectors:
+            if vectors is None or len(vectors) != len(records):
+                raise ValueError("Re-ranking vectors are required for every record")
+            vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+            self._dimension = vectors.shape[1]
+            self._vectors_file.write(vectors.tobytes())
+        self.count += len(records)
+
+    def _write_vectors(self) -> int:
+        raw_path = os.path.join(self.path, f"{VECTORS_FILE}.raw")
+        vectors_file = os.path.join(self.path, VECTORS_FILE)
+        if not self.count:
+            np.save(vectors_file, np.empty((0, 0), dtype=np.float32))
+        else:
+            shape = (self.count, self._dimension)
+            raw = np.memmap(raw_path, dtype=np.float32, mode="r", shape=shape)
+            vectors = np.lib.format.open_memmap(vectors_file, mode="w+", dtype=np.float32, shape=shape)
+            for start in range(0, self.count, self._COPY_ROWS):
+                vectors[start:start + self._COPY_ROWS] = raw[start:start + self._COPY_ROWS]
+            vectors.flush()
+            del vectors, raw
+        os.remove(raw_path)
+        return os.path.getsize(vectors_file)
+
+    def finish(self, index: faiss.Index, **manifest_fields) -> str:
+        """Write the index and manifest, complete the snapshot and return its version"""
+        if self.count != index.ntotal:
+            raise ValueError(f"Cannot write {self.count} records for {index.ntotal} vectors")
+        labels = index_labels(index)
+        written_labels = np.concatenate(self._labels) if self._labels else np.empty(0, dtype=np.int64)
+        if not np.array_equal(labels, written_labels):
+            raise ValueError("Records were not written in the index's storage order")
+
+        self._close()
+        np.save(os.path.join(self.path, OFFSETS_FILE), np.asarray(self._offsets, dtype=np.int64))
+        np.save(os.path.join(self.path, ITEM_OFFSETS_FILE), np.asarray(self._item_offsets, dtype=np.int64))
+        np.save(os.path.join(self.path, IDS_FILE), labels)
+        with open(os.path.join(self.path, ATTRIBUTES_FILE), "w") as f:
+            json.dump(self._attribute_index, f, separators=(",", ":"))
+        rerank_vector_bytes = self._write_vectors() if self.keep_vectors else 0
+
+        index_file = os.path.join(self.path, INDEX_FILE)
+        faiss.write_index(index, index_file)
+
+        # Memory footprint: the index file is what each worker keeps resident, the
+        # re-ranking vectors stay on disk and are paged in per query
+        index_bytes = os.path.getsize(index_file)
+        float32_bytes = int(index.ntotal) * int(index.d) * 4
+        manifest = {
+            "count": int(index.ntotal),
+            "item_count": self.item_count,
+            "dimension": int(index.d),
+            "created_at": datetime.now().isoformat(),
+            "index_bytes": index_bytes,
+            "float32_vector_bytes": float32_bytes,
+            "rerank_vector_bytes": rerank_vector_bytes,
+            "compression_ratio": round(float32_bytes / index_bytes, 2) if index_bytes else None,
+            "docstore_bytes": self._offsets[-1] + self._item_offsets[-1],
+            **manifest_fields
+        }
+        with open(os.path.join(self.path, MANIFEST_FILE), "w") as f:
+            json.dump(manifest, f)
+
+        os.rename(self.path, snapshot_path(self.index_path, self.version))
+        self._finished = True
+        return self.version
+
+def write_snapshot(
+    index_path: str,
+    index: faiss.Index,
+    records: List[Dict[str, Any]],
+    vectors: Optional[np.ndarray] = None,
+    **manifest_fields
+) -> str:
+    """Persist a raw FAISS index and its records (one per vector, in storage order)
+    as a new, unpublished snapshot of the store and return its version.
+
+    vectors, when given, are kept alongside for exact re-ranking of quantized indexes.
+    """
+    if vectors is not None and len(vectors) != index.ntotal:
+        raise ValueError(f"Cannot write {len(vectors)} re-ranking vectors for {index.ntotal} vectors")
+    with SnapshotWriter(index_path, keep_vectors=vectors is not None) as writer:
+        if len(records) != index.ntotal:
+            raise ValueError(f"Cannot write {len(records)} records for {index.ntotal} vectors")
+        writer.add(records, index_labels(index), vectors)
+        return writer.finish(index, **manifest_fields)
+
+def validate_store(vector_store: "PersistedFAISS", probe_vector: List[float]):
+    """Raise SnapshotValidationError unless a loaded snapshot can serve queries
+    embedded like probe_vector"""
+    index = vector_store.index
+    if index.ntotal == 0:
+        raise SnapshotValidationError("Snapshot is empty")
+    if len(probe_vector) != index.d:
+        raise SnapshotValidationError(
+            f"Dimension mismatch: index has {index.d}, the embedding model produces {len(probe_vector)}"
+        )
+    if vector_store.rerank_vectors is not None and vector_store.rerank_vectors.shape != (index.ntotal, index.d):
+        raise SnapshotValidationError(
+            f"Re-ranking vectors have shape {vector_store.rerank_vectors.shape}, expected {(index.ntotal, index.d)}"
+        )
+    _, labels = index.search(np.asarray([probe_vector], dtype=np.float32), 1)
+    if labels[0][0] < 0 or int(labels[0][0]) not in vector_store.index_to_docstore_id:
+        raise SnapshotValidationError("Probe query found no document")
+
+def publish_snapshot(index_path: str, version: str, keep: int):
+    """Atomically point the store at version and delete all but the newest keep
+    snapshots (never the published one).
+
+    Processes that still have a deleted snapshot mapped keep reading it until
+    they reload.
+    """
+    _replace_file(os.path.join(index_path, CURRENT_FILE), lambda f: f.write(version.encode("utf-8")))
+
+    for old_version in list_snapshots(index_path)[:-keep or None]:
+        if old_version != version:
+            shutil.rmtree(snapshot_path(index_path, old_version), ignore_errors=True)
+
+def discard_snapshot(index_path: str, version: str):
+    shutil.rmtree(snapshot_path(index_path, version), ignore_errors=True)
+
+def load_vector_store(path: str, embeddings) -> FAISS:
+    """Open a persisted store, or a specific snapshot of one, with the index and
+    documents memory-mapped"""
+    path = _resolve(path)
+    index = read_index(path)
+    docstore = _open_docstore(path)
+    if len(docstore) != index.ntotal:
+        raise ValueError(
+            f"Store at {path} is inconsistent: {index.ntotal} vectors, {len(docstore)} documents"
+        )
+
+    labels = np.load(_store_file(path, IDS_FILE), mmap_mode="r")
+
+    attributes_file = _store_file(path, ATTRIBUTES_FILE)
+    if os.path.exists(attributes_file):
+        with open(attributes_file, "r") as f:
+            raw_attribute_index = json.load(f)
+    else:
+        logger.info(f"No attribute index at {path}, building it from the documents")
+        raw_attribute_index = build_attribute_index(read_records(path), np.asarray(labels))
+
+    attribute_index = {
+        field: {value: np.asarray(value_labels, dtype=np.int64) for value, value_labels in postings.items()}
+        for field, postings in raw_attribute_index.items()
+    }
+    return PersistedFAISS(
+        embedding_function=embeddings,
+        index=index,
+        docstore=docstore,
+        index_to_docstore_id=LabelPositions(labels),
+        attribute_index=attribute_index,
+        rerank_vectors=read_vectors(path)
+    )
@@ -5,8 +5,25 @@ from langchain_groq import ChatGroq
 from langchain_core.prompts import PromptTemplate
 from langchain.chains import LLMChain
 
+from config import (
+    TOPIC_VALIDATION_CACHE_PATH,
+    TOPIC_VALIDATION_CACHE_SIZE,
+    TOPIC_VALIDATION_CACHE_TTL_SECONDS,
+    TOPIC_VALIDATION_CACHE_FLUSH_SECONDS
+)
+from services.topic_catalog import get_topic_catalog_stats, match_topic
+from services.validation_cache import ValidationCache
+from utils.sanitizers import canonicalize_text
+
 logger = logging.getLogger(__name__)
 
+_validation_cache = ValidationCache(
+    TOPIC_VALIDATION_CACHE_PATH,
+    TOPIC_VALIDATION_CACHE_SIZE,
+    TOPIC_VALIDATION_CACHE_TTL_SECONDS,
+    TOPIC_VALIDATION_CACHE_FLUSH_SECONDS
+)
+
 @lru_cache(maxsize=1)
 def get_llm() -> ChatGroq:
     try:
@@ -22,6 +39,26 @@ def get_llm() -> ChatGroq:
         raise RuntimeError(f"LLM initialization failed: {str(e)}")
 
 def validate_topic(topic: str, llm: ChatGroq) -> str:
+    """Main topic of a sanitized input, asking the LLM only for unknown inputs not validated recently"""
+    # Known topics are matched locally; injection attempts raise here
+    known_topic = match_topic(topic)
+    if known_topic is not None:
+        return known_topic
+
+    key = canonicalize_text(topic)
+    validated_topic = _validation_cache.get(key)
+    if validated_topic is not None:
+        return validated_topic
+
+    # Rejected inputs raise before being cached, so they are asked again next time
+    validated_topic = _validate_topic_with_llm(topic, llm)
+    _validation_cache.put(key, validated_topic)
+    return validated_topic
+
+def get_topic_validation_stats():
+    return {"catalog": get_topic_catalog_stats(), "cache": _validation_cache.stats()}
+
+def _validate_topic_with_llm(topic: str, llm: ChatGroq) -> str:
     validation_prompt = PromptTemplate(
         template="""
         You are an AI that helps validate and sanitize user inputs.
@@ -1,27 +1,31 @@
 import json
 import logging
 import re
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 
-from services.vector_store import get_projects_vector_store
+from langchain_core.documents import Document
+
+from services.vector_store import get_projects_vector_store, embed_query
 
 logger = logging.getLogger(__name__)
 
+def matching_project(retrieved_docs: List[Document], title: str) -> Optional[Dict[str, Any]]:
+    """Metadata of the first retrieved project whose title matches, ignoring case"""
+    for doc in retrieved_docs:
+        if doc.metadata.get("title", "").lower() == title.lower():
+            return doc.metadata
+    return None
+
 def get_project_by_title(title: str) -> Dict[str, Any]:
     try:
         # Get the vector store
         vector_store = get_projects_vector_store()
         
         # Use exact title search
-        retriever = vector_store.as_retriever(search_kwargs={"k": 10})
-        retrieved_docs = retriever.get_relevant_documents(f"Title: {title}")
+        retrieved_docs = vector_store.similarity_search_by_vector(embed_query(f"Title: {title}"), k=10)
         
         # Find exact match
-        project = None
-        for doc in retrieved_docs:
-            if doc.metadata.get("title", "").lower() == title.lower():
-                project = doc.metadata
-                break
+        project = matching_project(retrieved_docs, title)
         
         if not project:
             return {"error": f"Project with title '{title}' not found"}
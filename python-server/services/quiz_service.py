@@ -1,3 +1,4 @@
+import os
 import json
 import logging
 import re
@@ -7,14 +8,40 @@ from langchain_core.prompts import PromptTemplate
 from langchain.chains import LLMChain
 from langchain_core.output_parsers import JsonOutputParser
 
+from config import (
+    QUESTIONS_FAISS_INDEX_PATH,
+    SEMANTIC_CACHE_PATH,
+    SEMANTIC_CACHE_THRESHOLD,
+    SEMANTIC_CACHE_SIZE,
+    SEMANTIC_CACHE_TTL_SECONDS
+)
+from services.index_storage import current_version
 from services.llm_service import get_llm, validate_topic
-from services.vector_store import get_questions_vector_store, retrieve_relevant_questions
-from utils.sanitizers import sanitize_input
+from services.semantic_cache import SemanticCache
+from services.vector_store import embed_query, get_questions_vector_store, retrieve_relevant_questions
+from utils.sanitizers import canonicalize_text, sanitize_input
 from models.models import Quiz
 
 logger = logging.getLogger(__name__)
 quiz_parser = JsonOutputParser(pydantic_object=Quiz)
 
+_semantic_quiz_cache = SemanticCache(
+    "quiz", os.path.join(SEMANTIC_CACHE_PATH, "quizzes"), embed_query,
+    SEMANTIC_CACHE_THRESHOLD, SEMANTIC_CACHE_SIZE, SEMANTIC_CACHE_TTL_SECONDS
+)
+
+def quiz_cache_context(domain: str, difficulty: str, tags: List[str]) -> Dict[str, Any]:
+    """Everything a generated quiz depends on besides its topic"""
+    return {
+        "domain": canonicalize_text(domain),
+        "difficulty": canonicalize_text(difficulty),
+        "tags": sorted({canonicalize_text(tag) for tag in tags}),
+        "question_index_version": current_version(QUESTIONS_FAISS_INDEX_PATH)
+    }
+
+def get_quiz_cache_stats() -> Dict[str, Any]:
+    return _semantic_quiz_cache.stats()
+
 def generate_quiz(
     topic: str,
     domain: str,
@@ -23,12 +50,17 @@ def generate_quiz(
 ) -> Dict[str, Any]:
     try:
         llm = get_llm()
-        vector_store = get_questions_vector_store()
         
         sanitized_topic = sanitize_input(topic)
         validated_topic = validate_topic(sanitized_topic, llm)
         logger.info(f"Validated Quiz Topic: {validated_topic}")
         
+        cache_context = quiz_cache_context(domain, difficulty, tags)
+        cached_quiz = _semantic_quiz_cache.get(validated_topic, cache_context)
+        if cached_quiz is not None:
+            return cached_quiz
+        
+        vector_store = get_questions_vector_store()
         retrieved_questions = retrieve_relevant_questions(
             validated_topic, 
             difficulty, 
@@ -96,6 +128,7 @@ def generate_quiz(
                     not question.get("explanation")):
                     raise ValueError(f"Question {i+1} has invalid format.")
             
+            _semantic_quiz_cache.put(validated_topic, cache_context, quiz_data)
             return quiz_data
             
         except json.JSONDecodeError as e:
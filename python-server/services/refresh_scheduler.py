@@ -0,0 +1,130 @@
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from config import REFRESH_CHECK_INTERVAL_SECONDS
+from services.roadmap_service import invalidate_stale_roadmaps
+from services.topic_catalog import refresh_topic_catalog
+from services.vector_store import STORE_REFRESHERS, run_refreshes
+from utils.db_utils import get_last_update_info
+
+logger = logging.getLogger(__name__)
+
+# Background thread that keeps index rebuilds off the request path.
+# Requests keep reading the last published store while a refresh runs.
+_scheduler_thread: Optional[threading.Thread] = None
+_wakeup = threading.Event()
+_stop = threading.Event()
+_state_lock = threading.Lock()
+_pending: Dict[str, bool] = {}
+_status: Dict[str, Dict[str, Any]] = {
+    store_name: {
+        "running": False,
+        "last_build_at": None,
+        "last_build_mode": None,
+        "last_build_seconds": None,
+        "last_checked_at": None,
+        "last_error": None
+    }
+    for store_name in STORE_REFRESHERS
+}
+
+def _mark_running(store_name: str):
+    with _state_lock:
+        _status[store_name]["running"] = True
+
+def _record_refresh(store_name: str, result: Dict[str, Any]):
+    with _state_lock:
+        status = _status[store_name]
+        status["running"] = False
+        status["last_checked_at"] = datetime.now().isoformat()
+        status["last_error"] = result["error"]
+        if result["mode"] and not result["error"]:
+            status["last_build_at"] = datetime.now().isoformat()
+            status["last_build_mode"] = result["mode"]
+            status["last_build_seconds"] = result["seconds"]
+            logger.info(f"{result['mode'].capitalize()} refresh of {store_name} took {result['seconds']}s")
+
+def _run():
+    while not _stop.is_set():
+        with _state_lock:
+            requested = dict(_pending)
+            _pending.clear()
+
+        # Stores due at the same time are refreshed concurrently
+        requests = {
+            store_name: (store_name in requested, requested.get(store_name, False))
+            for store_name in STORE_REFRESHERS
+        }
+        built = False
+        try:
+            # Only stores whose build actually starts show as running
+            for store_name, result in run_refreshes(requests, on_start=_mark_running):
+                _record_refresh(store_name, result)
+                built = built or bool(result["mode"] and not result["error"])
+                if store_name == "resources" and result["mode"] and not result["error"]:
+                    # Cached roadmaps list resources from the replaced snapshot
+                    invalidate_stale_roadmaps()
+            refresh_topic_catalog(built)
+        except Exception as e:
+            logger.error(f"Background refresh failed: {str(e)}")
+        finally:
+            with _state_lock:
+                for status in _status.values():
+                    status["running"] = False
+
+        _wakeup.wait(REFRESH_CHECK_INTERVAL_SECONDS)
+        _wakeup.clear()
+
+def start_refresh_scheduler():
+    """Start the background refresh thread; the first check runs immediately"""
+    global _scheduler_thread
+    if _scheduler_thread is not None and _scheduler_thread.is_alive():
+        return
+
+    _stop.clear()
+    _scheduler_thread = threading.Thread(target=_run, name="vector-store-refresh", daemon=True)
+    _scheduler_thread.start()
+    logger.info(f"Vector store refresh scheduler started (every {REFRESH_CHECK_INTERVAL_SECONDS}s)")
+
+def stop_refresh_scheduler():
+    """Stop the background refresh thread once its current check is done"""
+    _stop.set()
+    _wakeup.set()
+
+def trigger_refresh(store_name: Optional[str] = None, full_rebuild: bool = False) -> List[str]:
+    """Queue an on-demand refresh of one store, or all stores when store_name is None"""
+    store_names = [store_name] if store_name else list(STORE_REFRESHERS)
+    for name in store_names:
+        if name not in STORE_REFRESHERS:
+            raise ValueError(f"Unknown vector store: {name}")
+
+    with _state_lock:
+        for name in store_names:
+            _pending[name] = _pending.get(name, False) or full_rebuild
+    _wakeup.set()
+    return store_names
+
+def get_refresh_status() -> Dict[str, Any]:
+    """Staleness, last build time and build duration of every refreshable store"""
+    update_info = get_last_update_info()
+    now = datetime.now()
+
+    with _state_lock:
+        stores = {store_name: dict(status) for store_name, status in _status.items()}
+        pending = dict(_pending)
+
+    for store_name, status in stores.items():
+        last_full = update_info.get(store_name)
+        last_update = max(filter(None, [last_full, update_info.get(f"{store_name}_incremental")]), default=None)
+        status["last_full_rebuild_at"] = last_full.isoformat() if last_full else None
+        status["last_updated_at"] = last_update.isoformat() if last_update else None
+        status["staleness_seconds"] = round((now - last_update).total_seconds(), 1) if last_update else None
+        status["pending"] = store_name in pending
+
+    return {
+        "scheduler_running": _scheduler_thread is not None and _scheduler_thread.is_alive(),
+        "check_interval_seconds": REFRESH_CHECK_INTERVAL_SECONDS,
+        "stores": stores
+    }
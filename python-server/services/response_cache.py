@@ -0,0 +1,130 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+def response_key(parts: Dict[str, Any]) -> str:
+    digest = hashlib.blake2b(json.dumps(parts, sort_keys=True).encode("utf-8"), digest_size=16)
+    return digest.hexdigest()
+
+class ResponseCache:
+    """Generated responses stored one JSON file per key, shared by every process using the directory.
+
+    Each entry keeps the key parts it was stored under, so entries can be
+    invalidated by any of them. Entries expire ttl_seconds after they were
+    stored; beyond max_entries the least recently read are dropped.
+    """
+
+    def __init__(self, directory: str, max_entries: int, ttl_seconds: float):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.invalidated = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _entries(self):
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return
+        for name in names:
+            if name.endswith(".json"):
+                yield os.path.join(self.directory, name)
+
+    def _remove(self, path: str) -> bool:
+        try:
+            os.remove(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def get(self, parts: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Response stored under parts, or None if missing or expired"""
+        path = self._path(response_key(parts))
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            entry = None
+
+        with self._lock:
+            if entry is None or time.time() - entry["stored_at"] > self.ttl_seconds:
+                if entry is not None:
+                    self._remove(path)
+                self.misses += 1
+                return None
+            self.hits += 1
+        # The file's mtime is its last use, for LRU eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry["response"]
+
+    def put(self, parts: Dict[str, Any], response: Dict[str, Any]):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(response_key(parts))
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"parts": parts, "stored_at": time.time(), "response": response}, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Failed to cache response: {str(e)}")
+            self._remove(tmp_path)
+            return
+        self._evict()
+
+    def _evict(self):
+        paths = list(self._entries())
+        if len(paths) <= self.max_entries:
+            return
+        by_use = []
+        for path in paths:
+            try:
+                by_use.append((os.path.getmtime(path), path))
+            except OSError:
+                pass
+        by_use.sort()
+        for _, path in by_use[:len(by_use) - self.max_entries]:
+            self._remove(path)
+
+    def invalidate(self, matches: Optional[Callable[[Dict[str, Any]], bool]] = None) -> int:
+        """Drop entries whose key parts match, or every entry; returns how many were dropped"""
+        removed = 0
+        for path in self._entries():
+            if matches is not None:
+                try:
+                    with open(path, "r", encoding="utf-8") as f:
+                        parts = json.load(f)["parts"]
+                except (OSError, ValueError, KeyError):
+                    parts = None
+                if parts is not None and not matches(parts):
+                    continue
+            removed += self._remove(path)
+        with self._lock:
+            self.invalidated += removed
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": sum(1 for _ in self._entries()),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "invalidated": self.invalidated
+            }
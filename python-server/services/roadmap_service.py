@@ -1,22 +1,87 @@
+import os
 import json
+import time
+import hashlib
 import logging
 import re
 import requests
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
 from datetime import datetime
 
 from langchain_core.prompts import PromptTemplate
 from langchain.chains import LLMChain
 from langchain_core.output_parsers import JsonOutputParser
 
+from config import (
+    RESOURCES_FAISS_INDEX_PATH,
+    ROADMAP_CACHE_PATH,
+    ROADMAP_CACHE_SIZE,
+    ROADMAP_CACHE_TTL_SECONDS,
+    SEMANTIC_CACHE_PATH,
+    SEMANTIC_CACHE_THRESHOLD,
+    SEMANTIC_CACHE_SIZE,
+    SEMANTIC_CACHE_TTL_SECONDS
+)
+from services.index_storage import current_version
 from services.llm_service import get_llm, validate_topic
-from services.vector_store import get_resources_vector_store, retrieve_relevant_resources
-from utils.sanitizers import sanitize_input
+from services.response_cache import ResponseCache
+from services.semantic_cache import SemanticCache
+from services.vector_store import embed_query, get_resources_vector_store, retrieve_relevant_resources
+from utils.json_stream import ArrayItemStreamParser
+from utils.sanitizers import canonicalize_text, sanitize_input
 from models.models import Roadmap
 
 logger = logging.getLogger(__name__)
 roadmap_parser = JsonOutputParser(pydantic_object=Roadmap)
 
+_roadmap_cache = ResponseCache(ROADMAP_CACHE_PATH, ROADMAP_CACHE_SIZE, ROADMAP_CACHE_TTL_SECONDS)
+# Catches other spellings of a topic the exact cache already holds a roadmap for
+_semantic_roadmap_cache = SemanticCache(
+    "roadmap", os.path.join(SEMANTIC_CACHE_PATH, "roadmaps"), embed_query,
+    SEMANTIC_CACHE_THRESHOLD, SEMANTIC_CACHE_SIZE, SEMANTIC_CACHE_TTL_SECONDS
+)
+
+def _fingerprint(text: str) -> str:
+    return hashlib.blake2b(canonicalize_text(text).encode("utf-8"), digest_size=8).hexdigest()
+
+def roadmap_cache_parts(validated_topic: str, summary: str, feedback_info: str) -> Dict[str, Any]:
+    """Everything a generated roadmap depends on besides the LLM itself.
+
+    The feedback version is a fingerprint of the feedback text the prompt
+    includes, and the resource index version the published resources
+    snapshot, so new feedback or a rebuilt index yields a new key.
+    """
+    return {
+        "topic": canonicalize_text(validated_topic),
+        "summary": _fingerprint(summary),
+        "feedback_version": _fingerprint(feedback_info),
+        "resource_index_version": current_version(RESOURCES_FAISS_INDEX_PATH)
+    }
+
+def _semantic_context(cache_parts: Dict[str, Any]) -> Dict[str, Any]:
+    return {part: value for part, value in cache_parts.items() if part != "topic"}
+
+def invalidate_roadmap_cache(topic: Optional[str] = None) -> int:
+    """Drop cached roadmaps, of one validated topic or all of them"""
+    if topic is None:
+        return _roadmap_cache.invalidate() + _semantic_roadmap_cache.invalidate()
+    topic = canonicalize_text(topic)
+    return (
+        _roadmap_cache.invalidate(lambda parts: parts["topic"] == topic)
+        + _semantic_roadmap_cache.invalidate(lambda cached_topic, context: canonicalize_text(cached_topic) == topic)
+    )
+
+def invalidate_stale_roadmaps() -> int:
+    """Drop cached roadmaps built from a resources snapshot other than the published one"""
+    version = current_version(RESOURCES_FAISS_INDEX_PATH)
+    return (
+        _roadmap_cache.invalidate(lambda parts: parts["resource_index_version"] != version)
+        + _semantic_roadmap_cache.invalidate(lambda topic, context: context["resource_index_version"] != version)
+    )
+
+def get_roadmap_cache_stats() -> Dict[str, Any]:
+    return {"exact": _roadmap_cache.stats(), "semantic": _semantic_roadmap_cache.stats()}
+
 def get_global_feedback_summary() -> Dict[str, Any]:
 
     try:
@@ -100,13 +165,10 @@ def parse_feedback_summary(summary_text: str) -> Dict[str, Any]:
         logger.error(f"Error parsing feedback summary: {str(e)}")
         return {"global_stats": {}, "roadmaps": {}}
 
-def generate_roadmap(
-    topic: str,
-    summary: str = ""
-) -> Dict[str, Any]:
+def _roadmap_events(topic: str, summary: str, stream: bool) -> Iterator[Tuple[str, Any]]:
+    """("checkpoint", checkpoint) events while streaming, then ("roadmap", roadmap) or ("error", error)"""
     try:
         llm = get_llm()
-        vector_store = get_resources_vector_store()
 
         sanitized_topic = sanitize_input(topic)
         validated_topic = validate_topic(sanitized_topic, llm)
@@ -121,9 +183,6 @@ def generate_roadmap(
             if roadmap_name.lower() in validated_topic.lower() or validated_topic.lower() in roadmap_name.lower():
                 topic_feedback = roadmap_data
                 break
-                
-        retrieved_resources = retrieve_relevant_resources(validated_topic, vector_store)
-        logger.info(f"Found {len(retrieved_resources)} relevant resources")
         
         feedback_info = ""
         if topic_feedback:
@@ -151,6 +210,27 @@ def generate_roadmap(
                 - Total Feedback: {global_stats.get('total_feedback', 'No data')}
                 """
         
+        # Identical requests against the same feedback and resources get the stored roadmap
+        cache_parts = roadmap_cache_parts(validated_topic, summary, feedback_info)
+        cached_roadmap = _roadmap_cache.get(cache_parts)
+        if cached_roadmap is not None:
+            logger.info(f"Serving cached roadmap for {validated_topic}")
+            cached_roadmap["metadata"]["cached"] = True
+            yield "roadmap", cached_roadmap
+            return
+        
+        cached_roadmap = _semantic_roadmap_cache.get(validated_topic, _semantic_context(cache_parts))
+        if cached_roadmap is not None:
+            _roadmap_cache.put(cache_parts, cached_roadmap)
+            cached_roadmap["metadata"]["cached"] = True
+            cached_roadmap["metadata"]["semantic_cache_hit"] = True
+            yield "roadmap", cached_roadmap
+            return
+        
+        vector_store = get_resources_vector_store()
+        retrieved_resources = retrieve_relevant_resources(validated_topic, vector_store)
+        logger.info(f"Found {len(retrieved_resources)} relevant resources")
+        
         roadmap_prompt = PromptTemplate(
             template="""
             Generate a learning roadmap with exactly 5 checkpoints for {topic}. 
@@ -208,16 +288,24 @@ def generate_roadmap(
         rendered_prompt = roadmap_prompt.format(**example_values)
         print(rendered_prompt)
         
-        roadmap_chain = LLMChain(llm=llm, prompt=roadmap_prompt)
-        result = roadmap_chain.invoke({
+        roadmap_inputs = {
             "topic": validated_topic,
             "resources": json.dumps(retrieved_resources),
             "summary": summary,
             "feedback_info": feedback_info
-        })
+        }
+        if stream:
+            # Each checkpoint goes out as soon as the model has written it
+            parser = ArrayItemStreamParser("checkpoints")
+            for chunk in (roadmap_prompt | llm).stream(roadmap_inputs):
+                for checkpoint in parser.feed(chunk.content):
+                    yield "checkpoint", checkpoint
+            text = parser.text
+        else:
+            roadmap_chain = LLMChain(llm=llm, prompt=roadmap_prompt)
+            text = roadmap_chain.invoke(roadmap_inputs).get("text", "")
 
         try:
-            text = result.get("text", "")
             json_text = re.search(r'```(?:json)?\n?(.*?)```', text, re.DOTALL)
             if json_text:
                 text = json_text.group(1)
@@ -246,15 +334,73 @@ def generate_roadmap(
                 len(roadmap_data.get("checkpoints", [])) != 5):
                 raise ValueError("Unexpected roadmap format received.")
             
-            
-            return roadmap_data
+            _roadmap_cache.put(cache_parts, roadmap_data)
+            _semantic_roadmap_cache.put(validated_topic, _semantic_context(cache_parts), roadmap_data)
+            yield "roadmap", roadmap_data
             
         except json.JSONDecodeError as e:
             raise ValueError(f"Invalid JSON response from LLM: {str(e)}")
             
     except Exception as e:
         logger.error(f"Error generating roadmap: {str(e)}")
-        return {"error": f"Failed to generate roadmap: {str(e)}"}
+        yield "error", {"error": f"Failed to generate roadmap: {str(e)}"}
+
+def generate_roadmap(
+    topic: str,
+    summary: str = ""
+) -> Dict[str, Any]:
+    for event, data in _roadmap_events(topic, summary, stream=False):
+        if event in ("roadmap", "error"):
+            return data
+    return {"error": "Failed to generate roadmap: no roadmap was produced"}
+
+def stream_roadmap_events(events: Iterable[Tuple[str, Any]], label: str = "roadmap") -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Numbered checkpoint events and a closing metadata event from raw roadmap generation events.
+
+    events yields ("checkpoint", checkpoint) as the LLM completes each one, then
+    ("roadmap", roadmap) or ("error", error). Checkpoints of the roadmap that were
+    not streamed, e.g. cached ones, go out before the metadata, which adds how
+    many were streamed and when the first one was sent.
+    """
+    started = time.perf_counter()
+    streamed = 0
+    first_checkpoint_seconds = None
+    for event, data in events:
+        if event == "checkpoint":
+            if first_checkpoint_seconds is None:
+                first_checkpoint_seconds = round(time.perf_counter() - started, 3)
+                logger.info(f"First {label} checkpoint streamed after {first_checkpoint_seconds}s")
+            yield "checkpoint", {"index": streamed, "checkpoint": data}
+            streamed += 1
+        elif event == "error":
+            yield "error", data
+            return
+        else:
+            # Cached roadmaps, or a response the incremental parser could not split
+            if first_checkpoint_seconds is None:
+                first_checkpoint_seconds = round(time.perf_counter() - started, 3)
+            for index, checkpoint in enumerate(data["checkpoints"][streamed:], start=streamed):
+                yield "checkpoint", {"index": index, "checkpoint": checkpoint}
+            yield "metadata", {
+                "mainTopic": data.get("mainTopic"),
+                "description": data.get("description"),
+                "metadata": {
+                    **data.get("metadata", {}),
+                    "streamed_checkpoints": streamed,
+                    "first_checkpoint_seconds": first_checkpoint_seconds,
+                    "total_seconds": round(time.perf_counter() - started, 3)
+                }
+            }
+
+def stream_roadmap(topic: str, summary: str = "") -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """generate_roadmap as events: each checkpoint as soon as the LLM completes it, then the rest.
+
+    Yields ("checkpoint", {"index", "checkpoint"}) per checkpoint and finally
+    ("metadata", {"mainTopic", "description", "metadata"}), or ("error", ...)
+    if generation or validation fails, possibly after some checkpoints. A
+    cached roadmap is sent the same way, all at once.
+    """
+    return stream_roadmap_events(_roadmap_events(topic, summary, stream=True))
     
 
 
@@ -0,0 +1,233 @@
+import os
+import json
+import time
+import logging
+import threading
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+import faiss
+import numpy as np
+
+from services.response_cache import response_key
+
+logger = logging.getLogger(__name__)
+
+# Recent lookups kept for the stats endpoint, to tune the threshold against
+RECENT_DECISIONS = 50
+
+class SemanticCache:
+    """Generated responses reused for topics whose embeddings are close enough.
+
+    Entries are stored one JSON file each (topic, context, vector, response) in
+    directory, so every worker shares them. Each process keeps the vectors in
+    a small inner-product index over normalized embeddings, i.e. cosine
+    similarity, and only reads entry files that are new or were rewritten
+    since it last read them. A response is
+    only reused for the same context, e.g. the same summary and feedback of a
+    roadmap, and when the topic similarity reaches threshold.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        directory: str,
+        embed: Callable[[str], List[float]],
+        threshold: float,
+        max_entries: int,
+        ttl_seconds: float
+    ):
+        self.name = name
+        self.directory = directory
+        self.embed = embed
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.recent: Deque[Dict[str, Any]] = deque(maxlen=RECENT_DECISIONS)
+        self._lock = threading.Lock()
+        self._directory_mtime = None
+        # key -> (topic, context, stored_at); _keys holds the key of each index row
+        self._entries: Dict[str, Tuple[str, Dict[str, Any], float]] = {}
+        # key -> st_mtime_ns of the entry file when it was read
+        self._mtimes: Dict[str, int] = {}
+        self._keys: List[str] = []
+        # Index rows of each context, by its response_key
+        self._context_rows: Dict[str, List[int]] = {}
+        self._index: Optional[faiss.Index] = None
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _vector(self, topic: str) -> np.ndarray:
+        vector = np.asarray(self.embed(topic), dtype=np.float32).reshape(1, -1)
+        faiss.normalize_L2(vector)
+        return vector
+
+    def _sync(self):
+        """Pick up entries added, rewritten or removed by any process since the last lookup; called with _lock held"""
+        try:
+            mtime = os.stat(self.directory).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if mtime == self._directory_mtime and self._index is not None:
+            return
+        self._directory_mtime = mtime
+
+        present = {}
+        if mtime is not None:
+            with os.scandir(self.directory) as listing:
+                for file in listing:
+                    if file.name.endswith(".json"):
+                        try:
+                            present[file.name[:-len(".json")]] = file.stat().st_mtime_ns
+                        except FileNotFoundError:
+                            continue
+        vectors = {}
+        if self._index is not None:
+            for row, key in enumerate(self._keys):
+                # A put of the same topic and context elsewhere replaces the file in place
+                if key in present and present[key] == self._mtimes.get(key):
+                    vectors[key] = self._index.reconstruct(row)
+        entries = {key: entry for key, entry in self._entries.items() if key in vectors}
+        for key in present.keys() - entries.keys():
+            try:
+                with open(self._path(key), "r", encoding="utf-8") as f:
+                    stored = json.load(f)
+                entries[key] = (stored["topic"], stored["context"], stored["stored_at"])
+                vectors[key] = np.asarray(stored["vector"], dtype=np.float32)
+            except (OSError, ValueError, KeyError):
+                # Still being written, or removed meanwhile
+                continue
+
+        self._entries = entries
+        self._mtimes = {key: present[key] for key in entries}
+        self._keys = list(entries)
+        self._context_rows = {}
+        for row, (_, context, _) in enumerate(entries.values()):
+            self._context_rows.setdefault(response_key(context), []).append(row)
+        if self._keys:
+            matrix = np.vstack([vectors[key] for key in self._keys])
+            self._index = faiss.IndexFlatIP(matrix.shape[1])
+            self._index.add(matrix)
+        else:
+            self._index = None
+
+    def _nearest(self, context_key: str, vector: np.ndarray) -> Tuple[Optional[str], Optional[str], float]:
+        """Best entry for the same context: (key, its topic, similarity); called with _lock held"""
+        self._sync()
+        now = time.time()
+        # Only this context's live rows are searched, however many other contexts a topic has
+        rows = [
+            row for row in self._context_rows.get(context_key, [])
+            if now - self._entries[self._keys[row]][2] <= self.ttl_seconds
+        ]
+        if not rows:
+            return None, None, 0.0
+        params = faiss.SearchParameters(sel=faiss.IDSelectorBatch(np.array(rows, dtype=np.int64)))
+        similarities, found = self._index.search(vector, 1, params=params)
+        if found[0][0] < 0:
+            return None, None, 0.0
+        key = self._keys[found[0][0]]
+        return key, self._entries[key][0], float(similarities[0][0])
+
+    def get(self, topic: str, context: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Response generated for a topic similar to topic in the same context, or None"""
+        vector = self._vector(topic)
+        with self._lock:
+            key, cached_topic, similarity = self._nearest(response_key(context), vector)
+            hit = key is not None and similarity >= self.threshold
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+            lookups = self.hits + self.misses
+            self.recent.append({
+                "topic": topic,
+                "nearest_topic": cached_topic,
+                "similarity": round(similarity, 4),
+                "hit": hit
+            })
+        logger.info(
+            f"Semantic {self.name} cache {'hit' if hit else 'miss'}: '{topic}' nearest '{cached_topic}' "
+            f"similarity {similarity:.4f} {'>=' if hit else '<'} threshold {self.threshold} "
+            f"(hit rate {self.hits / lookups:.2%} of {lookups})"
+        )
+        if not hit:
+            return None
+
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                return json.load(f)["response"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def put(self, topic: str, context: Dict[str, Any], response: Dict[str, Any]):
+        vector = self._vector(topic)
+        os.makedirs(self.directory, exist_ok=True)
+        key = response_key({"topic": topic, "context": context})
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        entry = {
+            "topic": topic,
+            "context": context,
+            "stored_at": time.time(),
+            "vector": vector[0].tolist(),
+            "response": response
+        }
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Failed to store semantic {self.name} cache entry: {str(e)}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        self._evict()
+
+    def _remove_keys(self, keys: List[str]) -> int:
+        removed = 0
+        for key in keys:
+            try:
+                os.remove(self._path(key))
+                removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
+    def _evict(self):
+        """Drop expired entries, then the oldest beyond max_entries"""
+        with self._lock:
+            self._sync()
+            now = time.time()
+            by_age = sorted(self._entries.items(), key=lambda item: item[1][2])
+            expired = [key for key, (_, _, stored_at) in by_age if now - stored_at > self.ttl_seconds]
+            live = [key for key, (_, _, stored_at) in by_age if now - stored_at <= self.ttl_seconds]
+            self._remove_keys(expired + live[:max(0, len(live) - self.max_entries)])
+
+    def invalidate(self, matches: Optional[Callable[[str, Dict[str, Any]], bool]] = None) -> int:
+        """Drop entries whose (topic, context) match, or every entry; returns how many were dropped"""
+        with self._lock:
+            self._sync()
+            keys = [
+                key for key, (topic, context, _) in self._entries.items()
+                if matches is None or matches(topic, context)
+            ]
+            return self._remove_keys(keys)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._sync()
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "threshold": self.threshold,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "recent_decisions": list(self.recent)
+            }
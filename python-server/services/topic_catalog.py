@@ -0,0 +1,313 @@
+import os
+import re
+import json
+import math
+import bisect
+import logging
+import threading
+from collections import Counter, defaultdict
+from datetime import datetime
+from difflib import SequenceMatcher
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from config import DB_NAME, TOPIC_CATALOG_PATH, TOPIC_MATCH_CUTOFF
+from utils.db_utils import get_mongodb_client
+
+logger = logging.getLogger(__name__)
+
+# Bundled article dumps, with the topic each one covers
+TOPIC_FILES = {
+    "python.json": "Python",
+    "javascript.json": "JavaScript",
+    "java.json": "Java",
+    "cpp.json": "C++",
+    "ml.json": "Machine Learning"
+}
+ROADMAP_DATA_FILE = "roadmap_data_python.json"
+
+# Common spellings of known topics, by normalized form
+ALIASES = {
+    "py": "Python",
+    "python3": "Python",
+    "js": "JavaScript",
+    "ecmascript": "JavaScript",
+    "ts": "TypeScript",
+    "cpp": "C++",
+    "c plus plus": "C++",
+    "cplusplus": "C++",
+    "csharp": "C#",
+    "c sharp": "C#",
+    "golang": "Go",
+    "ml": "Machine Learning",
+    "ai": "Artificial Intelligence",
+    "dl": "Deep Learning",
+    "nlp": "Natural Language Processing",
+    "dsa": "Data Structures and Algorithms",
+    "ds and algo": "Data Structures and Algorithms",
+    "k8s": "Kubernetes",
+    "reactjs": "React",
+    "react js": "React",
+    "nodejs": "Node.js",
+    "node js": "Node.js",
+    "node": "Node.js",
+    "vuejs": "Vue.js",
+    "postgres": "PostgreSQL",
+    "mongo": "MongoDB",
+    "oop": "Object-Oriented Programming",
+    "oops": "Object-Oriented Programming"
+}
+
+# Phrasing that only appears in inputs trying to steer the model, rejected outright
+INJECTION_PATTERNS = [re.compile(pattern, re.IGNORECASE) for pattern in (
+    r"\b(ignore|disregard|forget)\s+(all\s+)?(of\s+)?(the\s+|your\s+)?(previous|prior|above|earlier|preceding)\s+"
+    r"(instructions?|prompts?|rules|messages?|context)\b",
+    r"\b(system|developer)\s+prompt\b",
+    r"<\|[^|]*\|>|\[/?INST\]"
+)]
+# Weaker signals that also occur in real topics ("print in python", "Jinja {{ }}
+# templates"); such inputs skip local matching and are left to the LLM validation
+SUSPICIOUS_PATTERNS = [re.compile(pattern, re.IGNORECASE) for pattern in (
+    r"\b(ignore|disregard|forget|override)\b.{0,40}\b(instructions?|prompts?|rules|above|previous|everything)\b",
+    r"\b(system|developer)\s+(message|instructions?)\b",
+    r"\byou\s+are\s+(now|an?|the)\b",
+    r"\bact\s+as\b",
+    r"\bpretend\b",
+    r"\b(respond|reply|answer|output|return|print)\s+(only|with|in)\b",
+    r"\bjailbreak\b",
+    r"^\s*(system|assistant|user)\s*:",
+    r"```|\{\{|\}\}"
+)]
+
+# Requests wrapped around the topic, e.g. "I want to learn python" -> "python"
+_REQUEST_PREFIX = re.compile(
+    r"^(?:(?:please|pls)\s+)?(?:(?:i\s+(?:want|would\s+like|wanna|need)\s+to|help\s+me|teach\s+me|how\s+to|"
+    r"how\s+do\s+i|let\s+me)\s+)?(?:(?:learn(?:ing)?|study(?:ing)?|master(?:ing)?|understand)\b)?\s*(?:about\s+)?"
+)
+_REQUEST_SUFFIX = re.compile(r"\s+(?:roadmap|learning\s+path|course|tutorials?|quiz)$")
+_PUNCTUATION = re.compile(r"[^\w\s+#.\-]")
+
+# Fuzzy matches closer than this to the runner-up naming another topic are ambiguous
+AMBIGUITY_MARGIN = 0.03
+# Longest input worth matching; anything longer is left to the LLM
+MAX_TOPIC_LENGTH = 100
+
+_lock = threading.Lock()
+_catalog: Dict[str, Any] = {"mtime": None, "topics": {}, "by_length": [], "sources": {}, "built_at": None}
+_stats = Counter()
+
+def normalize_topic(text: str) -> str:
+    """Lowercase form of a topic without punctuation, surrounding request words or extra whitespace"""
+    text = _PUNCTUATION.sub(" ", (text or "").lower())
+    text = " ".join(text.split()).strip(" .-")
+    text = _REQUEST_SUFFIX.sub("", _REQUEST_PREFIX.sub("", text))
+    return text.strip(" .-")
+
+def is_injection(text: str) -> bool:
+    return any(pattern.search(text) for pattern in INJECTION_PATTERNS)
+
+def is_suspicious(text: str) -> bool:
+    return any(pattern.search(text) for pattern in SUSPICIOUS_PATTERNS)
+
+def _topic_file_terms(path: str) -> Iterator[str]:
+    with open(path, "r", encoding="utf-8") as f:
+        articles = json.load(f)
+    yield TOPIC_FILES[os.path.basename(path)]
+    for article in articles:
+        yield from article.get("tags", [])
+
+def _roadmap_data_terms(path: str) -> Iterator[str]:
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    # Only a saved roadmap has topics; the file may hold just its format instructions
+    roadmaps = data if isinstance(data, list) else [data]
+    for roadmap in roadmaps:
+        if isinstance(roadmap, dict) and roadmap.get("mainTopic"):
+            yield roadmap["mainTopic"]
+
+def _mongo_terms() -> Iterator[Tuple[str, str]]:
+    db = get_mongodb_client()[DB_NAME]
+    for field in ("topics", "tags"):
+        for value in db.resourcesFromCommunity.distinct(field):
+            yield f"resources.{field}", value
+    for value in db.roadmaps.distinct("mainTopic"):
+        yield "roadmaps", value
+
+def _source_terms() -> Iterator[Tuple[str, str]]:
+    """(source, topic) pairs from every source that can be read; failing sources are skipped"""
+    for filename in TOPIC_FILES:
+        try:
+            for term in _topic_file_terms(filename):
+                yield filename, term
+        except Exception as e:
+            logger.warning(f"Skipping {filename} in the topic catalog: {str(e)}")
+    try:
+        for term in _roadmap_data_terms(ROADMAP_DATA_FILE):
+            yield ROADMAP_DATA_FILE, term
+    except Exception as e:
+        logger.warning(f"Skipping {ROADMAP_DATA_FILE} in the topic catalog: {str(e)}")
+    try:
+        yield from _mongo_terms()
+    except Exception as e:
+        logger.warning(f"Skipping MongoDB topics in the topic catalog: {str(e)}")
+
+def build_topic_catalog(terms: Optional[Iterable[Tuple[str, str]]] = None) -> Dict[str, Any]:
+    """Collect known topics into TOPIC_CATALOG_PATH and return its summary.
+
+    Each normalized topic maps to its most common spelling, or its curated one
+    for topic file and alias topics. Aliases are added whether or not a source
+    mentions their topic.
+    """
+    spellings: Dict[str, Counter] = defaultdict(Counter)
+    sources = Counter()
+    for source, term in (_source_terms() if terms is None else terms):
+        if not isinstance(term, str) or len(term) > MAX_TOPIC_LENGTH:
+            continue
+        key = normalize_topic(term)
+        if key and not is_injection(term) and not is_suspicious(term):
+            spellings[key][term.strip()] += 1
+            sources[source] += 1
+
+    topics = {key: counts.most_common(1)[0][0] for key, counts in spellings.items()}
+    # Curated spellings win over whatever the sources use most
+    for topic in [*TOPIC_FILES.values(), *ALIASES.values()]:
+        topics[normalize_topic(topic)] = topic
+    topics.update(ALIASES)
+
+    catalog = {
+        "built_at": datetime.now().isoformat(),
+        "sources": dict(sources),
+        "topics": dict(sorted(topics.items()))
+    }
+    tmp_path = f"{TOPIC_CATALOG_PATH}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(catalog, f, ensure_ascii=False)
+    os.replace(tmp_path, TOPIC_CATALOG_PATH)
+    logger.info(f"Built topic catalog with {len(topics)} topics from {dict(sources)}")
+    return {"built_at": catalog["built_at"], "topics": len(topics), "sources": catalog["sources"]}
+
+def refresh_topic_catalog(stores_built: bool) -> Optional[Dict[str, Any]]:
+    """Rebuild the catalog after a vector store build, or when it was never built"""
+    if not stores_built and os.path.exists(TOPIC_CATALOG_PATH):
+        return None
+    try:
+        return build_topic_catalog()
+    except Exception as e:
+        logger.error(f"Failed to build topic catalog: {str(e)}")
+        return None
+
+def _load_catalog() -> Dict[str, Any]:
+    """The catalog in memory, reloaded when a rebuild (possibly in another process) replaced the file"""
+    global _catalog
+    try:
+        mtime = os.path.getmtime(TOPIC_CATALOG_PATH)
+    except OSError:
+        mtime = None
+    with _lock:
+        if mtime == _catalog["mtime"]:
+            return _catalog
+        topics, sources, built_at = {}, {}, None
+        if mtime is not None:
+            try:
+                with open(TOPIC_CATALOG_PATH, "r", encoding="utf-8") as f:
+                    stored = json.load(f)
+                topics, sources, built_at = stored["topics"], stored.get("sources", {}), stored.get("built_at")
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Ignoring unreadable topic catalog: {str(e)}")
+        # Replaced whole, so lookups holding the previous catalog stay consistent
+        _catalog = {
+            "mtime": mtime,
+            "topics": topics,
+            # Keys ordered by length, so fuzzy matching only compares keys of similar length
+            "by_length": sorted((len(key), key) for key in topics),
+            "sources": sources,
+            "built_at": built_at
+        }
+        return _catalog
+
+def _fuzzy_match(key: str, catalog: Dict[str, Any]) -> Tuple[Optional[str], bool]:
+    """Closest known topic within TOPIC_MATCH_CUTOFF, and whether another topic is about as close"""
+    by_length = catalog["by_length"]
+    # The ratio is at most 2 * shorter / (len(key) + len(candidate)), so keys
+    # whose length alone keeps it below the cutoff are skipped
+    shortest = math.ceil(len(key) * TOPIC_MATCH_CUTOFF / (2 - TOPIC_MATCH_CUTOFF))
+    longest = math.floor(len(key) * (2 / TOPIC_MATCH_CUTOFF - 1))
+    low = bisect.bisect_left(by_length, (shortest, ""))
+    high = bisect.bisect_left(by_length, (longest + 1, ""))
+
+    scored: List[Tuple[float, str]] = []
+    for _, candidate in by_length[low:high]:
+        matcher = SequenceMatcher(None, key, candidate)
+        if matcher.real_quick_ratio() >= TOPIC_MATCH_CUTOFF and matcher.quick_ratio() >= TOPIC_MATCH_CUTOFF:
+            ratio = matcher.ratio()
+            if ratio >= TOPIC_MATCH_CUTOFF:
+                scored.append((ratio, candidate))
+    if not scored:
+        return None, False
+
+    scored.sort(reverse=True)
+    best_ratio, best = scored[0]
+    topic = catalog["topics"][best]
+    ambiguous = any(
+        best_ratio - ratio < AMBIGUITY_MARGIN and normalize_topic(catalog["topics"][candidate]) != normalize_topic(topic)
+        for ratio, candidate in scored[1:]
+    )
+    return topic, ambiguous
+
+def _count(outcome: str):
+    with _lock:
+        _stats[outcome] += 1
+
+def match_topic(topic: str) -> Optional[str]:
+    """Known topic named by a sanitized input, or None when the LLM has to decide.
+
+    Raises ValueError for inputs that can only be prompt injection, like the LLM
+    validation does for inputs it cannot extract a topic from. Inputs that merely
+    look like one are left to the LLM.
+    """
+    if is_injection(topic):
+        _count("rejected")
+        raise ValueError("Invalid or too long topic detected.")
+    if is_suspicious(topic):
+        _count("deferred")
+        return None
+
+    key = normalize_topic(topic)
+    catalog = _load_catalog()
+    if not key or len(key) > MAX_TOPIC_LENGTH or not catalog["topics"]:
+        _count("unknown")
+        return None
+
+    known = catalog["topics"].get(key)
+    if known is not None:
+        _count("exact")
+        return known
+
+    known, ambiguous = _fuzzy_match(key, catalog)
+    if ambiguous:
+        _count("ambiguous")
+        return None
+    if known is None:
+        _count("unknown")
+        return None
+    _count("fuzzy")
+    return known
+
+def get_topic_catalog_stats() -> Dict[str, Any]:
+    catalog = _load_catalog()
+    with _lock:
+        stats = Counter(_stats)
+    matched = stats["exact"] + stats["fuzzy"]
+    lookups = matched + stats["ambiguous"] + stats["unknown"] + stats["deferred"]
+    return {
+        "built_at": catalog["built_at"],
+        "topics": len(catalog["topics"]),
+        "sources": catalog["sources"],
+        "match_cutoff": TOPIC_MATCH_CUTOFF,
+        "exact_matches": stats["exact"],
+        "fuzzy_matches": stats["fuzzy"],
+        "ambiguous": stats["ambiguous"],
+        "unknown": stats["unknown"],
+        "deferred_to_llm": stats["deferred"],
+        "rejected": stats["rejected"],
+        "match_rate": round(matched / lookups, 4) if lookups else None
+    }
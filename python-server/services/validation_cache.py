@@ -0,0 +1,128 @@
+import os
+import json
+import atexit
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from filelock import FileLock
+
+logger = logging.getLogger(__name__)
+
+class ValidationCache:
+    """Bounded LRU cache of validated topics with a TTL per entry, persisted to a JSON file.
+
+    Entries survive restarts and are shared by every process using the same
+    file: each save merges this process's entries and counters into the file
+    under a lock, the most recently used entries winning. New entries are saved
+    right away; hits only update memory and are saved at most every
+    flush_seconds, and at exit. saved_calls counts the LLM calls that hits made
+    unnecessary, across all processes and restarts.
+    """
+
+    def __init__(self, path: str, max_size: int, ttl_seconds: float, flush_seconds: float):
+        self.path = path
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.flush_seconds = flush_seconds
+        self.hits = 0
+        self.misses = 0
+        self.saved_calls = 0
+        # key -> {"topic", "validated_at", "used_at"}, least recently used first
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._unsaved_hits = 0
+        self._saved_at = time.monotonic()
+        self._lock = threading.Lock()
+        self._file_lock = FileLock(f"{path}.lock")
+        with self._lock:
+            self._merge_file()
+        atexit.register(self.flush)
+
+    def _read_file(self) -> Dict[str, Any]:
+        try:
+            with open(self.path, "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable topic validation cache at {self.path}: {str(e)}")
+            return {}
+
+    def _merge_file(self) -> Dict[str, Any]:
+        """Fold the file's entries into memory; the newer use of a key wins"""
+        stored = self._read_file()
+        now = time.time()
+        for key, entry in stored.get("entries", {}).items():
+            if now - entry.get("validated_at", 0) > self.ttl_seconds:
+                continue
+            current = self._entries.get(key)
+            if current is None or entry.get("used_at", 0) > current["used_at"]:
+                self._entries[key] = entry
+        ordered = sorted(self._entries.items(), key=lambda item: item[1]["used_at"])
+        self._entries = OrderedDict(ordered[-self.max_size:] if self.max_size > 0 else [])
+        self.saved_calls = stored.get("saved_calls", 0) + self._unsaved_hits
+        return stored
+
+    def _save(self):
+        # Called with self._lock held
+        try:
+            with self._file_lock:
+                self._merge_file()
+                data = {"saved_calls": self.saved_calls, "entries": dict(self._entries)}
+                tmp_path = f"{self.path}.{os.getpid()}.tmp"
+                with open(tmp_path, "w") as f:
+                    json.dump(data, f, separators=(",", ":"))
+                os.replace(tmp_path, self.path)
+                self._unsaved_hits = 0
+                self._saved_at = time.monotonic()
+        except OSError as e:
+            logger.warning(f"Failed to persist topic validation cache: {str(e)}")
+
+    def get(self, key: str) -> Optional[str]:
+        """Cached validated topic for key, counting the lookup as a hit or miss"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry["validated_at"] <= self.ttl_seconds:
+                entry["used_at"] = now
+                self._entries.move_to_end(key)
+                self.hits += 1
+                self._unsaved_hits += 1
+                self.saved_calls += 1
+                if time.monotonic() - self._saved_at >= self.flush_seconds:
+                    self._save()
+                return entry["topic"]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: str, topic: str):
+        now = time.time()
+        with self._lock:
+            self._entries[key] = {"topic": topic, "validated_at": now, "used_at": now}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            self._save()
+
+    def flush(self):
+        """Save hits not yet persisted"""
+        with self._lock:
+            if self._unsaved_hits:
+                self._save()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "saved_llm_calls": self.saved_calls
+            }
@@ -1,270 +1,1052 @@
 import os
-import pickle
+import sys
+import time
 import logging
 import json
-from datetime import datetime, timedelta
-from typing import List, Dict, Any
-import pickle
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import List, Dict, Any, Callable, Iterable, Iterator, Optional, Set, Tuple, Union
 
+import faiss
+import numpy as np
+from bson import ObjectId
 from langchain_community.vectorstores import FAISS
-from langchain_community.embeddings import HuggingFaceEmbeddings
 from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
 from langchain.text_splitter import RecursiveCharacterTextSplitter
+from filelock import FileLock, Timeout
 
 from config import (
     RESOURCES_FAISS_INDEX_PATH,
     QUESTIONS_FAISS_INDEX_PATH,
     PROJECTS_FAISS_INDEX_PATH,
     EMBEDDINGS_MODEL_NAME,
+    EMBEDDING_BACKEND,
     UPDATE_INTERVAL_DAYS,
+    INCREMENTAL_UPDATE_INTERVAL_MINUTES,
+    EMBEDDING_CACHE_PATH,
+    QUERY_EMBEDDING_CACHE_SIZE,
+    QUERY_EMBEDDING_CACHE_TTL_SECONDS,
+    RESOURCES_INDEX_TYPE,
+    QUESTIONS_INDEX_TYPE,
+    PROJECTS_INDEX_TYPE,
+    RESOURCES_INDEX_QUANTIZATION,
+    QUESTIONS_INDEX_QUANTIZATION,
+    PROJECTS_INDEX_QUANTIZATION,
+    RERANK_QUANTIZED,
+    RERANK_K_FACTOR,
+    VECTOR_STORE_SNAPSHOTS_TO_KEEP,
+    MONGO_BATCH_SIZE,
+    EMBEDDING_BATCH_SIZE,
+    INDEX_TRAINING_SAMPLE_SIZE,
+    REFRESH_MAX_PARALLEL_BUILDS,
+    REFRESH_BUILD_TIMEOUT_SECONDS,
+    REFRESH_THREADS_PER_BUILD,
     DB_NAME
 )
-from utils.db_utils import get_mongodb_client, get_last_update_info, save_last_update_info
+from services.index_factory import (
+    create_index,
+    index_type_of,
+    quantization_of,
+    supports_removal,
+    search_parameters,
+    rerank_exact
+)
+from services.embedding_cache import EmbeddingCache, QueryEmbeddingCache
+from services.topic_catalog import refresh_topic_catalog
+from services.embedding_backends import create_embeddings, embedding_model_id
+from services.index_storage import (
+    index_exists,
+    index_labels,
+    build_lock,
+    current_version,
+    list_snapshots,
+    snapshot_path,
+    read_manifest,
+    read_build_report,
+    write_build_report,
+    read_index,
+    read_records,
+    read_vectors,
+    write_snapshot,
+    SnapshotWriter,
+    validate_store,
+    publish_snapshot,
+    discard_snapshot,
+    load_vector_store,
+    PersistedFAISS,
+    SnapshotValidationError
+)
+from utils.build_report import BuildReport
+from utils.db_utils import get_mongodb_client, get_last_update_info, record_last_update
+from utils.sanitizers import canonicalize_url, canonicalize_text
 
 logger = logging.getLogger(__name__)
 
-def load_projects():
-    """Load projects from JSON file and create vector store"""
+EMBEDDINGS_MODEL_ID = embedding_model_id(EMBEDDING_BACKEND, EMBEDDINGS_MODEL_NAME)
+
+STORE_INDEX_TYPES = {
+    RESOURCES_FAISS_INDEX_PATH: RESOURCES_INDEX_TYPE,
+    QUESTIONS_FAISS_INDEX_PATH: QUESTIONS_INDEX_TYPE,
+    PROJECTS_FAISS_INDEX_PATH: PROJECTS_INDEX_TYPE
+}
+
+STORE_PATHS = {
+    "resources": RESOURCES_FAISS_INDEX_PATH,
+    "questions": QUESTIONS_FAISS_INDEX_PATH,
+    "projects": PROJECTS_FAISS_INDEX_PATH
+}
+
+STORE_QUANTIZATIONS = {
+    RESOURCES_FAISS_INDEX_PATH: RESOURCES_INDEX_QUANTIZATION,
+    QUESTIONS_FAISS_INDEX_PATH: QUESTIONS_INDEX_QUANTIZATION,
+    PROJECTS_FAISS_INDEX_PATH: PROJECTS_INDEX_QUANTIZATION
+}
+
+# Embedded to check that a new snapshot matches the serving model before it goes live
+VALIDATION_QUERY = "python programming basics"
+
+# Result sizes of retrieval. Resources and questions are deduplicated at ingest,
+# one vector per item, so a search for exactly this many needs no over-fetching.
+RESOURCES_K = 20
+QUESTIONS_K = 15
+
+ItemKey = Callable[[Dict[str, Any]], str]
+
+class BuildInProgressError(RuntimeError):
+    """The store is being built by another process or thread"""
+
+# Fields read from MongoDB: everything that goes into a document, its metadata
+# or the attribute index. Anything else stays in the database.
+RESOURCE_FIELDS = ["title", "name", "url", "type", "tags", "topics", "difficulty", "description", "domain", "updatedAt"]
+QUESTION_FIELDS = ["question", "options", "correctOption", "explanation", "tags", "domain", "topic", "difficulty", "updatedAt"]
+
+# Process-wide registry of loaded vector stores, keyed by index path.
+# Each entry holds the live store and the snapshot version it was loaded from,
+# so a build or rollback published by another worker is picked up on the next request.
+_store_registry: Dict[str, Tuple[FAISS, float]] = {}
+_store_registry_lock = threading.RLock()
+# One lock object per store, so a process re-entering its own lock doesn't block.
+# The lock is file based: across gunicorn workers and threads exactly one builds
+# a store while the others keep serving the published snapshot.
+_build_locks: Dict[str, FileLock] = {}
+
+# Shared by every retrieval entry point; traffic is dominated by a few dozen topics
+_query_cache = QueryEmbeddingCache(QUERY_EMBEDDING_CACHE_SIZE, QUERY_EMBEDDING_CACHE_TTL_SECONDS)
+
+@lru_cache(maxsize=None)
+def get_embeddings(model_name: str = EMBEDDINGS_MODEL_NAME) -> Embeddings:
+    """The shared embedding model, run by the configured EMBEDDING_BACKEND"""
+    return create_embeddings(EMBEDDING_BACKEND, model_name)
+
+def normalize_query(query: str) -> str:
+    # MiniLM's tokenizer is uncased, so case and spacing never change the vector
+    return " ".join(query.lower().split())
+
+def embed_query(query: str) -> List[float]:
+    """Embed a retrieval query, reusing the vector of an identical normalized query"""
+    normalized = normalize_query(query)
+    return _query_cache.get_or_compute(normalized, lambda: get_embeddings().embed_query(normalized))
+
+def get_query_cache_stats() -> Dict[str, Any]:
+    return _query_cache.stats()
+
+def _store_build_lock(index_path: str) -> FileLock:
+    lock = _build_locks.get(index_path)
+    if lock is None:
+        lock = _build_locks.setdefault(index_path, build_lock(index_path))
+    return lock
+
+def _current_snapshot(index_path: str, version: Optional[str] = None) -> str:
+    version = version or current_version(index_path)
+    return snapshot_path(index_path, version) if version else index_path
+
+def publish_vector_store(index_path: str, vector_store: FAISS, version: Optional[str]):
+    """Hot-swap the live store for index_path; in-flight requests keep their reference"""
+    with _store_registry_lock:
+        _store_registry[index_path] = (vector_store, version)
+    logger.info(f"Published vector store for {index_path} (snapshot {version})")
+
+def get_registered_store(index_path: str, build: Callable[[], None]) -> FAISS:
+    """Return the live store for index_path, loading it from disk at most once per snapshot"""
+    version = current_version(index_path)
+
+    entry = _store_registry.get(index_path)
+    if entry is not None and (version is None or entry[1] == version):
+        return entry[0]
+
+    if not index_exists(index_path):
+        # Builders hold the build lock while they publish through the registry
+        # lock, so the build lock is taken first and never under the registry lock
+        with _store_build_lock(index_path):
+            if not index_exists(index_path):
+                logger.info(f"Creating a new FAISS index for {index_path}...")
+                build()
+        version = current_version(index_path)
+        entry = _store_registry.get(index_path)
+        if entry is not None and entry[1] == version:
+            return entry[0]
+
+    logger.info(f"Loading FAISS index from {index_path} (snapshot {version})...")
+    source = _current_snapshot(index_path, version)
+    embeddings_model = read_manifest(source).get("embeddings_model")
+    if embeddings_model != EMBEDDINGS_MODEL_ID:
+        logger.warning(
+            f"{index_path} was embedded with {embeddings_model} but queries use {EMBEDDINGS_MODEL_ID}; "
+            f"its results are unreliable until the next refresh rebuilds it"
+        )
+    vector_store = load_vector_store(source, get_embeddings())
+    with _store_registry_lock:
+        entry = _store_registry.get(index_path)
+        # Another thread may have loaded or published this snapshot meanwhile
+        if entry is not None and entry[1] == version:
+            return entry[0]
+        _store_registry[index_path] = (vector_store, version)
+    return vector_store
+
+def _utc_now() -> datetime:
+    # Naive UTC, the form pymongo uses for stored dates
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def _project_document(project: Dict[str, Any]) -> Document:
+    # Extract searchable content
+    content = f"Title: {project.get('title', '')}\n"
+    content += f"Tags: {', '.join(project.get('tags', []))}\n"
+    
+    # Extract text from checkpoints to make searchable
+    for checkpoint in project.get('checkpoints', []):
+        content += f"Checkpoint: {checkpoint.get('checkpoint', '')}\n"
+        for item in checkpoint.get('content', []):
+            if item.get('type') == 'p':
+                content += f"{item.get('text', '')}\n"
+            elif item.get('type') == 'pre':
+                content += f"Code: {item.get('text', '')}\n"
+    
+    return Document(page_content=content, metadata=project)
+
+def _resource_document(resource: Dict[str, Any]) -> Document:
+    if "_id" in resource:
+        resource["_id"] = str(resource["_id"])
+    
+    topics = resource.get('topics', [])
+    if not isinstance(topics, list):
+        topics = []
+        
+    tags = resource.get('tags', [])
+    if not isinstance(tags, list):
+        tags = []
+    
+    content = f"Title: {resource.get('title', 'Unknown')}\n"
+    content += f"Type: {resource.get('type', 'documentation')}\n"
+    content += f"Topics: {', '.join(topics)}\n"
+    content += f"Tags: {', '.join(tags)}\n"
+    content += f"Difficulty: {resource.get('difficulty', 'beginner')}\n"
+    content += f"Description: {resource.get('description', '')}\n"
+    content += f"URL: {resource.get('url', '')}"
+    
+    return Document(page_content=content, metadata=resource)
+
+def _question_document(question: Dict[str, Any]) -> Document:
+    if "_id" in question:
+        question["_id"] = str(question["_id"])
+    
+    tags = question.get('tags', [])
+    if not isinstance(tags, list):
+        tags = []
+    
+    options = question.get('options', [])
+    if not isinstance(options, list):
+        options = []
+    
+    content = f"Question: {question.get('question', '')}\n"
+    
+    for i, option in enumerate(options):
+        content += f"Option {i+1}: {option}\n"
+    
+    content += f"Topic: {question.get('topic', '')}\n"
+    content += f"Tags: {', '.join(tags)}\n"
+    content += f"Difficulty: {question.get('difficulty', 'beginner')}\n"
+    
+    return Document(page_content=content, metadata=question)
+
+def _resource_key(resource: Dict[str, Any]) -> str:
+    return canonicalize_url(resource.get('url', ''))
+
+def _question_key(question: Dict[str, Any]) -> str:
+    return canonicalize_text(question.get('question', ''))
+
+def _item_version(item: Dict[str, Any]) -> datetime:
+    updated_at = item.get('updatedAt')
+    if isinstance(updated_at, datetime):
+        return updated_at
+    if isinstance(item.get('_id'), ObjectId):
+        return item['_id'].generation_time.replace(tzinfo=None)
+    return datetime.min
+
+def _latest_ids(items: Iterable[Dict[str, Any]], item_key: ItemKey) -> Set[Any]:
+    """_ids of the most recently written item of each canonical key; items without a key lose"""
+    latest: Dict[str, Tuple[datetime, Any]] = {}
+    for item in items:
+        key = item_key(item)
+        if not key:
+            continue
+        version = _item_version(item)
+        if key not in latest or version >= latest[key][0]:
+            latest[key] = (version, item["_id"])
+    return {item_id for _, item_id in latest.values()}
+
+def _deduplicate(items: List[Dict[str, Any]], item_key: ItemKey) -> List[Dict[str, Any]]:
+    """One item per canonical key, the most recently written one winning; items without a key are dropped"""
+    latest = _latest_ids(items, item_key)
+    return [item for item in items if item["_id"] in latest]
+
+def _batched(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def _split_documents(documents: List[Document]) -> List[Document]:
+    text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=100)
+    return text_splitter.split_documents(documents)
+
+def _chunk_documents(documents: List[Document], one_vector_per_item: bool) -> List[Document]:
+    # Deduplicated stores embed each item whole; the model truncates overlong text
+    return documents if one_vector_per_item else _split_documents(documents)
+
+def _stream_chunks(documents: Iterable[Document], one_vector_per_item: bool, report: BuildReport) -> Iterator[Document]:
+    chunks = (chunk for doc in documents for chunk in _chunk_documents([doc], one_vector_per_item))
+    return report.timed(chunks, "split")
+
+def _embed_documents(split_docs: List[Document], cache_name: str) -> np.ndarray:
+    """Embed chunks through the store's embedding cache, keeping its other entries.
+
+    Incremental updates only embed changed items, so nothing is pruned here;
+    full rebuilds prune the cache to their corpus in _rebuild_store.
+    """
+    cache = EmbeddingCache(os.path.join(EMBEDDING_CACHE_PATH, cache_name), EMBEDDINGS_MODEL_ID)
+    vectors = cache.embed([doc.page_content for doc in split_docs], get_embeddings().embed_documents)
+    cache.save()
+    logger.info(f"Embedded {len(split_docs)} chunks for {cache_name}: {cache.hits} cached, {cache.misses} computed")
+    return vectors
+
+def _document_record(doc: Document) -> Dict[str, Any]:
+    return {"page_content": doc.page_content, "metadata": doc.metadata}
+
+def _validate_and_publish(index_path: str, version: str):
+    """Load a snapshot, check it can serve queries and make it the live one"""
+    embeddings_model = read_manifest(snapshot_path(index_path, version)).get("embeddings_model")
+    if embeddings_model != EMBEDDINGS_MODEL_ID:
+        # Models of the same dimension would pass the probe but return unrelated results
+        raise SnapshotValidationError(
+            f"Snapshot was embedded with {embeddings_model}, the serving model is {EMBEDDINGS_MODEL_ID}"
+        )
+    vector_store = load_vector_store(snapshot_path(index_path, version), get_embeddings())
+    validate_store(vector_store, embed_query(VALIDATION_QUERY))
+    publish_snapshot(index_path, version, VECTOR_STORE_SNAPSHOTS_TO_KEEP)
+    publish_vector_store(index_path, vector_store, version)
+
+def _keeps_rerank_vectors(quantization: str) -> bool:
+    # Quantized indexes keep full-precision vectors on disk for exact re-ranking
+    return RERANK_QUANTIZED and quantization != "none"
+
+def _index_manifest_fields(index_path: str, index: faiss.Index) -> Dict[str, Any]:
+    return {
+        "embeddings_model": EMBEDDINGS_MODEL_ID,
+        "index_type": index_type_of(index),
+        "quantization": quantization_of(index),
+        "configured_index_type": STORE_INDEX_TYPES.get(index_path, "flat"),
+        "configured_quantization": STORE_QUANTIZATIONS.get(index_path, "none")
+    }
+
+def _publish_new_snapshot(index_path: str, version: str, report: BuildReport):
+    manifest = read_manifest(snapshot_path(index_path, version))
+    logger.info(
+        f"Wrote snapshot {version} of {index_path}: {manifest['count']} vectors, "
+        f"{manifest['index_type']}/{manifest['quantization']} index of {manifest['index_bytes']} bytes "
+        f"({manifest['compression_ratio']}x smaller than float32), "
+        f"{manifest['item_count']} items in a {manifest['docstore_bytes']} byte docstore"
+    )
+    # Serve the memory-mapped copy so the in-memory build can be released
+    try:
+        with report.phase("validate"):
+            _validate_and_publish(index_path, version)
+    except SnapshotValidationError as e:
+        discard_snapshot(index_path, version)
+        logger.error(f"Discarded snapshot {version} of {index_path}: {str(e)}")
+        raise
+    write_build_report(index_path, version, report.as_dict())
+    report.log_summary()
+
+def _write_and_publish(
+    index_path: str,
+    index: faiss.Index,
+    records: List[Dict[str, Any]],
+    vectors: Optional[np.ndarray],
+    report: BuildReport,
+    **manifest_fields
+):
+    with report.phase("persist"):
+        version = write_snapshot(
+            index_path, index, records,
+            vectors=vectors if _keeps_rerank_vectors(quantization_of(index)) else None,
+            **_index_manifest_fields(index_path, index),
+            **manifest_fields
+        )
+    _publish_new_snapshot(index_path, version, report)
+
+def _rebuild_store(
+    index_path: str,
+    documents: Iterable[Document],
+    one_vector_per_item: bool = False,
+    report: Optional[BuildReport] = None,
+    **manifest_fields
+) -> int:
+    """Build and publish a snapshot from a stream of documents and return its vector count.
+
+    Chunks are embedded and added to the index EMBEDDING_BATCH_SIZE at a time, and
+    their records and newly computed vectors streamed to disk, so apart from the
+    index and the embedding cache's key bookkeeping (a few hundred bytes per chunk)
+    memory does not grow with the corpus. Index types that need training hold back the first
+    INDEX_TRAINING_SAMPLE_SIZE vectors to train on. Phase timings go to report,
+    which the caller may have started to time reading the documents.
+    """
+    report = report or BuildReport(index_path, "full")
+    index_type = STORE_INDEX_TYPES.get(index_path, "flat")
+    quantization = STORE_QUANTIZATIONS.get(index_path, "none")
+    keep_vectors = _keeps_rerank_vectors(quantization)
+    cache = EmbeddingCache(os.path.join(EMBEDDING_CACHE_PATH, os.path.basename(index_path)), EMBEDDINGS_MODEL_ID)
+    chunks = _stream_chunks(documents, one_vector_per_item, report)
+    
+    with SnapshotWriter(index_path, keep_vectors=keep_vectors) as writer:
+        index = None
+        held_back: List[Tuple[List[Document], np.ndarray]] = []
+        
+        def add(batch: List[Document], vectors: np.ndarray):
+            labels = np.arange(writer.count, writer.count + len(batch), dtype=np.int64)
+            with report.phase("index_add"):
+                index.add_with_ids(vectors, labels)
+            with report.phase("persist"):
+                writer.add([_document_record(doc) for doc in batch], labels, vectors if keep_vectors else None)
+        
+        def train(sample: List[Tuple[List[Document], np.ndarray]]) -> faiss.Index:
+            with report.phase("train"):
+                return create_index(index_type, np.vstack([held for _, held in sample]), quantization)
+        
+        for batch in _batched(chunks, EMBEDDING_BATCH_SIZE):
+            with report.phase("embed"):
+                vectors = cache.embed([doc.page_content for doc in batch], get_embeddings().embed_documents)
+            if index is not None:
+                add(batch, vectors)
+                continue
+            held_back.append((batch, vectors))
+            if sum(len(held) for held, _ in held_back) >= INDEX_TRAINING_SAMPLE_SIZE:
+                index = train(held_back)
+                for held_batch, held_vectors in held_back:
+                    add(held_batch, held_vectors)
+                held_back = []
+        
+        if index is None:
+            if not held_back:
+                raise SnapshotValidationError(f"Refusing to build {index_path} from an empty corpus")
+            index = train(held_back)
+            for held_batch, held_vectors in held_back:
+                add(held_batch, held_vectors)
+        
+        with report.phase("persist"):
+            cache.save(prune=True)
+            logger.info(f"Embedded {writer.count} chunks for {index_path}: {cache.hits} cached, {cache.misses} computed")
+            report.extra["embedding_cache"] = {"hits": cache.hits, "misses": cache.misses}
+            version = writer.finish(
+                index,
+                next_id=writer.count,
+                one_vector_per_item=one_vector_per_item,
+                **_index_manifest_fields(index_path, index),
+                **manifest_fields
+            )
+    
+    _publish_new_snapshot(index_path, version, report)
+    return index.ntotal
+
+def _changed_since(watermark: datetime) -> Dict[str, Any]:
+    # ObjectIds carry their creation second, so this also matches items created
+    # in the watermark second itself; re-embedding those is harmless
+    return {"$or": [
+        {"_id": {"$gt": ObjectId.from_datetime(watermark)}},
+        {"updatedAt": {"$gt": watermark}}
+    ]}
+
+def _update_store_incrementally(
+    index_path: str,
+    collection,
+    to_document: Callable[[Dict[str, Any]], Document],
+    item_key: Optional[ItemKey] = None,
+    fields: Optional[List[str]] = None
+) -> Optional[str]:
+    """Apply inserts, updates and deletes since the stored watermark; returns why a full rebuild is needed instead, if it is.
+
+    With item_key, a changed item replaces whichever item held its key. An item
+    shadowed by a since-deleted duplicate only returns with the next full rebuild.
+    """
+    # Pinned, so every file below comes from the same snapshot
+    source = _current_snapshot(index_path)
+    manifest = read_manifest(source)
+    if "watermark" not in manifest or "next_id" not in manifest:
+        return "it has no watermark"
+    if manifest.get("embeddings_model") != EMBEDDINGS_MODEL_ID:
+        return "its embedding model changed"
+    if manifest.get("configured_index_type", "flat") != STORE_INDEX_TYPES.get(index_path, "flat"):
+        return "its index type changed in config"
+    if manifest.get("configured_quantization", "none") != STORE_QUANTIZATIONS.get(index_path, "none"):
+        return "its quantization changed in config"
+    if manifest.get("one_vector_per_item", False) != (item_key is not None):
+        return "its deduplication changed"
+    
+    watermark = datetime.fromisoformat(manifest["watermark"])
+    scan_started = _utc_now()
+    report = BuildReport(index_path, "incremental")
+    
+    with report.phase("read"):
+        current_ids = {str(item["_id"]) for item in collection.find({}, {"_id": 1})}
+        changed = list(collection.find(_changed_since(watermark), {field: 1 for field in fields} if fields else None))
+    changed_ids = {str(item["_id"]) for item in changed}
+    replaced_keys = set()
+    if item_key is not None:
+        changed = _deduplicate(changed, item_key)
+        replaced_keys = {item_key(item) for item in changed}
+    
+    with report.phase("read"):
+        index = read_index(source, mmap_mode=False)
+        records = read_records(source)
+        labels = index_labels(index)
+        # Carried through the update; only needed while the store is quantized
+        stored_vectors = read_vectors(source)
+    if stored_vectors is None and RERANK_QUANTIZED and quantization_of(index) != "none":
+        return "it has no re-ranking vectors"
+    
+    stale_positions = [
+        position for position, record in enumerate(records)
+        if record["metadata"].get("_id") not in current_ids
+        or record["metadata"].get("_id") in changed_ids
+        or (replaced_keys and item_key(record["metadata"]) in replaced_keys)
+    ]
+    known_ids = {record["metadata"].get("_id") for record in records}
+    deleted_count = len(known_ids - current_ids)
+    
+    if not stale_positions and not changed:
+        logger.info(f"No changes for {index_path} since {watermark.isoformat()}")
+        return None
+    
+    if stale_positions and not supports_removal(index):
+        return f"its {index_type_of(index)} index cannot remove the {len(stale_positions)} changed or deleted vectors"
+    
+    if stale_positions:
+        with report.phase("index_add"):
+            index.remove_ids(labels[stale_positions])
+        stale = set(stale_positions)
+        records = [record for position, record in enumerate(records) if position not in stale]
+        if stored_vectors is not None:
+            stored_vectors = np.delete(stored_vectors, stale_positions, axis=0)
+    
+    next_id = manifest["next_id"]
+    if changed:
+        documents = report.timed((to_document(item) for item in changed), "construct")
+        split_docs = list(_stream_chunks(documents, item_key is not None, report))
+        with report.phase("embed"):
+            vectors = _embed_documents(split_docs, os.path.basename(index_path))
+        with report.phase("index_add"):
+            index.add_with_ids(vectors, np.arange(next_id, next_id + len(split_docs), dtype=np.int64))
+        records.extend(_document_record(doc) for doc in split_docs)
+        if stored_vectors is not None:
+            stored_vectors = np.vstack([stored_vectors, vectors])
+        next_id += len(split_docs)
+    
+    _write_and_publish(
+        index_path, index, records, stored_vectors, report,
+        next_id=next_id,
+        one_vector_per_item=item_key is not None,
+        watermark=scan_started.isoformat()
+    )
+    logger.info(
+        f"Incrementally updated {index_path}: {len(changed)} added or changed, {deleted_count} deleted"
+    )
+    return None
+
+def _refresh_store(
+    index_path: str,
+    collection,
+    to_document: Callable[[Dict[str, Any]], Document],
+    label: str,
+    full_rebuild: bool,
+    item_key: Optional[ItemKey] = None,
+    fields: Optional[List[str]] = None,
+    key_fields: Optional[List[str]] = None
+) -> Optional[str]:
+    # The scheduler and first requests for a missing store, in any worker, may race
+    # to build it; the losers wait and then find nothing left to do
+    with _store_build_lock(index_path):
+        return _refresh_store_locked(index_path, collection, to_document, label, full_rebuild, item_key, fields, key_fields)
+
+def _refresh_store_locked(
+    index_path: str,
+    collection,
+    to_document: Callable[[Dict[str, Any]], Document],
+    label: str,
+    full_rebuild: bool,
+    item_key: Optional[ItemKey] = None,
+    fields: Optional[List[str]] = None,
+    key_fields: Optional[List[str]] = None
+) -> Optional[str]:
+    """Refresh a store of Mongo items and return the mode used, "incremental" or "full".
+
+    Only fields are read (all when None). With item_key, each canonical key is
+    stored as one vector; key_fields are the fields item_key reads. Returns
+    None when the collection is empty and nothing was built.
+    """
+    if not full_rebuild and index_exists(index_path):
+        reason = _update_store_incrementally(index_path, collection, to_document, item_key, fields)
+        if reason is None:
+            return "incremental"
+        logger.info(f"Rebuilding {index_path} from scratch: {reason}")
+    
+    scan_started = _utc_now()
+    report = BuildReport(index_path, "full")
+    with report.phase("read"):
+        empty = collection.find_one({}, {"_id": 1}) is None
+    if empty:
+        logger.warning(f"No {label} found in MongoDB")
+        return None
+    
+    projection = {field: 1 for field in fields} if fields else None
+    items = report.timed(collection.find({}, projection, batch_size=MONGO_BATCH_SIZE), "read")
+    if item_key is not None:
+        # A first pass over just the key fields picks each key's winner, so the
+        # full documents can then be streamed without holding them for dedup
+        key_projection = {field: 1 for field in (key_fields or [])} if key_fields else projection
+        with report.phase("read"):
+            latest = _latest_ids(collection.find({}, key_projection, batch_size=MONGO_BATCH_SIZE), item_key)
+        logger.info(f"{len(latest)} distinct {label} in MongoDB")
+        items = (item for item in items if item["_id"] in latest)
+    
+    documents = report.timed((to_document(item) for item in items), "construct")
+    count = _rebuild_store(
+        index_path, documents,
+        one_vector_per_item=item_key is not None,
+        report=report,
+        watermark=scan_started.isoformat()
+    )
+    
+    logger.info(f"{label.capitalize()} vector store updated with {count} vectors")
+    return "full"
+
+def load_projects() -> bool:
+    """Load projects from JSON file and create vector store; True if it was built"""
     try:
-        if os.path.exists(PROJECTS_FAISS_INDEX_PATH+".pkl"):
+        if index_exists(PROJECTS_FAISS_INDEX_PATH):
             logger.info("Projects vector store already exists")
-            return
+            return False
 
         if not os.path.exists("codedex_projects.json"):
             logger.warning("codedex_projects.json not found")
-            return
+            return False
             
-        with open("codedex_projects.json", "r", encoding ="utf-8") as f:
-            projects_data = json.load(f)
-        
-        documents = []
-        for project in projects_data:
-            # Extract searchable content
-            content = f"Title: {project.get('title', '')}\n"
-            content += f"Tags: {', '.join(project.get('tags', []))}\n"
-            
-            # Extract text from checkpoints to make searchable
-            for checkpoint in project.get('checkpoints', []):
-                content += f"Checkpoint: {checkpoint.get('checkpoint', '')}\n"
-                for item in checkpoint.get('content', []):
-                    if item.get('type') == 'p':
-                        content += f"{item.get('text', '')}\n"
-                    elif item.get('type') == 'pre':
-                        content += f"Code: {item.get('text', '')}\n"
-            
-            doc = Document(page_content=content, metadata=project)
-            documents.append(doc)
+        report = BuildReport(PROJECTS_FAISS_INDEX_PATH, "full")
+        with report.phase("read"):
+            with open("codedex_projects.json", "r", encoding ="utf-8") as f:
+                projects_data = json.load(f)
         
+        documents = list(report.timed((_project_document(project) for project in projects_data), "construct"))
         logger.info(f"Loaded {len(documents)} projects")
         
-        # Create vector store
-        embeddings = HuggingFaceEmbeddings(model_name=EMBEDDINGS_MODEL_NAME)
-        text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=100)
-        split_docs = text_splitter.split_documents(documents)
-        
-        vector_store = FAISS.from_documents(split_docs, embeddings)
-        
-        # Save vector store
-        with open(f"{PROJECTS_FAISS_INDEX_PATH}.pkl", "wb") as f:
-            pickle.dump(vector_store, f)
+        _rebuild_store(PROJECTS_FAISS_INDEX_PATH, documents, report=report)
             
         logger.info(f"Projects vector store created with {len(documents)} documents")
+        return True
         
     except Exception as e:
         logger.error(f"Failed to load projects: {str(e)}")
+        return False
 
 def get_projects_vector_store() -> FAISS:
     """Get the projects vector store"""
-    if os.path.exists(f"{PROJECTS_FAISS_INDEX_PATH}.pkl"):
-        logger.info("Loading existing projects FAISS index...")
-        with open(f"{PROJECTS_FAISS_INDEX_PATH}.pkl", "rb") as f:
-            vector_store = pickle.load(f)
-        return vector_store
-    else:
-        load_projects()
-    
-    logger.info("Creating a new projects FAISS index...")
-    load_projects()
-    
-    with open(f"{PROJECTS_FAISS_INDEX_PATH}.pkl", "rb") as f:
-        vector_store = pickle.load(f)
-    
-    return vector_store
+    return get_registered_store(PROJECTS_FAISS_INDEX_PATH, load_projects)
 
-def refresh_resources_vector_store():
+def refresh_resources_vector_store(full_rebuild: bool = False) -> Optional[str]:
+    """Bring the resources store up to date and return the mode used; incremental unless full_rebuild is set"""
     client = get_mongodb_client()
     db = client[DB_NAME]
     collection = db.resourcesFromCommunity
     
-    resources = list(collection.find())
-    logger.info(f"Found {len(resources)} resources in MongoDB")
-    
-    if not resources:
-        logger.warning("No resources found in MongoDB")
-        return
-    
-    documents = []
-    for resource in resources:
-        if "_id" in resource:
-            resource["_id"] = str(resource["_id"])
-        
-        topics = resource.get('topics', [])
-        if not isinstance(topics, list):
-            topics = []
-            
-        tags = resource.get('tags', [])
-        if not isinstance(tags, list):
-            tags = []
-        
-        content = f"Title: {resource.get('title', 'Unknown')}\n"
-        content += f"Type: {resource.get('type', 'documentation')}\n"
-        content += f"Topics: {', '.join(topics)}\n"
-        content += f"Tags: {', '.join(tags)}\n"
-        content += f"Difficulty: {resource.get('difficulty', 'beginner')}\n"
-        content += f"Description: {resource.get('description', '')}\n"
-        content += f"URL: {resource.get('url', '')}"
-        
-        doc = Document(page_content=content, metadata=resource)
-        documents.append(doc)
-    
-    embeddings = HuggingFaceEmbeddings(model_name=EMBEDDINGS_MODEL_NAME)
-    text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=100)
-    split_docs = text_splitter.split_documents(documents)
-    
-    vector_store = FAISS.from_documents(split_docs, embeddings)
-    
-    with open(f"{RESOURCES_FAISS_INDEX_PATH}.pkl", "wb") as f:
-        pickle.dump(vector_store, f)
-        
-    logger.info(f"Resources vector store updated with {len(documents)} documents")
+    return _refresh_store(
+        RESOURCES_FAISS_INDEX_PATH, collection, _resource_document, "resources", full_rebuild,
+        item_key=_resource_key,
+        fields=RESOURCE_FIELDS,
+        key_fields=["url", "updatedAt"]
+    )
 
-def refresh_questions_vector_store():
+def refresh_questions_vector_store(full_rebuild: bool = False) -> Optional[str]:
+    """Bring the questions store up to date and return the mode used; incremental unless full_rebuild is set"""
     client = get_mongodb_client()
     db = client[DB_NAME]
     collection = db.questionsFromCommunity
     
-    questions = list(collection.find())
-    logger.info(f"Found {len(questions)} questions in MongoDB")
+    return _refresh_store(
+        QUESTIONS_FAISS_INDEX_PATH, collection, _question_document, "questions", full_rebuild,
+        item_key=_question_key,
+        fields=QUESTION_FIELDS,
+        key_fields=["question", "updatedAt"]
+    )
+
+STORE_REFRESHERS: Dict[str, Callable[..., None]] = {
+    "resources": refresh_resources_vector_store,
+    "questions": refresh_questions_vector_store
+}
+
+FOOTPRINT_FIELDS = (
+    "count", "item_count", "index_type", "quantization", "index_bytes",
+    "float32_vector_bytes", "rerank_vector_bytes", "compression_ratio", "docstore_bytes"
+)
+
+def get_store_footprints() -> Dict[str, Dict[str, Any]]:
+    """Index type, quantization and on-disk size of every built store"""
+    footprints = {}
+    for index_path in STORE_INDEX_TYPES:
+        if index_exists(index_path):
+            manifest = read_manifest(index_path)
+            footprints[os.path.basename(index_path)] = {field: manifest.get(field) for field in FOOTPRINT_FIELDS}
+    return footprints
+
+def get_store_build_reports() -> Dict[str, Optional[Dict[str, Any]]]:
+    """How the live snapshot of every built store was built"""
+    return {
+        store_name: read_build_report(index_path)
+        for store_name, index_path in STORE_PATHS.items()
+        if index_exists(index_path)
+    }
+
+def get_store_snapshots() -> Dict[str, Dict[str, Any]]:
+    """Published and rollback-ready snapshot versions of every store"""
+    return {
+        store_name: {"current": current_version(index_path), "available": list_snapshots(index_path)}
+        for store_name, index_path in STORE_PATHS.items()
+    }
+
+def rollback_vector_store(store_name: str, version: Optional[str] = None) -> str:
+    """Republish an older snapshot, by default the one before the live one, and return its version.
+
+    Raises BuildInProgressError at once rather than waiting for a running build.
+    """
+    if store_name not in STORE_PATHS:
+        raise ValueError(f"Unknown vector store: {store_name}")
+    index_path = STORE_PATHS[store_name]
     
-    if not questions:
-        logger.warning("No questions found in MongoDB")
-        return
+    lock = _store_build_lock(index_path)
+    try:
+        lock.acquire(timeout=0)
+    except Timeout:
+        raise BuildInProgressError(f"The {store_name} vector store is being built, try again once it is published")
     
-    documents = []
-    for question in questions:
-        if "_id" in question:
-            question["_id"] = str(question["_id"])
-        
-        tags = question.get('tags', [])
-        if not isinstance(tags, list):
-            tags = []
-        
-        options = question.get('options', [])
-        if not isinstance(options, list):
-            options = []
-        
-        content = f"Question: {question.get('question', '')}\n"
-        
-        for i, option in enumerate(options):
-            content += f"Option {i+1}: {option}\n"
-        
-        content += f"Topic: {question.get('topic', '')}\n"
-        content += f"Tags: {', '.join(tags)}\n"
-        content += f"Difficulty: {question.get('difficulty', 'beginner')}\n"
+    try:
+        snapshots = list_snapshots(index_path)
+        live = current_version(index_path)
+        if version is None:
+            older = [snapshot for snapshot in snapshots if live is None or snapshot < live]
+            if not older:
+                raise ValueError(f"No snapshot of {store_name} older than {live} to roll back to")
+            version = older[-1]
+        elif version not in snapshots:
+            raise ValueError(f"No snapshot {version} of {store_name}; available: {', '.join(snapshots)}")
         
-        doc = Document(page_content=content, metadata=question)
-        documents.append(doc)
+        _validate_and_publish(index_path, version)
+    finally:
+        lock.release()
     
-    embeddings = HuggingFaceEmbeddings(model_name=EMBEDDINGS_MODEL_NAME)
-    text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=100)
-    split_docs = text_splitter.split_documents(documents)
-    
-    vector_store = FAISS.from_documents(split_docs, embeddings)
+    logger.info(f"Rolled {store_name} back from snapshot {live} to {version}")
+    return version
+
+def refresh_vector_store(store_name: str, force: bool = False, full_rebuild: bool = False) -> Optional[str]:
+    """Run whichever refresh is due for store_name and return its mode, or None if the store is fresh.
+
+    A full rebuild is due every UPDATE_INTERVAL_DAYS and an incremental update every
+    INCREMENTAL_UPDATE_INTERVAL_MINUTES; force runs an incremental update regardless.
+    If another process is already refreshing the store this returns None at once.
+    """
+    lock = _store_build_lock(STORE_PATHS[store_name])
+    try:
+        lock.acquire(timeout=0)
+    except Timeout:
+        logger.info(f"Another process is refreshing the {store_name} vector store, serving the current snapshot")
+        return None
     
-    with open(f"{QUESTIONS_FAISS_INDEX_PATH}.pkl", "wb") as f:
-        pickle.dump(vector_store, f)
-        
-    logger.info(f"Questions vector store updated with {len(documents)} documents")
+    try:
+        return _refresh_vector_store_locked(store_name, force, full_rebuild)
+    finally:
+        lock.release()
 
-def get_resources_vector_store() -> FAISS:
-    update_info = get_last_update_info()
+def _due_mode(store_name: str, force: bool, full_rebuild: bool, update_info: Dict[str, datetime], now: datetime) -> Optional[str]:
+    last_full = update_info.get(store_name, datetime.min)
+    last_incremental = max(update_info.get(f"{store_name}_incremental", datetime.min), last_full)
+    if full_rebuild or now - last_full > timedelta(days=UPDATE_INTERVAL_DAYS):
+        return "full"
+    if force or now - last_incremental > timedelta(minutes=INCREMENTAL_UPDATE_INTERVAL_MINUTES):
+        return "incremental"
+    return None
+
+def _refresh_vector_store_locked(store_name: str, force: bool, full_rebuild: bool) -> Optional[str]:
+    refresh = STORE_REFRESHERS[store_name]
+    # Read under the lock, so a refresh that just finished elsewhere counts
     now = datetime.now()
+    incremental_key = f"{store_name}_incremental"
+    mode = _due_mode(store_name, force, full_rebuild, get_last_update_info(), now)
     
-    if now - update_info.get("resources", datetime.min) > timedelta(days=UPDATE_INTERVAL_DAYS):
-        try:
-            refresh_resources_vector_store()
-            update_info["resources"] = now
-            save_last_update_info(update_info)
-        except Exception as e:
-            logger.error(f"Failed to refresh resources vector store: {e}")
-    
-    if os.path.exists(f"{RESOURCES_FAISS_INDEX_PATH}.pkl"):
-        logger.info("Loading existing resources FAISS index...")
-        with open(f"{RESOURCES_FAISS_INDEX_PATH}.pkl", "rb") as f:
-            vector_store = pickle.load(f)
-        return vector_store
-    
-    logger.info("Creating a new resources FAISS index...")
-    refresh_resources_vector_store()
+    if mode == "full":
+        logger.info(f"Rebuilding {store_name} vector store...")
+        mode = refresh(full_rebuild=True) or mode
+    elif mode == "incremental":
+        logger.info(f"Incrementally updating {store_name} vector store...")
+        # Falls back to a full rebuild when the update cannot be applied
+        mode = refresh() or mode
+    else:
+        return None
     
-    with open(f"{RESOURCES_FAISS_INDEX_PATH}.pkl", "rb") as f:
-        vector_store = pickle.load(f)
+    record_last_update({store_name: now, incremental_key: now} if mode == "full" else {incremental_key: now})
+    return mode
+
+# Every store check_and_update_vector_stores keeps up to date; projects are
+# built from codedex_projects.json when missing and never refreshed
+ALL_STORES = ("projects", *STORE_REFRESHERS)
+BUILD_WORKER_MODULE = "services.build_worker"
+# Thread pool sizes read by the libraries a build uses, when they start up
+BUILD_THREAD_VARIABLES = (
+    "OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS", "RAYON_NUM_THREADS", "ONNX_INTRA_OP_THREADS"
+)
+
+def refresh_due(store_name: str, force: bool = False, full_rebuild: bool = False) -> bool:
+    """Whether refresh_store would build anything; a cheap check that loads no model"""
+    if store_name == "projects":
+        return not index_exists(PROJECTS_FAISS_INDEX_PATH)
+    return _due_mode(store_name, force, full_rebuild, get_last_update_info(), datetime.now()) is not None
+
+def refresh_store(store_name: str, force: bool = False, full_rebuild: bool = False) -> Optional[str]:
+    """refresh_vector_store for any store, projects included"""
+    if store_name == "projects":
+        built = load_projects()
+        if not index_exists(PROJECTS_FAISS_INDEX_PATH):
+            raise RuntimeError("The projects vector store could not be built")
+        return "full" if built else None
+    if store_name not in STORE_REFRESHERS:
+        raise ValueError(f"Unknown vector store: {store_name}")
+    return refresh_vector_store(store_name, force=force, full_rebuild=full_rebuild)
+
+def _threads_per_build() -> int:
+    if REFRESH_THREADS_PER_BUILD > 0:
+        return REFRESH_THREADS_PER_BUILD
+    return max(1, (os.cpu_count() or 1) // max(1, REFRESH_MAX_PARALLEL_BUILDS))
+
+def _build_in_subprocess(store_name: str, force: bool, full_rebuild: bool) -> Dict[str, Any]:
+    # Every worker's scheduler finds the same builds due; only spawn a process
+    # if no other one is building the store right now
+    lock = _store_build_lock(STORE_PATHS[store_name])
+    try:
+        lock.acquire(timeout=0)
+    except Timeout:
+        logger.info(f"Another process is refreshing the {store_name} vector store, serving the current snapshot")
+        return {"mode": None, "pid": None, "error": None}
+    lock.release()
+
+    # Thread limits only apply to libraries that have not started yet, which in
+    # a fresh interpreter is all of them
+    threads = str(_threads_per_build())
+    package_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = {
+        **os.environ,
+        **{variable: threads for variable in BUILD_THREAD_VARIABLES},
+        "PYTHONPATH": os.pathsep.join(filter(None, [package_root, os.environ.get("PYTHONPATH")]))
+    }
+    command = [sys.executable, "-m", BUILD_WORKER_MODULE, store_name]
+    if force:
+        command.append("--force")
+    if full_rebuild:
+        command.append("--full-rebuild")
     
-    return vector_store
+    try:
+        completed = subprocess.run(command, stdout=subprocess.PIPE, env=env, text=True, timeout=REFRESH_BUILD_TIMEOUT_SECONDS)
+    except subprocess.TimeoutExpired:
+        raise RuntimeError(f"Build process for {store_name} was killed after {REFRESH_BUILD_TIMEOUT_SECONDS} seconds")
+    lines = completed.stdout.strip().splitlines()
+    try:
+        return json.loads(lines[-1])
+    except (IndexError, ValueError):
+        raise RuntimeError(f"Build process for {store_name} exited with status {completed.returncode} and no result")
 
-def get_questions_vector_store() -> FAISS:
-    update_info = get_last_update_info()
-    now = datetime.now()
+def run_refreshes(
+    requests: Dict[str, Tuple[bool, bool]],
+    on_start: Optional[Callable[[str], None]] = None
+) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Refresh each requested store (name -> (force, full_rebuild)) and yield its status as it finishes.
+
+    Due builds run concurrently, up to REFRESH_MAX_PARALLEL_BUILDS at a time, each
+    in a fresh process limited to REFRESH_THREADS_PER_BUILD threads. This process
+    only checks which builds are due and picks up the published snapshots
+    afterwards, and a build's memory is returned when its process exits. No process
+    is started for a store another process is already building, and one still
+    running after REFRESH_BUILD_TIMEOUT_SECONDS is killed. With
+    REFRESH_MAX_PARALLEL_BUILDS=0 the builds run here, one after another.
+    on_start is called with the name of each store whose build starts.
+    """
+    due = []
+    for store_name, (force, full_rebuild) in requests.items():
+        if refresh_due(store_name, force, full_rebuild):
+            due.append(store_name)
+        else:
+            yield store_name, {"mode": None, "seconds": 0.0, "error": None, "pid": None}
     
-    if now - update_info.get("questions", datetime.min) > timedelta(days=UPDATE_INTERVAL_DAYS):
+    def run(store_name: str) -> Dict[str, Any]:
+        force, full_rebuild = requests[store_name]
+        if on_start is not None:
+            on_start(store_name)
+        started = time.perf_counter()
         try:
-            refresh_questions_vector_store()
-            update_info["questions"] = now
-            save_last_update_info(update_info)
+            if REFRESH_MAX_PARALLEL_BUILDS > 0:
+                result = _build_in_subprocess(store_name, force, full_rebuild)
+            else:
+                result = {"mode": refresh_store(store_name, force, full_rebuild), "pid": os.getpid(), "error": None}
         except Exception as e:
-            logger.error(f"Failed to refresh questions vector store: {e}")
+            result = {"mode": None, "pid": None, "error": str(e)}
+        if result.get("error"):
+            logger.error(f"Refresh of {store_name} failed: {result['error']}")
+        return {**result, "seconds": round(time.perf_counter() - started, 3)}
     
-    if os.path.exists(f"{QUESTIONS_FAISS_INDEX_PATH}.pkl"):
-        logger.info("Loading existing questions FAISS index...")
-        with open(f"{QUESTIONS_FAISS_INDEX_PATH}.pkl", "rb") as f:
-            vector_store = pickle.load(f)
-        return vector_store
+    if REFRESH_MAX_PARALLEL_BUILDS <= 0:
+        for store_name in due:
+            yield store_name, run(store_name)
+        return
     
-    logger.info("Creating a new questions FAISS index...")
-    refresh_questions_vector_store()
+    if not due:
+        return
+    with ThreadPoolExecutor(max_workers=min(REFRESH_MAX_PARALLEL_BUILDS, len(due)), thread_name_prefix="vector-store-build") as pool:
+        futures = {pool.submit(run, store_name): store_name for store_name in due}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+def get_resources_vector_store() -> FAISS:
+    # Refreshes run in the background scheduler; requests always get the last good index
+    return get_registered_store(RESOURCES_FAISS_INDEX_PATH, refresh_resources_vector_store)
+
+def get_questions_vector_store() -> FAISS:
+    return get_registered_store(QUESTIONS_FAISS_INDEX_PATH, refresh_questions_vector_store)
+
+def preload_vector_stores():
+    """Load the embedding model and every built store into this process.
+
+    Called in the gunicorn master before it forks, so workers share these pages
+    copy-on-write instead of each loading its own copy. Nothing here builds a
+    store or starts a thread, which would not survive the fork.
+    """
+    get_embeddings()
+    for index_path in STORE_INDEX_TYPES:
+        if index_exists(index_path):
+            get_registered_store(index_path, None)
+    logger.info(f"Preloaded the embedding model and {len(_store_registry)} vector stores")
+
+def check_and_update_vector_stores() -> Dict[str, Any]:
+    """Bring every store up to date, running due builds concurrently, and return their combined status"""
+    started_at = datetime.now().isoformat()
+    started = time.perf_counter()
+    stores = {}
+    for store_name, status in run_refreshes({store_name: (False, False) for store_name in ALL_STORES}):
+        stores[store_name] = status
+        if not status["error"]:
+            logger.info(f"{store_name.capitalize()} vector store is up to date")
     
-    with open(f"{QUESTIONS_FAISS_INDEX_PATH}.pkl", "rb") as f:
-        vector_store = pickle.load(f)
+    # Topics come from the same sources, so the catalog follows the stores
+    topic_catalog = refresh_topic_catalog(any(status["mode"] and not status["error"] for status in stores.values()))
     
-    return vector_store
+    wall_seconds = round(time.perf_counter() - started, 3)
+    logger.info(
+        f"Checked {len(stores)} vector stores in {wall_seconds}s "
+        f"(slowest build {max((status['seconds'] for status in stores.values()), default=0)}s)"
+    )
+    return {
+        "started_at": started_at,
+        "wall_seconds": wall_seconds,
+        "max_parallel_builds": REFRESH_MAX_PARALLEL_BUILDS,
+        "threads_per_build": _threads_per_build() if REFRESH_MAX_PARALLEL_BUILDS > 0 else None,
+        "stores": stores,
+        "topic_catalog": topic_catalog
+    }
 
-def check_and_update_vector_stores():
-    update_info = get_last_update_info()
-    now = datetime.now()
+def embed_queries(queries: List[str]) -> np.ndarray:
+    """Embed many retrieval queries with one model call for all cache misses"""
+    normalized = [normalize_query(query) for query in queries]
+    vectors: List[Optional[List[float]]] = [_query_cache.get(query) for query in normalized]
     
-    if now - update_info.get("resources", datetime.min) > timedelta(days=UPDATE_INTERVAL_DAYS):
-        logger.info("Updating resources vector store...")
-        try:
-            refresh_resources_vector_store()
-            update_info["resources"] = now
-            logger.info("Resources vector store updated successfully")
-        except Exception as e:
-            logger.error(f"Failed to update resources vector store: {e}")
+    missing = list(dict.fromkeys(query for query, vector in zip(normalized, vectors) if vector is None))
+    if missing:
+        computed = dict(zip(missing, get_embeddings().embed_documents(missing)))
+        for query, vector in computed.items():
+            _query_cache.put(query, vector)
+        vectors = [vector if vector is not None else computed[query] for query, vector in zip(normalized, vectors)]
     
-    if now - update_info.get("questions", datetime.min) > timedelta(days=UPDATE_INTERVAL_DAYS):
-        logger.info("Updating questions vector store...")
-        try:
-            refresh_questions_vector_store()
-            update_info["questions"] = now
-            logger.info("Questions vector store updated successfully")
-        except Exception as e:
-            logger.error(f"Failed to update questions vector store: {e}")
+    return np.asarray(vectors, dtype=np.float32)
+
+def _search_batch(vector_store: FAISS, query_vectors: np.ndarray, k: int, filters: Optional[Dict[str, Any]] = None) -> List[List[Document]]:
+    """One matrix search for all queries; results keep FAISS rank order.
+
+    filters maps a metadata field to a value or list of values. Only vectors
+    matching the filter are scored, with IVF nprobe and HNSW efSearch widened by
+    how selective it is; a query that still finds fewer than k of the matches is
+    searched again exhaustively, so k results come back whenever k match.
+    Quantized stores fetch a RERANK_K_FACTOR times larger shortlist and order it
+    by exact distance to the full-precision vectors.
+    """
+    if not len(query_vectors):
+        return []
+    
+    rerank_vectors = getattr(vector_store, "rerank_vectors", None)
     
-    save_last_update_info(update_info)
+    def search(vectors: np.ndarray, params: Optional[faiss.SearchParameters]) -> np.ndarray:
+        if rerank_vectors is not None:
+            _, shortlist = vector_store.index.search(vectors, k * RERANK_K_FACTOR, params=params)
+            return rerank_exact(vectors, shortlist, vector_store.vectors_for_labels, k)
+        _, found = vector_store.index.search(vectors, k, params=params)
+        return found
+    
+    if not filters:
+        labels = search(query_vectors, None)
+    else:
+        if not isinstance(vector_store, PersistedFAISS):
+            raise ValueError("Filtered search needs a store loaded with its attribute index")
+        allowed = vector_store.labels_matching(filters)
+        if not len(allowed):
+            return [[] for _ in range(len(query_vectors))]
+        selector = faiss.IDSelectorBatch(allowed)
+        labels = search(query_vectors, search_parameters(vector_store.index, selector, len(allowed)))
+        short = np.flatnonzero((labels >= 0).sum(axis=1) < min(k, len(allowed)))
+        if len(short):
+            params = search_parameters(vector_store.index, selector, len(allowed), exhaustive=True)
+            labels[short] = search(query_vectors[short], params)
+    
+    results = []
+    for row in labels:
+        docs = []
+        for label in row:
+            if label == -1:
+                continue
+            doc = vector_store.docstore.search(vector_store.index_to_docstore_id[int(label)])
+            if isinstance(doc, Document):
+                docs.append(doc)
+        results.append(docs)
+    return results
 
-def retrieve_relevant_resources(topic: str, vector_store: FAISS) -> List[Dict[str, str]]:
-    retriever = vector_store.as_retriever(search_kwargs={"k": 40})
-    retrieved_docs = retriever.get_relevant_documents(topic)
+def _unique_resources(retrieved_docs: List[Document]) -> List[Dict[str, str]]:
     retrieved_resources = []
     for doc in retrieved_docs:
             resource = doc.metadata
@@ -280,6 +1062,7 @@ def retrieve_relevant_resources(topic: str, vector_store: FAISS) -> List[Dict[st
             }
             retrieved_resources.append(transformed_resource)
     
+    # Stores hold one vector per URL; this only guards stores built before ingest-time dedup
     seen = set()
     unique_resources = []
     for resource in retrieved_resources:
@@ -288,19 +1071,15 @@ def retrieve_relevant_resources(topic: str, vector_store: FAISS) -> List[Dict[st
             seen.add(resource_key)
             unique_resources.append(resource)
     
-    return unique_resources[:20]
+    return unique_resources[:RESOURCES_K]
 
-def retrieve_relevant_questions(topic: str, difficulty: str, tags: List[str], vector_store: FAISS) -> List[Dict[str, Any]]:
-    query = f"Topic: {topic}, Difficulty: {difficulty}, Tags: {', '.join(tags)}"
-    
-    retriever = vector_store.as_retriever(search_kwargs={"k": 30})
-    retrieved_docs = retriever.get_relevant_documents(query)
-    
+def _unique_questions(retrieved_docs: List[Document]) -> List[Dict[str, Any]]:
     retrieved_questions = []
     for doc in retrieved_docs:
         if doc.metadata and "question" in doc.metadata:
             retrieved_questions.append(doc.metadata)
     
+    # As for resources, duplicates are already removed at ingest
     seen = set()
     unique_questions = []
     for question in retrieved_questions:
@@ -309,4 +1088,26 @@ def retrieve_relevant_questions(topic: str, difficulty: str, tags: List[str], ve
             seen.add(question_key)
             unique_questions.append(question)
     
-    return unique_questions[:15]
\ No newline at end of file
+    return unique_questions[:QUESTIONS_K]
+
+def _question_query(topic: str, difficulty: str, tags: List[str]) -> str:
+    return f"Topic: {topic}, Difficulty: {difficulty}, Tags: {', '.join(tags)}"
+
+QuestionQuery = Union[str, Tuple[str, str, List[str]]]
+
+def retrieve_relevant_resources_batch(topics: List[str], vector_store: FAISS, filters: Optional[Dict[str, Any]] = None) -> List[List[Dict[str, str]]]:
+    """Deduplicated resources for each topic, from one embedding call and one FAISS search"""
+    retrieved = _search_batch(vector_store, embed_queries(topics), k=RESOURCES_K, filters=filters)
+    return [_unique_resources(docs) for docs in retrieved]
+
+def retrieve_relevant_questions_batch(queries: List[QuestionQuery], vector_store: FAISS, filters: Optional[Dict[str, Any]] = None) -> List[List[Dict[str, Any]]]:
+    """Deduplicated questions for each topic or (topic, difficulty, tags) tuple"""
+    query_texts = [query if isinstance(query, str) else _question_query(*query) for query in queries]
+    retrieved = _search_batch(vector_store, embed_queries(query_texts), k=QUESTIONS_K, filters=filters)
+    return [_unique_questions(docs) for docs in retrieved]
+
+def retrieve_relevant_resources(topic: str, vector_store: FAISS, filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, str]]:
+    return retrieve_relevant_resources_batch([topic], vector_store, filters)[0]
+
+def retrieve_relevant_questions(topic: str, difficulty: str, tags: List[str], vector_store: FAISS, filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    return retrieve_relevant_questions_batch([(topic, difficulty, tags)], vector_store, filters)[0]
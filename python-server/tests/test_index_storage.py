@@ -0,0 +1,111 @@
+import os
+import sys
+
+import faiss
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import services.vector_store as vector_store
+from services.embedding_backends import StubEmbeddings
+from services.embedding_cache import QueryEmbeddingCache
+from services.index_storage import (
+    LabelPositions, SnapshotValidationError, current_version, index_labels, list_snapshots,
+    load_vector_store, publish_snapshot, snapshot_path, write_snapshot
+)
+
+DIMENSION = 16
+
+def _vectors(labels, dimension=DIMENSION):
+    vectors = np.random.default_rng(0).standard_normal((max(labels) + 1, dimension)).astype(np.float32)
+    vectors = vectors[labels]
+    faiss.normalize_L2(vectors)
+    return vectors
+
+def _record(label):
+    return {"page_content": f"doc {label}", "metadata": {"url": f"https://example.com/{label}"}}
+
+def _write(index_path, labels, dimension=DIMENSION, embeddings_model=None):
+    """Snapshot of an id-mapped flat index holding one vector per label"""
+    index = faiss.IndexIDMap2(faiss.IndexFlatIP(dimension))
+    index.add_with_ids(_vectors(labels, dimension), np.asarray(labels, dtype=np.int64))
+    records = [_record(label) for label in index_labels(index)]
+    manifest_fields = vector_store._index_manifest_fields(index_path, index)
+    if embeddings_model:
+        manifest_fields["embeddings_model"] = embeddings_model
+    return write_snapshot(index_path, index, records, **manifest_fields)
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """A resources store under tmp_path, served with stub embeddings"""
+    index_path = str(tmp_path / "resources")
+    monkeypatch.setitem(vector_store.STORE_PATHS, "resources", index_path)
+    monkeypatch.setattr(vector_store, "get_embeddings", lambda: StubEmbeddings(DIMENSION))
+    monkeypatch.setattr(vector_store, "_query_cache", QueryEmbeddingCache(16, 60))
+    monkeypatch.setattr(vector_store, "_store_registry", {})
+    return index_path
+
+def test_label_positions_after_remove_and_add(tmp_path):
+    index = faiss.IndexIDMap2(faiss.IndexFlatIP(DIMENSION))
+    index.add_with_ids(_vectors([0, 1, 2, 3, 4, 5]), np.arange(6, dtype=np.int64))
+    index.remove_ids(faiss.IDSelectorBatch(np.asarray([1, 3], dtype=np.int64)))
+    # Appended out of order, as an incremental update may do
+    index.add_with_ids(_vectors([9, 6]), np.asarray([9, 6], dtype=np.int64))
+
+    labels = index_labels(index)
+    positions = LabelPositions(labels)
+    assert len(positions) == 6
+    for position, label in enumerate(labels):
+        assert positions[label] == str(position)
+    for missing in (1, 3, 7, -1, "x"):
+        assert missing not in positions
+    with pytest.raises(KeyError):
+        positions[3]
+
+    records = [_record(label) for label in labels]
+    version = write_snapshot(str(tmp_path), index, records)
+    loaded = load_vector_store(snapshot_path(str(tmp_path), version), StubEmbeddings(DIMENSION))
+    for label in (0, 2, 4, 5, 6, 9):
+        _, found = loaded.index.search(_vectors([label]), 1)
+        docstore_id = loaded.index_to_docstore_id[int(found[0][0])]
+        assert loaded.docstore.search(docstore_id).page_content == f"doc {label}"
+
+def test_identity_labels():
+    positions = LabelPositions(np.arange(4, dtype=np.int64))
+    assert [positions[label] for label in range(4)] == ["0", "1", "2", "3"]
+    assert 4 not in positions
+
+def test_failed_validation_keeps_current(store):
+    live = _write(store, [0, 1, 2])
+    vector_store._validate_and_publish(store, live)
+    assert current_version(store) == live
+
+    # Vectors of another dimension than the serving model's
+    broken = _write(store, [0, 1, 2], dimension=DIMENSION * 2)
+    with pytest.raises(SnapshotValidationError):
+        vector_store._publish_new_snapshot(store, broken, vector_store.BuildReport("resources", "full"))
+    assert current_version(store) == live
+    assert list_snapshots(store) == [live]
+
+    other_model = _write(store, [0, 1, 2], embeddings_model="another-model")
+    with pytest.raises(SnapshotValidationError):
+        vector_store._validate_and_publish(store, other_model)
+    assert current_version(store) == live
+
+def test_rollback_republishes_previous_version(store):
+    first = _write(store, [0, 1, 2])
+    publish_snapshot(store, first, 3)
+    second = _write(store, [0, 1, 2, 3])
+    vector_store._validate_and_publish(store, second)
+    assert vector_store._store_registry[store][0].index.ntotal == 4
+
+    assert vector_store.rollback_vector_store("resources") == first
+    assert current_version(store) == first
+    assert list_snapshots(store) == [first, second]
+    assert vector_store._store_registry[store][0].index.ntotal == 3
+
+    with pytest.raises(ValueError):
+        vector_store.rollback_vector_store("resources")
+    assert vector_store.rollback_vector_store("resources", second) == second
+    assert current_version(store) == second
@@ -0,0 +1,62 @@
+import os
+import sys
+import json
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.json_stream import ArrayItemStreamParser
+
+ROADMAP = {
+    "mainTopic": "Python",
+    "description": "Learn {python} \"fast\"",
+    "checkpoints": [
+        {"title": "Basics", "resources": [{"name": "a]b}c", "tags": ["x", "y"]}]},
+        {"title": "Say \"hi\" \\ {", "resources": []},
+        {"title": "Classes", "resources": [{"name": "d"}]}
+    ],
+    "metadata": {"steps": [1, 2]}
+}
+
+def feed_all(parser, chunks):
+    items = []
+    for chunk in chunks:
+        items.extend(parser.feed(chunk))
+    return items
+
+def test_items_split_across_chunks():
+    text = "Here is your roadmap:\n```json\n" + json.dumps(ROADMAP) + "\n```"
+    for size in (1, 3, 7, len(text)):
+        parser = ArrayItemStreamParser("checkpoints")
+        items = feed_all(parser, [text[i:i + size] for i in range(0, len(text), size)])
+        assert items == ROADMAP["checkpoints"]
+        assert parser.text == text
+
+def test_items_are_returned_as_soon_as_they_close():
+    text = json.dumps(ROADMAP)
+    parser = ArrayItemStreamParser("checkpoints")
+    first = json.dumps(ROADMAP["checkpoints"][0])
+    first_end = text.index(first) + len(first)
+    assert parser.feed(text[:first_end - 1]) == []
+    assert parser.feed(text[first_end - 1:first_end]) == [ROADMAP["checkpoints"][0]]
+
+def test_braces_and_escaped_quotes_inside_strings():
+    text = json.dumps({"description": "a \"[\" {", "checkpoints": [{"title": "\\\"}]"}, {"title": "ok"}]})
+    parser = ArrayItemStreamParser("checkpoints")
+    assert feed_all(parser, list(text)) == [{"title": "\\\"}]"}, {"title": "ok"}]
+
+def test_other_arrays_are_ignored():
+    text = json.dumps({"tags": [{"title": "no"}], "checkpoints": [{"title": "yes", "tags": [{"t": 1}]}]})
+    assert ArrayItemStreamParser("checkpoints").feed(text) == [{"title": "yes", "tags": [{"t": 1}]}]
+
+def test_truncated_input_returns_completed_items_only():
+    text = json.dumps(ROADMAP)
+    cut = text.index('"Classes"')
+    assert ArrayItemStreamParser("checkpoints").feed(text[:cut]) == ROADMAP["checkpoints"][:2]
+    assert ArrayItemStreamParser("checkpoints").feed("no json here") == []
+
+def test_invalid_item_raises():
+    parser = ArrayItemStreamParser("checkpoints")
+    with pytest.raises(ValueError):
+        parser.feed('{"checkpoints": [{"title": "a",}]}')
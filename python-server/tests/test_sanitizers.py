@@ -0,0 +1,14 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.sanitizers import canonicalize_url
+
+def test_canonicalize_url_normalizes_equivalent_urls():
+    assert canonicalize_url("http://www.Example.com/a//b/?utm_source=x&b=2&a=1") == "https://example.com/a/b?a=1&b=2"
+
+def test_canonicalize_url_falls_back_for_malformed_urls():
+    assert canonicalize_url(" https://X.com:abc/ ") == "https://x.com:abc/"
+    assert canonicalize_url("https://x.com:99999/path") == "https://x.com:99999/path"
+    assert canonicalize_url("http://[::1/") == "http://[::1/"
@@ -0,0 +1,93 @@
+import time
+import logging
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List
+
+from utils.memory_utils import peak_rss_bytes, reset_peak_rss
+
+logger = logging.getLogger(__name__)
+
+# Phases of an index build, in pipeline order
+BUILD_PHASES = ("read", "construct", "split", "embed", "train", "index_add", "persist", "validate")
+
+class BuildReport:
+    """Wall-clock time per phase of one index build.
+
+    Builds stream items through nested generators, so a phase pulling from
+    another phase would otherwise be charged for it. Time is always charged to
+    the innermost active phase only. Peak RSS is process-wide and includes
+    whatever else the process did during the build.
+    """
+
+    def __init__(self, store: str, mode: str):
+        self.store = store
+        self.mode = mode
+        self.started_at = datetime.now().isoformat()
+        self.seconds: Dict[str, float] = {phase: 0.0 for phase in BUILD_PHASES}
+        self.counts: Dict[str, int] = {}
+        self.extra: Dict[str, Any] = {}
+        self._stack: List[str] = []
+        self._resumed = time.perf_counter()
+        self._started = self._resumed
+        self._peak_is_per_build = reset_peak_rss()
+
+    def _switch(self):
+        now = time.perf_counter()
+        if self._stack:
+            self.seconds[self._stack[-1]] += now - self._resumed
+        self._resumed = now
+
+    @contextmanager
+    def phase(self, name: str):
+        self._switch()
+        self._stack.append(name)
+        try:
+            yield
+        finally:
+            self._switch()
+            self._stack.pop()
+
+    def timed(self, items: Iterable[Any], name: str) -> Iterator[Any]:
+        """Yield items, charging the time spent producing each one to phase name and counting them"""
+        iterator = iter(items)
+        while True:
+            with self.phase(name):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            self.counts[name] = self.counts.get(name, 0) + 1
+            yield item
+
+    def as_dict(self) -> Dict[str, Any]:
+        total = time.perf_counter() - self._started
+        documents = self.counts.get("construct", 0)
+        return {
+            "store": self.store,
+            "mode": self.mode,
+            "started_at": self.started_at,
+            "total_seconds": round(total, 3),
+            "documents": documents,
+            "chunks": self.counts.get("split", 0),
+            "documents_per_second": round(documents / total, 2) if total else None,
+            "phases": {
+                phase: {"seconds": round(seconds, 3), "share": round(seconds / total, 4) if total else None}
+                for phase, seconds in self.seconds.items()
+            },
+            "peak_rss_bytes": peak_rss_bytes(),
+            "peak_rss_scope": "build" if self._peak_is_per_build else "process",
+            **self.extra
+        }
+
+    def log_summary(self):
+        report = self.as_dict()
+        phases = " ".join(
+            f"{phase}={timing['seconds']:.2f}s" for phase, timing in report["phases"].items() if timing["seconds"]
+        )
+        peak = report["peak_rss_bytes"]
+        logger.info(
+            f"Built {self.store} ({self.mode}) in {report['total_seconds']:.2f}s: "
+            f"{report['documents']} documents at {report['documents_per_second']}/s, {phases}"
+            + (f", peak rss {peak / 2**20:.1f}MB" if peak is not None else "")
+        )
@@ -2,6 +2,7 @@ import os
 import json
 import logging
 from datetime import datetime, timedelta
+from filelock import FileLock
 from pymongo import MongoClient
 from typing import Dict
 
@@ -35,10 +36,27 @@ def get_last_update_info() -> Dict[str, datetime]:
         "questions": now
     }
 
-def save_last_update_info(update_info: Dict[str, datetime]):
-    with open(LAST_UPDATE_FILE, 'w') as f:
+def record_last_update(updates: Dict[str, datetime]):
+    """Merge timestamps into the last update file without losing those written
+    concurrently by other processes"""
+    with FileLock(f"{LAST_UPDATE_FILE}.lock"):
+        update_info = {}
+        if os.path.exists(LAST_UPDATE_FILE):
+            try:
+                with open(LAST_UPDATE_FILE, 'r') as f:
+                    update_info = {k: datetime.fromisoformat(v) for k, v in json.load(f).items()}
+            except Exception as e:
+                logger.error(f"Error reading last update info: {e}")
+        update_info.update(updates)
+        _write_last_update_file(update_info)
+
+def _write_last_update_file(update_info: Dict[str, datetime]):
+    # Replaced atomically, so readers never see a partially written file
+    tmp_file = f"{LAST_UPDATE_FILE}.tmp"
+    with open(tmp_file, 'w') as f:
         json_data = {
             k: v.isoformat() 
             for k, v in update_info.items()
         }
-        json.dump(json_data, f)
\ No newline at end of file
+        json.dump(json_data, f)
+    os.replace(tmp_file, LAST_UPDATE_FILE)
\ No newline at end of file
@@ -0,0 +1,77 @@
+import json
+from typing import Any, List, Optional
+
+class ArrayItemStreamParser:
+    """Incremental JSON scanner that returns the items of one top-level array as soon as each is complete.
+
+    Fed the text of an LLM response chunk by chunk, e.g. a roadmap whose
+    "checkpoints" items should reach the client before the model has written
+    the rest. Text before the first "{" (prose, code fences) is skipped. Only
+    string and nesting state is tracked while scanning; each completed item
+    is decoded with json.loads.
+    """
+
+    def __init__(self, array_key: str):
+        self.array_key = array_key
+        self.text = ""
+        self._position = 0
+        self._start: Optional[int] = None
+        self._end: Optional[int] = None
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._string_start = 0
+        # Last string closed directly in the top-level object, and the key whose value is being read
+        self._last_string: Optional[str] = None
+        self._key: Optional[str] = None
+        self._in_array = False
+        self._item_start: Optional[int] = None
+
+    def feed(self, chunk: str) -> List[Any]:
+        """Add the next piece of text and return the array items it completed"""
+        self.text += chunk
+        items = []
+        text = self.text
+        position = self._position
+        while position < len(text) and self._end is None:
+            char = text[position]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._last_string = json.loads(text[self._string_start:position + 1])
+            elif self._start is None:
+                if char == "{":
+                    self._start = position
+                    self._depth = 1
+            elif char == '"':
+                self._in_string = True
+                self._string_start = position
+            elif char in "{[":
+                if self._in_array and self._depth == 2:
+                    self._item_start = position
+                self._depth += 1
+                if char == "[" and self._depth == 2 and self._key == self.array_key:
+                    self._in_array = True
+            elif char in "}]":
+                self._depth -= 1
+                if self._in_array and self._depth == 2 and self._item_start is not None:
+                    items.append(json.loads(text[self._item_start:position + 1]))
+                    self._item_start = None
+                elif self._in_array and self._depth == 1:
+                    self._in_array = False
+                elif self._depth == 0:
+                    self._end = position
+            elif self._depth == 1:
+                if char == ":":
+                    self._key = self._last_string
+                elif char == ",":
+                    self._key = None
+            position += 1
+        self._position = position
+        return items
+
@@ -0,0 +1,107 @@
+import os
+import sys
+import logging
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Fields of /proc/<pid>/smaps_rollup, in kB. Pss splits each shared page
+# between the processes mapping it, so summing Pss over the workers gives their
+# real combined footprint, while Rss counts shared pages once per worker.
+_SMAPS_FIELDS = {
+    "Rss": "rss_bytes",
+    "Pss": "pss_bytes",
+    "Shared_Clean": "shared_clean_bytes",
+    "Shared_Dirty": "shared_dirty_bytes",
+    "Private_Clean": "private_clean_bytes",
+    "Private_Dirty": "private_dirty_bytes"
+}
+
+def process_memory(pid: int) -> Optional[Dict[str, int]]:
+    """Resident, proportional, shared and private memory of a process; None off Linux"""
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", "r") as f:
+            lines = f.readlines()
+    except OSError:
+        return None
+
+    memory = {}
+    for line in lines:
+        name, _, value = line.partition(":")
+        if name in _SMAPS_FIELDS:
+            memory[_SMAPS_FIELDS[name]] = int(value.split()[0]) * 1024
+    memory["shared_bytes"] = memory.get("shared_clean_bytes", 0) + memory.get("shared_dirty_bytes", 0)
+    memory["private_bytes"] = memory.get("private_clean_bytes", 0) + memory.get("private_dirty_bytes", 0)
+    return memory
+
+def _parent_pid(pid: int) -> Optional[int]:
+    try:
+        with open(f"/proc/{pid}/stat", "r") as f:
+            # The command name may contain spaces, so split after its closing parenthesis
+            return int(f.read().rsplit(")", 1)[1].split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+
+def _sibling_pids(parent_pid: int) -> List[int]:
+    pids = []
+    for entry in os.listdir("/proc"):
+        if entry.isdigit() and _parent_pid(int(entry)) == parent_pid:
+            pids.append(int(entry))
+    return sorted(pids)
+
+def worker_memory_report(preloaded: bool) -> Dict[str, Any]:
+    """Memory of this process and, when running as a preloaded gunicorn worker, of
+    the master and every sibling worker"""
+    pid = os.getpid()
+    if not preloaded:
+        return {"preloaded": False, "workers": [{"pid": pid, **(process_memory(pid) or {})}]}
+
+    master_pid = os.getppid()
+    workers = []
+    for worker_pid in _sibling_pids(master_pid):
+        memory = process_memory(worker_pid)
+        if memory is not None:
+            workers.append({"pid": worker_pid, "current": worker_pid == pid, **memory})
+
+    return {
+        "preloaded": True,
+        "master": {"pid": master_pid, **(process_memory(master_pid) or {})},
+        "workers": workers,
+        "total_pss_bytes": sum(worker.get("pss_bytes", 0) for worker in workers)
+    }
+
+def log_process_memory(label: str):
+    memory = process_memory(os.getpid())
+    if memory is None:
+        return
+    logger.info(
+        f"{label} (pid {os.getpid()}): rss={memory.get('rss_bytes', 0) / 2**20:.1f}MB "
+        f"pss={memory.get('pss_bytes', 0) / 2**20:.1f}MB "
+        f"shared={memory['shared_bytes'] / 2**20:.1f}MB private={memory['private_bytes'] / 2**20:.1f}MB"
+    )
+
+def reset_peak_rss() -> bool:
+    """Restart this process's peak RSS count from its current RSS; False where the kernel can't"""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+def peak_rss_bytes() -> Optional[int]:
+    """Highest RSS of this process since it started or since reset_peak_rss"""
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import resource
+        # kB on Linux, bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    except ImportError:
+        return None
@@ -1,7 +1,44 @@
 import re
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
 
 def sanitize_input(input_text: str) -> str:
     """Sanitize input text by removing HTML tags and excessive whitespace"""
     clean_text = re.sub(r'<[^>]*>', '', input_text)
     clean_text = re.sub(r'\s+', ' ', clean_text).strip()
-    return clean_text
\ No newline at end of file
+    return clean_text
+
+# Query parameters that only track where a link was shared from
+_TRACKING_PARAM_PREFIX = "utm_"
+_TRACKING_PARAMS = {"ref", "fbclid", "gclid"}
+
+def canonicalize_url(url: str) -> str:
+    """Canonical form of a URL for duplicate detection; empty for blank input"""
+    url = (url or "").strip()
+    if not url:
+        return ""
+    try:
+        return _canonical_url_parts(url)
+    except ValueError:
+        # Malformed user-submitted URLs (bad port, broken IPv6 host) still get a stable key
+        return url.lower()
+
+def _canonical_url_parts(url: str) -> str:
+    parts = urlsplit(url if "://" in url else f"https://{url}")
+    scheme = parts.scheme.lower()
+    if scheme == "http":
+        scheme = "https"
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+    path = re.sub(r"/+", "/", parts.path).rstrip("/")
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith(_TRACKING_PARAM_PREFIX) and key.lower() not in _TRACKING_PARAMS
+    ))
+    return urlunsplit((scheme, host, path, query, ""))
+
+def canonicalize_text(text: str) -> str:
+    """Case- and whitespace-insensitive form of a text for duplicate detection"""
+    return " ".join((text or "").lower().split())